@@ -1,12 +1,14 @@
 from flask import Flask
 
 from app.exception import register_error_handlers
+from app.util.logger import logger
 
 
 def create_app(config_class):
     app = Flask(__name__)
 
     app.config.from_object(config_class)
+    logger.start(config_class.LOG_DIR)
 
     from .controllers import main
 
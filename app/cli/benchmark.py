@@ -0,0 +1,108 @@
+"""
+Benchmarks the heatmap, jaccard index and f1-score calculators with synthetic documents, e.g.
+
+    python -m app.cli.benchmark --tokens 1000 5000 10000 --annotators 2 5 --baseline benchmark-baseline.json
+
+With --save-baseline the results are stored as new baseline. With --baseline the run fails if a
+median duration is slower than its baseline by more than --threshold.
+"""
+
+import argparse
+import sys
+
+from app.model.benchmark import BenchmarkReport
+from app.util.benchmark import CALCULATORS, find_regressions, run_benchmark
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Time the calculators for synthetic documents of different sizes"
+    )
+    parser.add_argument(
+        "--tokens",
+        type=int,
+        nargs="+",
+        default=[1_000, 5_000, 10_000],
+        help="token counts of the documents",
+    )
+    parser.add_argument(
+        "--annotators",
+        type=int,
+        nargs="+",
+        default=[2, 5],
+        help="numbers of edits of the documents, at least 2",
+    )
+    parser.add_argument(
+        "--calculators", nargs="+", choices=CALCULATORS, default=list(CALCULATORS)
+    )
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--mention-density", type=float, default=0.3)
+    parser.add_argument("--relation-density", type=float, default=0.5)
+    parser.add_argument("--entity-cluster-size", type=int, default=3)
+    parser.add_argument("--disagreement-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="json file of a previous run to compare to")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed increase of the median duration compared to the baseline",
+    )
+    parser.add_argument("--save-baseline", help="file to store the results in")
+    parsed_args = parser.parse_args(args)
+
+    report = run_benchmark(
+        parsed_args.tokens,
+        parsed_args.annotators,
+        parsed_args.calculators,
+        repetitions=parsed_args.repetitions,
+        mention_density=parsed_args.mention_density,
+        relation_density=parsed_args.relation_density,
+        entity_cluster_size=parsed_args.entity_cluster_size,
+        disagreement_rate=parsed_args.disagreement_rate,
+        seed=parsed_args.seed,
+    )
+
+    print(
+        f"{'calculator':<10} {'annotators':>10} {'tokens':>8} {'median s':>10}"
+        f" {'min s':>10} {'peak MiB':>9} {'scaling':>8}"
+    )
+    for result in report.results:
+        scaling = (
+            f"{result.scaling_exponent:.2f}"
+            if result.scaling_exponent is not None
+            else "-"
+        )
+        print(
+            f"{result.calculator:<10} {result.annotator_count:>10} {result.token_count:>8}"
+            f" {result.median_seconds:>10.4f} {result.min_seconds:>10.4f}"
+            f" {result.peak_memory_bytes / 1024**2:>9.1f} {scaling:>8}"
+        )
+
+    if parsed_args.save_baseline:
+        with open(parsed_args.save_baseline, "w", encoding="utf-8") as file:
+            file.write(report.model_dump_json(indent=2))
+
+    if not parsed_args.baseline:
+        return 0
+
+    with open(parsed_args.baseline, encoding="utf-8") as file:
+        baseline = BenchmarkReport.model_validate_json(file.read())
+    if baseline.parameters != report.parameters:
+        print(
+            "The baseline was created with other document parameters.", file=sys.stderr
+        )
+        return 2
+
+    regressions = find_regressions(report, baseline, parsed_args.threshold)
+    for regression in regressions:
+        print(
+            f"Regression {regression.key}: {regression.median_seconds:.4f}s,"
+            f" baseline {regression.baseline_seconds:.4f}s",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
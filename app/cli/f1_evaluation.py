@@ -0,0 +1,62 @@
+"""
+Evaluates predictions of a corpus without the http server, e.g.
+
+    python -m app.cli.f1_evaluation predictions.ndjson --workers 4
+
+Every line of the NDJSON files is an object {"actual": <document edit>, "predicted": <document edit>}.
+"""
+
+import argparse
+import sys
+
+from app.config import Config
+from app.util.corpus_f1_evaluator import CorpusF1Evaluator, read_ndjson_records
+from app.util.logger import logger
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Calculate micro and macro averaged f1-scores for NDJSON files of actual and predicted document edits"
+    )
+    parser.add_argument(
+        "files", nargs="+", help="NDJSON files to evaluate, '-' reads from stdin"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=Config.PROCESS_POOL_WORKERS,
+        help="number of worker processes",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=100,
+        help="number of records a worker scores at once",
+    )
+    parser.add_argument(
+        "--output", help="file to write the result to instead of stdout"
+    )
+    parsed_args = parser.parse_args(args)
+    # no log files, the records are written to stderr
+    logger.start(log_dir="")
+
+    evaluator = CorpusF1Evaluator(
+        workers=parsed_args.workers, chunk_size=parsed_args.chunk_size
+    )
+    result = evaluator.evaluate(read_ndjson_records(parsed_args.files))
+
+    for error in evaluator.errors:
+        print(error, file=sys.stderr)
+
+    result_json = result.model_dump_json(indent=2)
+    if parsed_args.output:
+        with open(parsed_args.output, "w", encoding="utf-8") as file:
+            file.write(result_json)
+    else:
+        print(result_json)
+
+    return 1 if result.failed_document_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
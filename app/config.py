@@ -1,8 +1,85 @@
 import os
 
+# Worker processes of the production server, every worker starts its own process pools
+_WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1"))
+# cpu cores of every worker of the production server, the default size of its process pools
+_CPUS_PER_WEB_WORKER = max(1, (os.cpu_count() or 1) // _WEB_WORKERS)
+
 
 class Config:
     DEBUG = (
         os.getenv("DEBUG", "False") == "1"
         or os.getenv("DEBUG", "True").lower() == "true"
     )
+    # Directory of the log files, every process writes its own file. Logs are written to stderr if it is empty
+    LOG_DIR = os.getenv("LOG_DIR", "logs")
+    # Share of the requests whose complete payloads are logged, in debug mode they are always logged
+    LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0"))
+    # If requests with the header X-Profile: 1 are profiled, the response gets a Server-Timing header with the stage durations
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False").lower() in ("1", "true")
+    # Directory the cProfile stats of profiled requests are stored in, no stats are stored if it is empty
+    PROFILING_DIR = os.getenv("PROFILING_DIR", "")
+    # Maximum size of a gzip or zstd compressed request body after decompression, larger bodies are rejected
+    REQUEST_MAX_DECOMPRESSED_BYTES = int(
+        os.getenv("REQUEST_MAX_DECOMPRESSED_BYTES", str(512 * 1024**2))
+    )
+    # Responses are compressed if the client accepts it and they are at least this large
+    RESPONSE_COMPRESSION_MIN_BYTES = int(
+        os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024")
+    )
+    # Number of worker processes for CPU heavy calculations
+    PROCESS_POOL_WORKERS = int(
+        os.getenv("PROCESS_POOL_WORKERS", str(_CPUS_PER_WEB_WORKER))
+    )
+    # Minimum number of document edits to calculate the jaccard index matrix in the process pool
+    JACCARD_PARALLEL_MIN_EDITS = int(os.getenv("JACCARD_PARALLEL_MIN_EDITS", "8"))
+    # Bounds of the in-process cache for heatmap, jaccard index and f1-score results, 0 disables the cache
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256"))
+    RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024**2)))
+    RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+    # Bounds of the cache for the derived features of single document edits, 0 disables the cache
+    EDIT_FEATURE_CACHE_MAX_ENTRIES = int(
+        os.getenv("EDIT_FEATURE_CACHE_MAX_ENTRIES", "1024")
+    )
+    EDIT_FEATURE_CACHE_MAX_BYTES = int(
+        os.getenv("EDIT_FEATURE_CACHE_MAX_BYTES", str(128 * 1024**2))
+    )
+    EDIT_FEATURE_CACHE_TTL_SECONDS = float(
+        os.getenv("EDIT_FEATURE_CACHE_TTL_SECONDS", "3600")
+    )
+    # Bounds of the stored heatmap sessions, sessions expire if they are not updated within the ttl
+    HEATMAP_SESSION_MAX_COUNT = int(os.getenv("HEATMAP_SESSION_MAX_COUNT", "64"))
+    HEATMAP_SESSION_MAX_BYTES = int(
+        os.getenv("HEATMAP_SESSION_MAX_BYTES", str(256 * 1024**2))
+    )
+    HEATMAP_SESSION_TTL_SECONDS = float(
+        os.getenv("HEATMAP_SESSION_TTL_SECONDS", "1800")
+    )
+    # Worker processes of the job pool, which runs calculations submitted as asynchronous jobs
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(_CPUS_PER_WEB_WORKER)))
+    # Maximum number of queued and running jobs, further submissions are rejected
+    JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "32"))
+    # Time finished jobs and their results are kept
+    JOB_RESULT_TTL_SECONDS = float(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+    # Settings of the production server, see gunicorn.conf.py
+    WEB_BIND = os.getenv("WEB_BIND", "0.0.0.0:8443")
+    # Number of worker processes which handle requests. Heatmap sessions and jobs are kept in the memory of one
+    # worker, so they are only available with one worker. Several workers scale the stateless endpoints
+    WEB_WORKERS = _WEB_WORKERS
+    # Number of threads of every worker, calculations of the threads of one worker share a cpu core
+    WEB_THREADS = int(os.getenv("WEB_THREADS", "8"))
+    # A worker is restarted after it handled this number of requests plus a random jitter, 0 disables restarts.
+    # Only applied with several workers, a single worker would lose its heatmap sessions and jobs
+    WEB_MAX_REQUESTS = int(os.getenv("WEB_MAX_REQUESTS", "0"))
+    WEB_MAX_REQUESTS_JITTER = int(os.getenv("WEB_MAX_REQUESTS_JITTER", "100"))
+    # Seconds a request may take before its worker is restarted
+    WEB_TIMEOUT = int(os.getenv("WEB_TIMEOUT", "120"))
+    # Seconds workers get to finish their requests on a restart or shutdown
+    WEB_GRACEFUL_TIMEOUT = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+    # Directory the worker processes share their metrics in, so every worker reports the metrics of all workers.
+    # gunicorn.conf.py uses a temporary directory if it is empty and there are several workers
+    METRICS_MULTIPROCESS_DIR = os.getenv("METRICS_MULTIPROCESS_DIR", "")
+    # Seconds between the writes of the metrics of a process into its file of METRICS_MULTIPROCESS_DIR
+    METRICS_WRITE_INTERVAL_SECONDS = float(
+        os.getenv("METRICS_WRITE_INTERVAL_SECONDS", "5")
+    )
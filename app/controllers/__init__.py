@@ -1,7 +1,20 @@
 from flask import Blueprint
-from flask_restx import Api, Namespace
+from flask_restx import Api, Namespace, abort
+
+from app.config import Config
+from app.util.content_negotiation import compress_response, decompress_request_body
+from app.util.metrics import observe_request_duration, start_request_timer
+from app.util.profiling import finish_profiling, start_profiling, stop_profiler
 
 main = Blueprint("difference calculator api", __name__, url_prefix="/difference-calc")
+main.before_request(start_request_timer)
+main.before_request(start_profiling)
+main.before_request(decompress_request_body)
+main.after_request(observe_request_duration)
+main.after_request(finish_profiling)
+# after request functions run in reverse order, the compression is measured by the profiling
+main.after_request(compress_response)
+main.teardown_request(stop_profiler)
 
 api = Api(
     main,
@@ -12,9 +25,24 @@ api = Api(
     serve_path="/difference-calc",  # available via /difference-calc/docs
 )
 
+
+def require_single_web_worker(feature: str) -> None:
+    """
+    Heatmap sessions and jobs are kept in the memory of the worker which created them, with several workers the
+    following requests of a client would reach other workers. They are rejected with 501 then.
+
+    :param feature: name of the rejected feature for the message
+    """
+    if Config.WEB_WORKERS > 1:
+        abort(
+            501,
+            f"{feature} are only available if the server runs with one worker, WEB_WORKERS is {Config.WEB_WORKERS}.",
+        )
+
+
 # Import and add namespaces
 ns_heatmap: Namespace = Namespace("heatmap", description="")
-from .heatmap_controller import HeatmapController
+from .heatmap_controller import HeatmapController, HeatmapStreamController
 
 ns_score: Namespace = Namespace("f1-score", description="")
 from .f1_score_controller import F1ScoreController
@@ -22,6 +50,30 @@ from .f1_score_controller import F1ScoreController
 ns_jaccard_index: Namespace = Namespace("jaccard-index", description="")
 from .jaccard_index_controller import JaccardIndexController
 
+ns_batch: Namespace = Namespace("batch", description="")
+from .batch_controller import BatchController
+
+ns_heatmap_session: Namespace = Namespace("heatmap-session", description="")
+from .heatmap_session_controller import (
+    HeatmapSessionsController,
+    HeatmapSessionController,
+)
+
+ns_jobs: Namespace = Namespace("jobs", description="")
+from .job_controller import (
+    HeatmapJobController,
+    JaccardIndexJobController,
+    F1ScoreJobController,
+    BatchJobController,
+    JobController,
+    JobResultController,
+)
+
+from .metrics_controller import metrics
+
 api.add_namespace(ns_heatmap)
 api.add_namespace(ns_score)
 api.add_namespace(ns_jaccard_index)
+api.add_namespace(ns_batch)
+api.add_namespace(ns_heatmap_session)
+api.add_namespace(ns_jobs)
@@ -0,0 +1,39 @@
+from flask import request
+from flask_restx import Resource
+
+from app.controllers import ns_batch
+from app.restx_dtos import batch_request, batch_response
+from app.util.batch_evaluator import BatchEvaluator
+from app.util.metrics import count_document_edits, measure_stage
+from app.util.request_decoder import decode_batch_request
+from app.util.response_encoder import encode_response
+
+
+@ns_batch.route("")
+class BatchController(Resource):
+
+    @ns_batch.doc(
+        description="Calculate heatmaps, jaccard indices and f1-scores for many documents at once",
+        responses={
+            200: ("Successful response", batch_response),
+            400: "Bad Request",
+            500: "Internal Server Error",
+        },
+    )
+    @ns_batch.expect(batch_request)
+    def post(self):
+        with measure_stage("decode"):
+            data = request.get_data()
+        with measure_stage("validation"):
+            batch = decode_batch_request(data, request.mimetype)
+        count_document_edits(
+            [de for document in batch.documents for de in document.document_edits]
+        )
+
+        batch_evaluator = BatchEvaluator()
+        # entities are built as part of the evaluation of every document
+        with measure_stage("computation"):
+            result = batch_evaluator.evaluate(batch.documents)
+
+        with measure_stage("serialization"):
+            return encode_response(result)
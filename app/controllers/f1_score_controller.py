@@ -1,15 +1,23 @@
-import json
-from flask import request, jsonify
+from flask import request
 from flask_restx import Resource
-from pydantic import TypeAdapter
 
 from app.controllers import ns_score
-from app.model.document import DocumentEdit
 from app.restx_dtos import (
     similarity_score_response,
     f1_score_request,
 )
 from app.util.f1_score_calculator import ScoreCalculator
+from app.util.metrics import count_document_edits, measure_stage
+from app.util.request_decoder import (
+    decode_f1_score_request,
+    decode_mention_matching,
+)
+from app.util.response_encoder import encode_response
+from app.util.result_cache import (
+    create_result_key,
+    digest_document_edits,
+    get_result_cache,
+)
 from app.util.utils import get_entities_with_mentions
 
 
@@ -23,19 +31,37 @@ class F1ScoreController(Resource):
             400: "Bad Request",
             500: "Internal Server Error",
         },
+        params={
+            "matching": "'exact' (default) if predicted mentions have to be equal to the actual mentions, 'partial' if they only need the same tag and overlapping spans, every mention is matched at most once"
+        },
     )
-    @ns_score.expect(f1_score_request, validate=True)
+    @ns_score.expect(f1_score_request)
     def post(self):
-        data = request.get_json()
-        actual = TypeAdapter(DocumentEdit).validate_json(json.dumps(data.get("actual")))
-        predicted = TypeAdapter(DocumentEdit).validate_json(
-            json.dumps(data.get("predicted"))
-        )
-        actual.entities = get_entities_with_mentions(actual.mentions)
-        predicted.entities = get_entities_with_mentions(predicted.mentions)
+        with measure_stage("decode"):
+            data = request.get_data()
+        with measure_stage("validation"):
+            f1_score_request_data = decode_f1_score_request(data, request.mimetype)
+            matching = decode_mention_matching(request.args.get("matching"))
+        actual = f1_score_request_data.actual
+        predicted = f1_score_request_data.predicted
+        count_document_edits([actual, predicted])
+
+        with measure_stage("entities"):
+            actual.entities = get_entities_with_mentions(actual.mentions)
+            predicted.entities = get_entities_with_mentions(predicted.mentions)
 
         score_calculator = ScoreCalculator()
-        score = score_calculator.calc_score(
-            actual_document=actual, predicted_document=predicted
-        )
-        return jsonify(score.model_dump(mode="json"))
+        with measure_stage("computation"):
+            score = get_result_cache().get_or_calculate(
+                create_result_key(
+                    "f1-score", digest_document_edits([actual, predicted]), (matching,)
+                ),
+                lambda: score_calculator.calc_score(
+                    actual_document=actual,
+                    predicted_document=predicted,
+                    matching=matching,
+                ),
+            )
+
+        with measure_stage("serialization"):
+            return encode_response(score)
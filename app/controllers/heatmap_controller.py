@@ -1,16 +1,27 @@
 import typing
 
-from flask import jsonify, request, Response
+from flask import Response, request
 from flask_restx import Resource
-from pydantic import TypeAdapter
 
 from app.controllers import ns_heatmap
-from app.model.document import DocumentEdit
+from app.model.document import DocumentEdit, Token
 from app.restx_dtos import token_response, document_edit_request
 from app.util.heatmap_creator import HeatmapCreator
 from app.util.logger import logger
+from app.util.metrics import count_document_edits, measure_stage
+from app.util.request_decoder import decode_document_edits
+from app.util.response_encoder import encode_response
+from app.util.result_cache import (
+    create_result_key,
+    digest_document_edits,
+    estimate_size,
+    get_result_cache,
+)
 from app.util.utils import get_entities_with_mentions
 
+# number of tokens, which are sent together in one chunk of the streamed heatmap
+STREAM_CHUNK_TOKENS = 512
+
 
 @ns_heatmap.route("")
 class HeatmapController(Resource):
@@ -18,25 +29,118 @@ class HeatmapController(Resource):
     @ns_heatmap.doc(
         description="Create Heatmap of the tokens by comparing multiple edits of a document",
         responses={
-            200: "Successful response",
             400: "Bad Request",
             500: "Internal Server Error",
         },
     )
-    @ns_heatmap.expect([document_edit_request], validate=True, required=True)
-    @ns_heatmap.marshal_with(token_response, as_list=True, code=200)
+    @ns_heatmap.response(200, "Successful response", [token_response])
+    @ns_heatmap.expect([document_edit_request], required=True)
     def post(self):
-        document_edits: typing.List[DocumentEdit] = TypeAdapter(
-            list[DocumentEdit]
-        ).validate_json(request.get_data())
+        with measure_stage("decode"):
+            data = request.get_data()
+        with measure_stage("validation"):
+            document_edits: typing.List[DocumentEdit] = decode_document_edits(
+                data, request.mimetype
+            )
+        count_document_edits(document_edits)
 
-        for document_edit in document_edits:
-            document_edit.entities = get_entities_with_mentions(document_edit.mentions)
+        with measure_stage("entities"):
+            for document_edit in document_edits:
+                document_edit.entities = get_entities_with_mentions(
+                    document_edit.mentions
+                )
 
         heatmap_creator = HeatmapCreator()
 
-        token_heatmap = heatmap_creator.create_heatmap(document_edits)
+        # scores do not depend on the order of the edits, only the tokens are taken from the first one
+        with measure_stage("computation"):
+            digests = digest_document_edits(document_edits)
+            token_heatmap = get_result_cache().get_or_calculate(
+                create_result_key("heatmap", digests, order_insensitive=True),
+                lambda: heatmap_creator.create_heatmap(document_edits, digests=digests),
+            )
+
+        logger.info("Heatmap created for %d tokens", len(token_heatmap))
+        if logger.should_dump_payload():
+            logger.info("Heatmap created:\n%s", token_heatmap)
+
+        with measure_stage("serialization"):
+            return encode_response(token_heatmap)
+
+
+@ns_heatmap.route("/stream")
+class HeatmapStreamController(Resource):
+
+    @ns_heatmap.doc(
+        description="Create Heatmap like /heatmap, but stream the tokens as newline delimited json. "
+        "All tokens are scored before the first one is sent, only the normalization and serialization are streamed, "
+        "so the time until the first token and the memory of the scoring are the same as for /heatmap",
+        responses={
+            200: ("Successful response, one token per line", token_response),
+            400: "Bad Request",
+            500: "Internal Server Error",
+        },
+        produces=["application/x-ndjson"],
+    )
+    @ns_heatmap.expect([document_edit_request], required=True)
+    def post(self):
+        with measure_stage("decode"):
+            data = request.get_data()
+        with measure_stage("validation"):
+            document_edits: typing.List[DocumentEdit] = decode_document_edits(
+                data, request.mimetype
+            )
+        count_document_edits(document_edits)
+
+        with measure_stage("entities"):
+            for document_edit in document_edits:
+                document_edit.entities = get_entities_with_mentions(
+                    document_edit.mentions
+                )
+
+        # a heatmap which was already created is streamed from the cache, otherwise the edits are
+        # validated and scored before the response is started, only the normalization is streamed
+        with measure_stage("computation"):
+            digests = digest_document_edits(document_edits)
+            key = create_result_key("heatmap", digests, order_insensitive=True)
+            tokens = get_result_cache().get(key)
+            if tokens is None:
+                tokens = _cache_when_streamed(
+                    HeatmapCreator().stream_heatmap(document_edits, digests),
+                    key,
+                    document_edits[0].document.tokens,
+                )
+
+        logger.info(
+            "Heatmap scored for %d tokens, streaming it",
+            len(document_edits[0].document.tokens),
+        )
+
+        return Response(_to_ndjson_chunks(tokens), mimetype="application/x-ndjson")
+
+
+def _cache_when_streamed(
+    streamed_tokens: typing.Iterator[Token],
+    key: typing.Hashable,
+    tokens: typing.List[Token],
+) -> typing.Iterator[Token]:
+    """
+    Caches the heatmap like /heatmap after all tokens were streamed, an aborted stream is not cached.
+
+    :param streamed_tokens:
+    :param key: result key of the heatmap
+    :param tokens: the tokens of the heatmap, their scores are normalized while they are streamed
+    """
+    yield from streamed_tokens
+    get_result_cache().put(key, tokens, estimate_size(tokens))
 
-        logger.info(f"Heatmap created:\n{token_heatmap}")
 
-        return token_heatmap
+def _to_ndjson_chunks(tokens: typing.Iterable[Token]) -> typing.Iterator[str]:
+    lines = []
+    for token in tokens:
+        lines.append(token.model_dump_json())
+        if len(lines) == STREAM_CHUNK_TOKENS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
@@ -0,0 +1,133 @@
+from flask import request
+from flask_restx import Resource, abort
+
+from app.controllers import ns_heatmap_session, require_single_web_worker
+from app.model.heatmap_session import (
+    HeatmapSessionDeltaResponse,
+    HeatmapSessionResponse,
+)
+from app.restx_dtos import (
+    document_edit_request,
+    heatmap_session_delta_request,
+    heatmap_session_delta_response,
+    heatmap_session_response,
+)
+from app.util.heatmap_session import HeatmapSession, get_heatmap_sessions
+from app.util.metrics import count_document_edits, measure_stage
+from app.util.response_encoder import encode_response
+from app.util.request_decoder import (
+    decode_document_edits,
+    decode_heatmap_session_delta,
+)
+
+
+def _store_session(session: HeatmapSession) -> None:
+    sessions = get_heatmap_sessions()
+    if not sessions.put(session.session_id, session, session.size):
+        # a previous state of the session is not kept either, it is the same object
+        sessions.remove(session.session_id)
+        abort(
+            413,
+            f"The heatmap session needs about {session.size} bytes,"
+            f" sessions may use at most {sessions.max_bytes} bytes.",
+        )
+
+
+def _get_session(session_id: str) -> HeatmapSession:
+    require_single_web_worker("Heatmap sessions")
+    session = get_heatmap_sessions().get(session_id)
+    if session is None:
+        abort(404, f"Heatmap session {session_id} does not exist or is expired.")
+    return session
+
+
+@ns_heatmap_session.route("")
+class HeatmapSessionsController(Resource):
+
+    @ns_heatmap_session.doc(
+        description="Create a heatmap session for the edits of a document, the heatmap can be updated by changes of single edits afterwards",
+        responses={
+            200: ("Successful response", heatmap_session_response),
+            400: "Bad Request",
+            413: "Session is larger than HEATMAP_SESSION_MAX_BYTES",
+            501: "Sessions are not available with several web workers",
+            500: "Internal Server Error",
+        },
+    )
+    @ns_heatmap_session.expect([document_edit_request], required=True)
+    def post(self):
+        require_single_web_worker("Heatmap sessions")
+        with measure_stage("decode"):
+            data = request.get_data()
+        with measure_stage("validation"):
+            document_edits = decode_document_edits(data, request.mimetype)
+        count_document_edits(document_edits)
+
+        with measure_stage("computation"):
+            session = HeatmapSession(document_edits)
+        _store_session(session)
+
+        with measure_stage("serialization"):
+            return encode_response(
+                HeatmapSessionResponse(
+                    session_id=session.session_id, tokens=session.tokens
+                )
+            )
+
+
+@ns_heatmap_session.route("/<string:session_id>")
+class HeatmapSessionController(Resource):
+
+    @ns_heatmap_session.doc(
+        description="Get the current heatmap of the session",
+        responses={
+            200: ("Successful response", heatmap_session_response),
+            404: "Session does not exist",
+        },
+    )
+    def get(self, session_id: str):
+        session = _get_session(session_id)
+        with session.lock:
+            response = HeatmapSessionResponse(
+                session_id=session.session_id, tokens=session.tokens
+            )
+            return encode_response(response)
+
+    @ns_heatmap_session.doc(
+        description="Change the mentions and relations of one edit of the session, only the changed token scores are returned",
+        responses={
+            200: ("Successful response", heatmap_session_delta_response),
+            400: "Bad Request",
+            404: "Session does not exist",
+            413: "Session grew larger than HEATMAP_SESSION_MAX_BYTES and was deleted",
+            500: "Internal Server Error",
+        },
+    )
+    @ns_heatmap_session.expect(heatmap_session_delta_request, required=True)
+    def patch(self, session_id: str):
+        with measure_stage("decode"):
+            data = request.get_data()
+        with measure_stage("validation"):
+            delta = decode_heatmap_session_delta(data, request.mimetype)
+        session = _get_session(session_id)
+
+        with measure_stage("computation"), session.lock:
+            changed_tokens = session.apply_delta(delta)
+        # the session expires if it is not updated for the ttl, it is closed if it grew too large
+        _store_session(session)
+
+        with measure_stage("serialization"):
+            return encode_response(
+                HeatmapSessionDeltaResponse(
+                    session_id=session.session_id, changed_tokens=changed_tokens
+                )
+            )
+
+    @ns_heatmap_session.doc(
+        description="Delete the session",
+        responses={204: "Session deleted", 404: "Session does not exist"},
+    )
+    def delete(self, session_id: str):
+        _get_session(session_id)
+        get_heatmap_sessions().remove(session_id)
+        return "", 204
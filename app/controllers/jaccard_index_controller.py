@@ -1,8 +1,7 @@
 import typing
 
-from flask import request, jsonify
+from flask import request
 from flask_restx import Resource
-from pydantic import TypeAdapter
 
 from app.controllers import ns_jaccard_index
 from app.model.document import DocumentEdit
@@ -11,6 +10,14 @@ from app.restx_dtos import (
     jaccard_response,
 )
 from app.util.jaccard_index_calculator import JaccardIndexCalculator
+from app.util.metrics import count_document_edits, measure_stage
+from app.util.request_decoder import decode_document_edits
+from app.util.response_encoder import encode_response
+from app.util.result_cache import (
+    create_result_key,
+    digest_document_edits,
+    get_result_cache,
+)
 from app.util.utils import get_entities_with_mentions
 
 
@@ -24,17 +31,37 @@ class JaccardIndexController(Resource):
             400: "Bad Request",
             500: "Internal Server Error",
         },
+        params={
+            "matrix": "If 'true', the jaccard index of every pair of document edits is returned as matrix"
+        },
     )
-    @ns_jaccard_index.expect([document_edit_request], validate=True)
+    @ns_jaccard_index.expect([document_edit_request])
     def post(self):
-        document_edits: typing.List[DocumentEdit] = TypeAdapter(
-            list[DocumentEdit]
-        ).validate_json(request.get_data())
+        with measure_stage("decode"):
+            data = request.get_data()
+        with measure_stage("validation"):
+            document_edits: typing.List[DocumentEdit] = decode_document_edits(
+                data, request.mimetype
+            )
+        count_document_edits(document_edits)
+
+        with measure_stage("entities"):
+            for document_edit in document_edits:
+                document_edit.entities = get_entities_with_mentions(
+                    document_edit.mentions
+                )
 
-        for document_edit in document_edits:
-            document_edit.entities = get_entities_with_mentions(document_edit.mentions)
+        with_matrix = request.args.get("matrix", "false").lower() in ("1", "true")
 
         jaccard_index_calculator = JaccardIndexCalculator()
-        result = jaccard_index_calculator.calculate(document_edits)
+        with measure_stage("computation"):
+            digests = digest_document_edits(document_edits)
+            result = get_result_cache().get_or_calculate(
+                create_result_key("jaccard-index", digests, (with_matrix,)),
+                lambda: jaccard_index_calculator.calculate(
+                    document_edits, with_matrix=with_matrix, digests=digests
+                ),
+            )
 
-        return jsonify(result.model_dump(mode="json"))
+        with measure_stage("serialization"):
+            return encode_response(result, exclude_none=True)
@@ -0,0 +1,177 @@
+import typing
+
+from flask import Response, request
+from flask_restx import Resource, abort
+
+from app.controllers import (
+    ns_batch,
+    ns_heatmap,
+    ns_jaccard_index,
+    ns_jobs,
+    ns_score,
+    require_single_web_worker,
+)
+from app.restx_dtos import (
+    batch_request,
+    document_edit_request,
+    f1_score_request,
+    job_response,
+)
+from app.util.job_manager import Job, JobQueueFullError, get_job_manager
+from app.util.request_decoder import decode_mention_matching
+from app.util.response_encoder import encode_response, encode_json_bytes_response
+from app.util.job_tasks import (
+    run_batch,
+    run_f1_score,
+    run_heatmap,
+    run_jaccard_index,
+)
+
+_submit_responses = {
+    202: ("Job accepted", job_response),
+    501: "Jobs are not available with several web workers",
+    503: "Too many jobs are queued or running",
+}
+
+
+def _submit_job(
+    kind: str, task: typing.Callable[..., typing.Any], *args: typing.Any
+) -> Response:
+    require_single_web_worker("Jobs")
+    try:
+        job = get_job_manager().submit(kind, task, *args)
+    except JobQueueFullError as error:
+        abort(503, str(error))
+    return encode_response(job.to_response(), status=202)
+
+
+def _get_job(job_id: str) -> Job:
+    require_single_web_worker("Jobs")
+    job = get_job_manager().get(job_id)
+    if job is None:
+        abort(404, f"Job {job_id} does not exist or is expired.")
+    return job
+
+
+@ns_heatmap.route("/jobs")
+class HeatmapJobController(Resource):
+
+    @ns_heatmap.doc(
+        description="Submit the creation of a heatmap as job, its result is fetched from /jobs/<id>/result",
+        responses=_submit_responses,
+    )
+    @ns_heatmap.expect([document_edit_request], required=True)
+    def post(self):
+        return _submit_job("heatmap", run_heatmap, request.get_data(), request.mimetype)
+
+
+@ns_jaccard_index.route("/jobs")
+class JaccardIndexJobController(Resource):
+
+    @ns_jaccard_index.doc(
+        description="Submit the calculation of the jaccard index as job, its result is fetched from /jobs/<id>/result",
+        responses=_submit_responses,
+        params={
+            "matrix": "If 'true', the jaccard index of every pair of document edits is returned as matrix"
+        },
+    )
+    @ns_jaccard_index.expect([document_edit_request])
+    def post(self):
+        with_matrix = request.args.get("matrix", "false").lower() in ("1", "true")
+        return _submit_job(
+            "jaccard-index",
+            run_jaccard_index,
+            request.get_data(),
+            request.mimetype,
+            with_matrix,
+        )
+
+
+@ns_score.route("/jobs")
+class F1ScoreJobController(Resource):
+
+    @ns_score.doc(
+        description="Submit the calculation of the f1-score as job, its result is fetched from /jobs/<id>/result",
+        responses=_submit_responses,
+        params={
+            "matching": "'exact' (default) if predicted mentions have to be equal to the actual mentions, 'partial' if they only need the same tag and overlapping spans, every mention is matched at most once"
+        },
+    )
+    @ns_score.expect(f1_score_request)
+    def post(self):
+        matching = decode_mention_matching(request.args.get("matching"))
+        return _submit_job(
+            "f1-score",
+            run_f1_score,
+            request.get_data(),
+            request.mimetype,
+            matching,
+        )
+
+
+@ns_batch.route("/jobs")
+class BatchJobController(Resource):
+
+    @ns_batch.doc(
+        description="Submit a batch evaluation as job, its result is fetched from /jobs/<id>/result",
+        responses=_submit_responses,
+    )
+    @ns_batch.expect(batch_request)
+    def post(self):
+        return _submit_job("batch", run_batch, request.get_data(), request.mimetype)
+
+
+@ns_jobs.route("/<string:job_id>")
+class JobController(Resource):
+
+    @ns_jobs.doc(
+        description="Get the status and progress of a job",
+        responses={
+            200: ("Successful response", job_response),
+            404: "Job does not exist",
+        },
+    )
+    def get(self, job_id: str):
+        job = _get_job(job_id)
+        return encode_response(job.to_response())
+
+    @ns_jobs.doc(
+        description="Cancel a job, the result of a job which is already running is discarded",
+        responses={
+            200: ("Successful response", job_response),
+            404: "Job does not exist",
+        },
+    )
+    def delete(self, job_id: str):
+        require_single_web_worker("Jobs")
+        job = get_job_manager().cancel(job_id)
+        if job is None:
+            abort(404, f"Job {job_id} does not exist or is expired.")
+        return encode_response(job.to_response())
+
+
+@ns_jobs.route("/<string:job_id>/result")
+class JobResultController(Resource):
+
+    @ns_jobs.doc(
+        description="Get the result of a finished job, it is the response the synchronous endpoint would have returned",
+        responses={
+            200: "Successful response",
+            404: "Job does not exist",
+            409: "Job is not finished or was cancelled",
+        },
+    )
+    def get(self, job_id: str):
+        job = _get_job(job_id)
+        if job.status == "done":
+            return encode_json_bytes_response(job.result)
+        if job.status == "failed":
+            # same response as the error handler gives for the synchronous endpoint
+            return encode_response(
+                {
+                    "success": False,
+                    "error": {"type": job.error.type, "message": job.error.message},
+                },
+                status=job.error.status_code,
+            )
+        abort(409, f"Job {job_id} is {job.status}.")
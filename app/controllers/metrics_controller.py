@@ -0,0 +1,53 @@
+import typing
+
+from flask import Response
+
+from app.controllers import main
+from app.util.compact_document import get_canonical_edit_cache
+from app.util.heatmap_session import get_heatmap_sessions
+from app.util.metrics import get_metrics
+from app.util.result_cache import ResultCache, get_result_cache
+
+
+@main.route("/metrics")
+def metrics():
+    """
+    Metrics in the prometheus text format, with METRICS_MULTIPROCESS_DIR the metrics of all workers.
+    The values of the caches are the values of the worker which answers.
+    """
+    caches = {
+        "result": get_result_cache(),
+        "edit_feature": get_canonical_edit_cache(),
+        "heatmap_session": get_heatmap_sessions(),
+    }
+    return Response(
+        get_metrics().render(_get_cache_values(caches)),
+        mimetype="text/plain; version=0.0.4",
+    )
+
+
+def _get_cache_values(
+    caches: typing.Dict[str, ResultCache],
+) -> typing.Iterator[tuple[str, str, str, dict, float]]:
+    stats = {name: cache.get_stats() for name, cache in caches.items()}
+    for name, metric_type, help_text, field in (
+        ("difference_calc_cache_entries", "gauge", "Entries of the cache", "entries"),
+        (
+            "difference_calc_cache_size_bytes",
+            "gauge",
+            "Approximated size of the entries of the cache",
+            "size",
+        ),
+        ("difference_calc_cache_hits_total", "counter", "Cache hits", "hits"),
+        ("difference_calc_cache_misses_total", "counter", "Cache misses", "misses"),
+        (
+            "difference_calc_cache_evictions_total",
+            "counter",
+            "Entries evicted to fit the bounds of the cache",
+            "evictions",
+        ),
+    ):
+        for cache_name, cache_stats in stats.items():
+            yield name, metric_type, help_text, {"cache": cache_name}, getattr(
+                cache_stats, field
+            )
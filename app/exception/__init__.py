@@ -2,35 +2,49 @@ import traceback
 
 from flask import jsonify, Flask
 from flask_restx import ValidationError
+from pydantic import ValidationError as PydanticValidationError
 from werkzeug.exceptions import HTTPException
 
+from app.util.heatmap_session import InvalidDeltaError
 from app.util.logger import logger
+from app.util.utils import TokenAlignmentError
+
+
+def get_status_code(error: Exception) -> int:
+    if isinstance(error, (ValidationError, PydanticValidationError)):
+        return 400  # Bad Request for ValidationError
+    if isinstance(error, TokenAlignmentError):
+        return 400  # the edits of the request do not belong to the same document
+    if isinstance(error, InvalidDeltaError):
+        return 400  # the delta does not fit the edits of the heatmap session
+    if isinstance(error, HTTPException):
+        return error.code  # Use the code from HTTPException
+    return 500  # Default Internal Server Error
 
 
 def register_error_handlers(app: Flask) -> None:
+    # Without debug mode restx answers the errors of its resources itself with an internal server error,
+    # propagating them lets them reach the handler below. Exceptions without handler still become a 500.
+    app.config["PROPAGATE_EXCEPTIONS"] = True
 
     @app.errorhandler(Exception)
     def handle_global_error(error):
-        if isinstance(error, ValidationError):
-            status_code = 400  # Bad Request for ValidationError
-        elif isinstance(error, HTTPException):
-            status_code = error.code  # Use the code from HTTPException
-        else:
-            status_code = 500  # Default Internal Server Error
+        status_code = get_status_code(error)
         response = {
             "success": False,
-            "error": {
-                "type": type(error).__name__,
-                "message": str(error),
-                "traceback": traceback.format_exc().splitlines(),
-            },
+            "error": {"type": type(error).__name__, "message": str(error)},
         }
+        if isinstance(error, TokenAlignmentError):
+            response["error"].update(error.get_details())
 
-        # Logs always contains trace
-        logger.error(str(response))
+        # The trace is formatted by the logging thread, client errors are logged without it
+        if status_code >= 500:
+            logger.error("%s: %s", type(error).__name__, error, exc_info=error)
+        else:
+            logger.warning("%s: %s", type(error).__name__, error)
 
         # Include traceback only in debug mode
-        if not app.config.get("DEBUG", False) and "traceback" in response["error"]:
-            del response["error"]["traceback"]
+        if app.config.get("DEBUG", False):
+            response["error"]["traceback"] = traceback.format_exc().splitlines()
 
         return jsonify(response), status_code
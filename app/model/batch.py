@@ -0,0 +1,41 @@
+import typing
+
+from pydantic import BaseModel
+
+from app.model.document import DocumentEditRequest, Token
+from app.model.similarity_score import (
+    F1ScoreResponse,
+    JaccardIndexResponse,
+    JaccardScore,
+)
+
+Metric = typing.Literal["heatmap", "jaccard", "f1"]
+
+
+class BatchDocument(BaseModel):
+    document_edits: typing.List[DocumentEditRequest]
+    metrics: typing.List[Metric]
+
+
+class BatchRequest(BaseModel):
+    documents: typing.List[BatchDocument]
+
+
+class BatchDocumentResult(BaseModel):
+    heatmap: typing.Optional[typing.List[Token]] = None
+    jaccard: typing.Optional[JaccardIndexResponse] = None
+    # scores of every edit after the first compared to the first edit
+    f1: typing.Optional[typing.List[F1ScoreResponse]] = None
+    error: typing.Optional[str] = None
+
+
+class BatchAggregates(BaseModel):
+    document_count: int
+    failed_document_count: int
+    jaccard: typing.Optional[JaccardScore] = None
+    f1: typing.Optional[F1ScoreResponse] = None
+
+
+class BatchResponse(BaseModel):
+    results: typing.List[BatchDocumentResult]
+    aggregates: BatchAggregates
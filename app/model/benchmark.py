@@ -0,0 +1,35 @@
+import typing
+
+from pydantic import BaseModel
+
+Calculator = typing.Literal["heatmap", "jaccard", "f1"]
+
+
+class BenchmarkResult(BaseModel):
+    calculator: Calculator
+    token_count: int
+    annotator_count: int
+    # fastest and median duration of the repetitions
+    min_seconds: float
+    median_seconds: float
+    # peak of the memory allocated by python during one run
+    peak_memory_bytes: int
+    # exponent of the growth of the median duration compared to the next smaller token count,
+    # 1 means linear scaling
+    scaling_exponent: typing.Optional[float] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.calculator}/tokens={self.token_count}/annotators={self.annotator_count}"
+
+
+class BenchmarkReport(BaseModel):
+    # parameters of the generated documents
+    parameters: typing.Dict[str, float]
+    results: typing.List[BenchmarkResult]
+
+
+class BenchmarkRegression(BaseModel):
+    key: str
+    baseline_seconds: float
+    median_seconds: float
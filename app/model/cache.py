@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class ResultCacheStats(BaseModel):
+    entries: int
+    # approximated size of all entries in bytes
+    size: int
+    hits: int
+    misses: int
+    evictions: int
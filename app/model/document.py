@@ -26,6 +26,53 @@ class Token(BaseModel):
             and self.pos_tag == token.pos_tag
         )
 
+    def get_position_key(self) -> tuple:
+        return (self.text, self.document_index, self.sentence_index, self.pos_tag)
+
+
+class TokenIndex:
+    """
+    Resolves tokens to the position of the equal token in a reference token list.
+    Lookup is done by id first and by position key second, which mirrors Token.equals,
+    so tokens that are equal get the same hashable key.
+    """
+
+    def __init__(self, tokens: typing.Optional[typing.List[Token]]):
+        self._index_by_id: typing.Dict[int, int] = {}
+        self._index_by_position: typing.Dict[tuple, int] = {}
+        self._token_count = len(tokens or [])
+        for index, token in enumerate(tokens or []):
+            self._index_by_id.setdefault(token.id, index)
+            self._index_by_position.setdefault(token.get_position_key(), index)
+
+    def __len__(self) -> int:
+        return self._token_count
+
+    def get_index(self, token: Token) -> typing.Optional[int]:
+        index = self._index_by_id.get(token.id)
+        if index is None:
+            index = self._index_by_position.get(token.get_position_key())
+        return index
+
+    def get_key(self, token: Token) -> typing.Hashable:
+        index = self.get_index(token)
+        if index is not None:
+            return index
+        # Tokens which are not part of the reference list are only equal to themselves
+        return (token.id, *token.get_position_key())
+
+    def resolve_unaligned_key(self, key: tuple) -> typing.Hashable:
+        """
+        Resolves the key a token got from another token index, where it was not part of the reference list.
+
+        :param key: (id, *position key) of the token
+        :return: the key of the token in this index
+        """
+        index = self._index_by_id.get(key[0])
+        if index is None:
+            index = self._index_by_position.get(key[1:])
+        return key if index is None else index
+
 
 class Entity(BaseModel):
     id: int
@@ -48,6 +95,11 @@ class Entity(BaseModel):
 
         return all(any(om.equals(sm) for om in entity.mentions) for sm in self.mentions)
 
+    def get_key(self, token_index: TokenIndex) -> typing.Optional[frozenset]:
+        if self.mentions is None:
+            return None
+        return frozenset(mention.get_key(token_index) for mention in self.mentions)
+
     def __repr__(self) -> str:
         return f"Entity(id={self.id}, mentions={[m.__repr__() for m in self.mentions]})"
 
@@ -66,6 +118,12 @@ class Mention(BaseModel):
             # We do not check entity equality here. This is a separate step
         )
 
+    def get_key(self, token_index: TokenIndex) -> tuple[str, frozenset]:
+        return (
+            self.tag,
+            frozenset(token_index.get_key(token) for token in self.tokens),
+        )
+
     def get_equals_score(self, mention: "Mention") -> float:
         if mention is None:
             return 1
@@ -148,8 +206,17 @@ class DocumentEdit(BaseModel):
         )
 
     def get_entity_of_mention(self, mention: Mention) -> typing.Optional[Entity]:
-        for entity in self.entities:
+        for entity in self.entities or []:
             for mention_canidat in entity.mentions:
                 if mention_canidat.equals(mention):
                     return entity
         return None
+
+
+class DocumentEditRequest(DocumentEdit):
+    """
+    Document edit as it is sent to the api, where mentions and relations are required.
+    """
+
+    mentions: typing.List[Mention]
+    relations: typing.List[Relation]
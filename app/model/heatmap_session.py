@@ -0,0 +1,31 @@
+import typing
+
+from pydantic import BaseModel
+
+from app.model.document import Mention, Relation, Token
+
+
+class HeatmapSessionDelta(BaseModel):
+    # position of the changed edit in the edits the session was created with
+    edit_index: int
+    added_mentions: typing.List[Mention] = []
+    removed_mentions: typing.List[Mention] = []
+    added_relations: typing.List[Relation] = []
+    removed_relations: typing.List[Relation] = []
+
+
+class TokenScore(BaseModel):
+    # position of the token in the tokens of the heatmap
+    index: int
+    id: int
+    score: typing.Optional[float] = None
+
+
+class HeatmapSessionResponse(BaseModel):
+    session_id: str
+    tokens: typing.List[Token]
+
+
+class HeatmapSessionDeltaResponse(BaseModel):
+    session_id: str
+    changed_tokens: typing.List[TokenScore]
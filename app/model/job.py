@@ -0,0 +1,21 @@
+import typing
+
+from pydantic import BaseModel
+
+JobStatus = typing.Literal["queued", "running", "done", "failed", "cancelled"]
+
+
+class JobError(BaseModel):
+    type: str
+    message: str
+    status_code: int
+
+
+class JobResponse(BaseModel):
+    id: str
+    # name of the calculation, e.g. heatmap
+    kind: str
+    status: JobStatus
+    # fraction of the calculation which is done, between 0 and 1
+    progress: float
+    error: typing.Optional[JobError] = None
@@ -0,0 +1,152 @@
+import typing
+
+from pydantic import BaseModel, model_validator
+
+from app.model.document import (
+    Document,
+    DocumentEditRequest,
+    Entity,
+    Mention,
+    Relation,
+    Token,
+)
+
+
+class ReferenceMention(BaseModel):
+    tag: str
+    # ids of the tokens of the document
+    tokens: typing.List[int]
+
+
+class ReferenceRelation(BaseModel):
+    id: typing.Optional[int] = None
+    tag: str
+    # positions of the mentions in the mentions of the edit
+    mention_head: int
+    mention_tail: int
+
+
+class ReferenceDocumentEdit(BaseModel):
+    """
+    Edit of a document which references the tokens of the document by id and its own mentions by position,
+    instead of repeating them.
+    """
+
+    mentions: typing.List[ReferenceMention]
+    relations: typing.List[ReferenceRelation]
+    # every entity is the list of the positions of its mentions
+    entities: typing.List[typing.List[int]] = []
+
+    def check_references(self, token_ids: typing.Container[int]) -> None:
+        """
+        :param token_ids: ids of the tokens of the document
+        :raises ValueError: if a token or mention does not exist or a mention is part of multiple entities
+        """
+        for position, mention in enumerate(self.mentions):
+            unknown = [
+                token_id for token_id in mention.tokens if token_id not in token_ids
+            ]
+            if unknown:
+                raise ValueError(
+                    f"Mention {position} references tokens {unknown}, which are not part of the document."
+                )
+        for position, relation in enumerate(self.relations):
+            for mention in (relation.mention_head, relation.mention_tail):
+                if not 0 <= mention < len(self.mentions):
+                    raise ValueError(
+                        f"Relation {position} references mention {mention}, the edit has {len(self.mentions)} mentions."
+                    )
+        entity_mentions = set()
+        for position, entity in enumerate(self.entities):
+            for mention in entity:
+                if not 0 <= mention < len(self.mentions):
+                    raise ValueError(
+                        f"Entity {position} references mention {mention}, the edit has {len(self.mentions)} mentions."
+                    )
+                if mention in entity_mentions:
+                    raise ValueError(f"Mention {mention} is part of multiple entities.")
+                entity_mentions.add(mention)
+
+    def to_document_edit(
+        self, document: Document, tokens_by_id: typing.Dict[int, Token]
+    ) -> DocumentEditRequest:
+        """
+        Resolves the references. Tokens and mentions are not copied, the edits of a request share the
+        tokens of the document and relations share the mentions of their edit.
+        The references have to be checked before.
+
+        :param document:
+        :param tokens_by_id:
+        :return:
+        """
+        entity_ids = {
+            mention: entity_id
+            for entity_id, entity in enumerate(self.entities)
+            for mention in entity
+        }
+        # models which are already validated are not copied by the validation
+        mentions = [
+            Mention(
+                tag=mention.tag,
+                tokens=[tokens_by_id[token_id] for token_id in mention.tokens],
+                entity=(
+                    Entity(id=entity_ids[position]) if position in entity_ids else None
+                ),
+            )
+            for position, mention in enumerate(self.mentions)
+        ]
+        relations = [
+            Relation(
+                id=relation.id,
+                tag=relation.tag,
+                mention_head=mentions[relation.mention_head],
+                mention_tail=mentions[relation.mention_tail],
+            )
+            for relation in self.relations
+        ]
+        return DocumentEditRequest(
+            document=document, mentions=mentions, relations=relations
+        )
+
+
+def _get_tokens_by_id(document: Document) -> typing.Dict[int, Token]:
+    # like TokenIndex, the first token with an id is used
+    tokens_by_id = {}
+    for token in document.tokens or []:
+        tokens_by_id.setdefault(token.id, token)
+    return tokens_by_id
+
+
+class ReferenceDocumentEditsRequest(BaseModel):
+    """
+    Edits of one document, whose tokens are only sent once.
+    """
+
+    document: Document
+    edits: typing.List[ReferenceDocumentEdit]
+
+    @model_validator(mode="after")
+    def _check_references(self) -> "ReferenceDocumentEditsRequest":
+        token_ids = {token.id for token in self.document.tokens or []}
+        for edit in self.edits:
+            edit.check_references(token_ids)
+        return self
+
+    def to_document_edits(self) -> typing.List[DocumentEditRequest]:
+        tokens_by_id = _get_tokens_by_id(self.document)
+        return [
+            edit.to_document_edit(self.document, tokens_by_id) for edit in self.edits
+        ]
+
+
+class ReferenceF1ScoreRequest(BaseModel):
+    document: Document
+    actual: ReferenceDocumentEdit
+    predicted: ReferenceDocumentEdit
+
+    @model_validator(mode="after")
+    def _check_references(self) -> "ReferenceF1ScoreRequest":
+        token_ids = {token.id for token in self.document.tokens or []}
+        self.actual.check_references(token_ids)
+        self.predicted.check_references(token_ids)
+        return self
@@ -1,5 +1,17 @@
+import typing
+
 from pydantic import BaseModel
 
+from app.model.document import DocumentEditRequest
+
+# how predicted mentions are matched to the actual mentions by the f1-score
+MentionMatching = typing.Literal["exact", "partial"]
+
+
+class F1ScoreRequest(BaseModel):
+    actual: DocumentEditRequest
+    predicted: DocumentEditRequest
+
 
 class F1ScoreResponse(BaseModel):
     mention_score: float
@@ -9,6 +21,38 @@ class F1ScoreResponse(BaseModel):
     relation_score: float
 
 
+class F1Counts(BaseModel):
+    actual: int = 0
+    predicted: int = 0
+    true_positives: int = 0
+
+    def __add__(self, other: "F1Counts") -> "F1Counts":
+        return F1Counts(
+            actual=self.actual + other.actual,
+            predicted=self.predicted + other.predicted,
+            true_positives=self.true_positives + other.true_positives,
+        )
+
+
+class F1ScoreCounts(BaseModel):
+    mentions: F1Counts = F1Counts()
+    # only relations and entities of which all mentions are predicted correctly
+    relations: F1Counts = F1Counts()
+    entities: F1Counts = F1Counts()
+    # number of all relations and entities of both documents
+    relation_count: int = 0
+    entity_count: int = 0
+
+    def __add__(self, other: "F1ScoreCounts") -> "F1ScoreCounts":
+        return F1ScoreCounts(
+            mentions=self.mentions + other.mentions,
+            relations=self.relations + other.relations,
+            entities=self.entities + other.entities,
+            relation_count=self.relation_count + other.relation_count,
+            entity_count=self.entity_count + other.entity_count,
+        )
+
+
 class JaccardScore(BaseModel):
     mention_index: float
     relation_index: float
@@ -21,3 +65,13 @@ class JaccardScore(BaseModel):
 class JaccardIndexResponse(BaseModel):
     combined: JaccardScore
     average: JaccardScore
+    matrix: typing.Optional[typing.List[typing.List[JaccardScore]]] = None
+
+
+class CorpusF1ScoreResponse(BaseModel):
+    document_count: int
+    failed_document_count: int
+    # f1-scores of the summed up counts of all documents
+    micro: F1ScoreResponse
+    # average of the f1-scores of the documents
+    macro: F1ScoreResponse
@@ -120,5 +120,156 @@ jaccard_response = api.model(
             jaccard_index_response,
             description="The combined jaccard index where one index for all documents in calculated at once, e.g. (A∩B∩C/A∪B∪C)",
         ),
+        "matrix": fields.List(
+            fields.List(fields.Nested(jaccard_index_response)),
+            required=False,
+            description="The jaccard index of every pair of documents, only returned if requested with the matrix parameter. matrix[i][j] compares the document edits i and j",
+        ),
+    },
+)
+
+batch_document_request = api.model(
+    "batch document",
+    {
+        "document_edits": fields.List(
+            fields.Nested(document_edit_request, required=True), required=True
+        ),
+        "metrics": fields.List(
+            fields.String(enum=["heatmap", "jaccard", "f1"]),
+            required=True,
+            description="The metrics to calculate for the document. For f1 the first edit is the actual edit and every other edit a prediction",
+        ),
+    },
+)
+
+batch_request = api.model(
+    "batch request",
+    {
+        "documents": fields.List(
+            fields.Nested(batch_document_request, required=True), required=True
+        ),
+    },
+)
+
+batch_document_response = api.model(
+    "batch document response",
+    {
+        "heatmap": fields.List(fields.Nested(token_response), required=False),
+        "jaccard": fields.Nested(jaccard_response, required=False, allow_null=True),
+        "f1": fields.List(
+            fields.Nested(similarity_score_response),
+            required=False,
+            description="The f1-score of every edit after the first compared to the first edit",
+        ),
+        "error": fields.String(
+            required=False,
+            description="The reason why the document could not be evaluated",
+        ),
+    },
+)
+
+batch_response = api.model(
+    "batch response",
+    {
+        "results": fields.List(
+            fields.Nested(batch_document_response),
+            description="The results in the order of the requested documents",
+        ),
+        "aggregates": fields.Nested(
+            api.model(
+                "batch aggregates",
+                {
+                    "document_count": fields.Integer(required=True),
+                    "failed_document_count": fields.Integer(required=True),
+                    "jaccard": fields.Nested(
+                        jaccard_index_response,
+                        required=False,
+                        allow_null=True,
+                        description="The average of the average jaccard indices of all documents",
+                    ),
+                    "f1": fields.Nested(
+                        similarity_score_response,
+                        required=False,
+                        allow_null=True,
+                        description="The average of all f1-scores",
+                    ),
+                },
+            )
+        ),
+    },
+)
+
+heatmap_session_response = api.model(
+    "heatmap session response",
+    {
+        "session_id": fields.String(required=True),
+        "tokens": fields.List(fields.Nested(token_response), required=True),
+    },
+)
+
+heatmap_session_delta_request = api.model(
+    "heatmap session delta",
+    {
+        "edit_index": fields.Integer(
+            required=True,
+            description="Position of the changed edit in the edits the session was created with",
+        ),
+        "added_mentions": fields.List(fields.Nested(mention_request)),
+        "removed_mentions": fields.List(fields.Nested(mention_request)),
+        "added_relations": fields.List(fields.Nested(relation_request)),
+        "removed_relations": fields.List(fields.Nested(relation_request)),
+    },
+)
+
+heatmap_session_delta_response = api.model(
+    "heatmap session delta response",
+    {
+        "session_id": fields.String(required=True),
+        "changed_tokens": fields.List(
+            fields.Nested(
+                api.model(
+                    "token score",
+                    {
+                        "index": fields.Integer(
+                            required=True,
+                            description="Position of the token in the tokens of the heatmap",
+                        ),
+                        "id": fields.Integer(required=True),
+                        "score": fields.Float(required=False),
+                    },
+                )
+            ),
+            description="The tokens whose score changed",
+        ),
+    },
+)
+
+job_response = api.model(
+    "job response",
+    {
+        "id": fields.String(required=True),
+        "kind": fields.String(required=True, description="Name of the calculation"),
+        "status": fields.String(
+            required=True, enum=["queued", "running", "done", "failed", "cancelled"]
+        ),
+        "progress": fields.Float(
+            required=True,
+            description="Fraction of the calculation which is done, between 0 and 1",
+        ),
+        "error": fields.Nested(
+            api.model(
+                "job error",
+                {
+                    "type": fields.String(required=True),
+                    "message": fields.String(required=True),
+                    "status_code": fields.Integer(
+                        required=True,
+                        description="Status code the synchronous endpoint would have responded with",
+                    ),
+                },
+            ),
+            required=False,
+            allow_null=True,
+        ),
     },
 )
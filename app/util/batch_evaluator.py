@@ -0,0 +1,114 @@
+import typing
+
+from app.config import Config
+from app.model.batch import (
+    BatchAggregates,
+    BatchDocument,
+    BatchDocumentResult,
+    BatchResponse,
+)
+from app.model.similarity_score import F1ScoreResponse
+from app.util.f1_score_calculator import ScoreCalculator
+from app.util.heatmap_creator import HeatmapCreator
+from app.util.jaccard_index_calculator import (
+    JaccardIndexCalculator,
+    calculate_average_jaccard_index,
+)
+from app.util.process_pool import get_process_pool
+from app.util.utils import get_entities_with_mentions
+
+
+class BatchEvaluator:
+    def evaluate(
+        self,
+        documents: typing.List[BatchDocument],
+        progress: typing.Optional[typing.Callable[[float], None]] = None,
+    ) -> BatchResponse:
+        """
+        Calculates the requested metrics for every document. Documents are distributed over the
+        process pool, a document which can not be evaluated gets an error instead of its results.
+
+        :param documents:
+        :param progress: called with the fraction of the evaluated documents
+        """
+        if len(documents) < 2 or Config.PROCESS_POOL_WORKERS < 2:
+            results = map(evaluate_document, documents)
+        else:
+            chunksize = max(1, len(documents) // (Config.PROCESS_POOL_WORKERS * 4))
+            results = get_process_pool().map(
+                evaluate_document, documents, chunksize=chunksize
+            )
+        results = list(_report_progress(results, len(documents), progress))
+
+        return BatchResponse(
+            results=results, aggregates=calculate_batch_aggregates(results)
+        )
+
+
+def _report_progress(
+    results: typing.Iterable[BatchDocumentResult],
+    document_count: int,
+    progress: typing.Optional[typing.Callable[[float], None]],
+) -> typing.Iterator[BatchDocumentResult]:
+    for index, result in enumerate(results, start=1):
+        if progress:
+            progress(index / document_count)
+        yield result
+
+
+def evaluate_document(document: BatchDocument) -> BatchDocumentResult:
+    document_edits = document.document_edits
+    for document_edit in document_edits:
+        document_edit.entities = get_entities_with_mentions(document_edit.mentions)
+
+    result = BatchDocumentResult()
+    try:
+        if "heatmap" in document.metrics:
+            result.heatmap = HeatmapCreator().create_heatmap(document_edits)
+        if "jaccard" in document.metrics:
+            result.jaccard = JaccardIndexCalculator().calculate(document_edits)
+        if "f1" in document.metrics:
+            if len(document_edits) < 2:
+                raise ValueError("At least 2 edits of a document have to be compared.")
+            score_calculator = ScoreCalculator()
+            result.f1 = [
+                score_calculator.calc_score(
+                    actual_document=document_edits[0],
+                    predicted_document=predicted_document,
+                )
+                for predicted_document in document_edits[1:]
+            ]
+    except ValueError as error:
+        return BatchDocumentResult(error=str(error))
+    return result
+
+
+def calculate_batch_aggregates(
+    results: typing.List[BatchDocumentResult],
+) -> BatchAggregates:
+    """
+    :param results:
+    :return: averages over all documents for which the metric was calculated
+    """
+    jaccard_scores = [r.jaccard.average for r in results if r.jaccard]
+    f1_scores = [score for r in results if r.f1 for score in r.f1]
+
+    return BatchAggregates(
+        document_count=len(results),
+        failed_document_count=sum(1 for r in results if r.error is not None),
+        jaccard=(
+            calculate_average_jaccard_index(jaccard_scores) if jaccard_scores else None
+        ),
+        f1=_calculate_average_f1_score(f1_scores) if f1_scores else None,
+    )
+
+
+def _calculate_average_f1_score(
+    f1_scores: typing.List[F1ScoreResponse],
+) -> F1ScoreResponse:
+    return F1ScoreResponse(
+        **{
+            field: sum(getattr(score, field) for score in f1_scores) / len(f1_scores)
+            for field in F1ScoreResponse.model_fields
+        }
+    )
@@ -0,0 +1,132 @@
+import math
+import statistics
+import time
+import tracemalloc
+import typing
+
+from app.model.benchmark import (
+    BenchmarkRegression,
+    BenchmarkReport,
+    BenchmarkResult,
+    Calculator,
+)
+from app.model.document import DocumentEdit
+from app.util.compact_document import get_canonical_edit_cache
+from app.util.document_generator import generate_document_edits
+from app.util.f1_score_calculator import ScoreCalculator
+from app.util.heatmap_creator import HeatmapCreator
+from app.util.jaccard_index_calculator import JaccardIndexCalculator
+from app.util.utils import get_entities_with_mentions
+
+CALCULATORS: typing.Tuple[Calculator, ...] = ("heatmap", "jaccard", "f1")
+
+
+def run_benchmark(
+    token_counts: typing.Sequence[int],
+    annotator_counts: typing.Sequence[int],
+    calculators: typing.Sequence[Calculator] = CALCULATORS,
+    repetitions: int = 3,
+    **generator_parameters: float,
+) -> BenchmarkReport:
+    """
+    Times the calculators for synthetic documents of every combination of token and annotator count.
+
+    :param token_counts:
+    :param annotator_counts:
+    :param calculators:
+    :param repetitions: number of timed runs, their median is compared to the baseline
+    :param generator_parameters: further parameters of generate_document_edits, e.g. disagreement_rate
+    :return:
+    """
+    if min(annotator_counts) < 2:
+        raise ValueError("The calculators compare at least 2 annotators.")
+
+    results = []
+    for calculator in calculators:
+        for annotator_count in annotator_counts:
+            previous: typing.Optional[BenchmarkResult] = None
+            for token_count in sorted(token_counts):
+                document_edits = generate_document_edits(
+                    token_count,
+                    annotator_count=annotator_count,
+                    **generator_parameters,
+                )
+                result = _benchmark_calculator(calculator, document_edits, repetitions)
+                if previous is not None and previous.median_seconds > 0:
+                    result.scaling_exponent = math.log(
+                        result.median_seconds / previous.median_seconds
+                    ) / math.log(token_count / previous.token_count)
+                results.append(result)
+                previous = result
+    return BenchmarkReport(parameters=generator_parameters, results=results)
+
+
+def find_regressions(
+    report: BenchmarkReport, baseline: BenchmarkReport, threshold: float
+) -> typing.List[BenchmarkRegression]:
+    """
+    :param report:
+    :param baseline:
+    :param threshold: allowed increase of the median duration, e.g. 0.2 for 20%
+    :return: the results which are slower than their baseline by more than the threshold
+    """
+    baseline_seconds = {r.key: r.median_seconds for r in baseline.results}
+    return [
+        BenchmarkRegression(
+            key=result.key,
+            baseline_seconds=baseline_seconds[result.key],
+            median_seconds=result.median_seconds,
+        )
+        for result in report.results
+        if result.key in baseline_seconds
+        and result.median_seconds > baseline_seconds[result.key] * (1 + threshold)
+    ]
+
+
+def _benchmark_calculator(
+    calculator: Calculator,
+    document_edits: typing.List[DocumentEdit],
+    repetitions: int,
+) -> BenchmarkResult:
+    run = _get_run(calculator, document_edits)
+
+    durations = []
+    for _ in range(repetitions):
+        # every run starts without the cached features of the edits, like a new request
+        get_canonical_edit_cache().clear()
+        start = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - start)
+
+    # memory is measured in a separate run, tracing slows the calculation down
+    get_canonical_edit_cache().clear()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        calculator=calculator,
+        token_count=len(document_edits[0].document.tokens),
+        annotator_count=len(document_edits),
+        min_seconds=min(durations),
+        median_seconds=statistics.median(durations),
+        peak_memory_bytes=peak_memory,
+    )
+
+
+def _get_run(
+    calculator: Calculator, document_edits: typing.List[DocumentEdit]
+) -> typing.Callable[[], typing.Any]:
+    for document_edit in document_edits:
+        document_edit.entities = get_entities_with_mentions(document_edit.mentions)
+
+    if calculator == "heatmap":
+        return lambda: HeatmapCreator().create_heatmap(document_edits)
+    if calculator == "jaccard":
+        return lambda: JaccardIndexCalculator().calculate(document_edits)
+    return lambda: ScoreCalculator().calc_score(
+        actual_document=document_edits[0], predicted_document=document_edits[1]
+    )
@@ -0,0 +1,522 @@
+import threading
+import typing
+from array import array
+from collections import Counter
+
+from app.config import Config
+from app.model.document import DocumentEdit, TokenIndex
+from app.util.result_cache import (
+    DocumentEditDigest,
+    ResultCache,
+    digest_document_edits,
+)
+from app.util.metrics import measure_stage
+from app.util.utils import get_entities_with_mentions, validate_document_edit_lists
+
+DETERMINER_POS_TAG = "DT"
+NO_MENTION = -1
+
+# (tag id, head mention id, tail mention id)
+CompactRelation = tuple[int, int, int]
+
+# token keys of a mention and of its tokens without determiners
+_MentionTokenKeys = tuple[tuple[typing.Hashable, ...], tuple[typing.Hashable, ...]]
+
+
+class CanonicalDocumentEdit:
+    """
+    Derived features of a single document edit. Tokens are resolved against the token list of the
+    edit itself, so the features do not depend on the other edits of a request and can be reused
+    by every request containing the edit.
+
+    Mentions are numbered per edit, equal mentions share a number.
+    """
+
+    __slots__ = (
+        "token_index",
+        "tokens_digest",
+        "mention_tags",
+        "mention_token_keys",
+        "mentions",
+        "relations",
+        "entities",
+        "mention_by_token",
+        "size",
+    )
+
+    def __init__(self, document_edit: DocumentEdit, tokens_digest: bytes):
+        """
+        :param document_edit:
+        :param tokens_digest: DocumentEditDigest.tokens_digest of the edit
+        """
+        tokens = document_edit.document.tokens or []
+        self.token_index = TokenIndex(tokens)
+        self.tokens_digest = tokens_digest
+        mention_numbers: typing.Dict[typing.Hashable, int] = {}
+        self.mention_tags: typing.List[str] = []
+        self.mention_token_keys: typing.List[_MentionTokenKeys] = []
+
+        def number_mention(mention) -> int:
+            token_keys = tuple(self.token_index.get_key(t) for t in mention.tokens)
+            mention_key = (mention.tag, frozenset(token_keys))
+            number = mention_numbers.get(mention_key)
+            if number is None:
+                number = len(mention_numbers)
+                mention_numbers[mention_key] = number
+                self.mention_tags.append(mention.tag)
+                self.mention_token_keys.append(
+                    (
+                        token_keys,
+                        tuple(
+                            key
+                            for key, t in zip(token_keys, mention.tokens)
+                            if t.pos_tag != DETERMINER_POS_TAG
+                        ),
+                    )
+                )
+            return number
+
+        mentions = document_edit.mentions or []
+        self.mentions = array("l", (number_mention(m) for m in mentions))
+        self.relations: typing.List[tuple[str, int, int]] = [
+            (r.tag, number_mention(r.mention_head), number_mention(r.mention_tail))
+            for r in document_edit.relations or []
+        ]
+        self.entities: typing.List[frozenset[int]] = [
+            frozenset(number_mention(m) for m in entity.mentions)
+            for entity in get_entities_with_mentions(mentions)
+        ]
+
+        # mention by position of the token in the token list of the edit
+        self.mention_by_token = array("l", [NO_MENTION]) * len(tokens)
+        for number in self.mentions:
+            for token_key in self.mention_token_keys[number][0]:
+                # For wrong data (token in multiple mentions) the first mention is kept
+                if (
+                    isinstance(token_key, int)
+                    and self.mention_by_token[token_key] == NO_MENTION
+                ):
+                    self.mention_by_token[token_key] = number
+
+        # rough estimation of the memory used by the features
+        self.size = (
+            200 * len(tokens)
+            + 100 * sum(len(keys) for keys, _ in self.mention_token_keys)
+            + 100 * (len(self.mentions) + len(self.relations))
+        )
+
+
+class AnnotationInterner:
+    """
+    Interns the tokens, tags and mentions of the edits of one document into integer ids.
+    Objects which are equal by their equals methods get the same id, so annotations of
+    different edits are compared by comparing ids.
+
+    Tokens of the reference token list get their position as id, other tokens are numbered after them.
+    """
+
+    __slots__ = (
+        "token_index",
+        "_unaligned_token_ids",
+        "_tag_ids",
+        "_mention_ids",
+        "mention_tags",
+        "mention_tokens",
+        "mention_content_tokens",
+    )
+
+    def __init__(self, token_index: TokenIndex):
+        self.token_index = token_index
+        self._unaligned_token_ids: typing.Dict[typing.Hashable, int] = {}
+        self._tag_ids: typing.Dict[str, int] = {}
+        self._mention_ids: typing.Dict[typing.Hashable, int] = {}
+        # attributes of the mentions by mention id
+        self.mention_tags = array("l")
+        self.mention_tokens: typing.List[frozenset[int]] = []
+        # tokens of the mention without determiners like 'the'
+        self.mention_content_tokens: typing.List[frozenset[int]] = []
+
+    @property
+    def token_count(self) -> int:
+        return len(self.token_index) + len(self._unaligned_token_ids)
+
+    def intern_token_key(self, token_key: typing.Hashable) -> int:
+        """
+        :param token_key: key of the token in the token index of the interner
+        :return:
+        """
+        if isinstance(token_key, int):
+            return token_key
+        return self._unaligned_token_ids.setdefault(token_key, self.token_count)
+
+    def intern_tag(self, tag: str) -> int:
+        return self._tag_ids.setdefault(tag, len(self._tag_ids))
+
+    def intern_mention(
+        self,
+        tag: str,
+        token_keys: typing.Iterable[typing.Hashable],
+        content_token_keys: typing.Iterable[typing.Hashable],
+    ) -> int:
+        """
+        :param tag:
+        :param token_keys: keys of the tokens of the mention in the token index of the interner
+        :param content_token_keys: keys of the tokens which are no determiners
+        :return:
+        """
+        token_keys = frozenset(token_keys)
+        mention_key = (tag, token_keys)
+        mention_id = self._mention_ids.get(mention_key)
+        if mention_id is None:
+            mention_id = len(self._mention_ids)
+            self._mention_ids[mention_key] = mention_id
+            self.mention_tags.append(self.intern_tag(tag))
+            self.mention_tokens.append(
+                frozenset(self.intern_token_key(key) for key in token_keys)
+            )
+            self.mention_content_tokens.append(
+                frozenset(self.intern_token_key(key) for key in content_token_keys)
+            )
+        return mention_id
+
+    def get_equals_score(
+        self, mention_id: int, other_mention_id: typing.Optional[int]
+    ) -> float:
+        """
+        Same as Mention.get_equals_score for interned mentions
+        """
+        if other_mention_id is None:
+            return 1
+        if self.mention_tags[mention_id] != self.mention_tags[other_mention_id]:
+            return 1
+        if mention_id == other_mention_id:
+            return 0
+        if (
+            self.mention_content_tokens[mention_id]
+            <= self.mention_tokens[other_mention_id]
+            and self.mention_content_tokens[other_mention_id]
+            <= self.mention_tokens[mention_id]
+        ):
+            return 0.5
+        return 1
+
+
+class CompactDocumentEdit:
+    """
+    Annotations of a document edit as ids of an AnnotationInterner, with lookup tables for the
+    tokens and mentions of the edit.
+    """
+
+    __slots__ = (
+        "mentions",
+        "relations",
+        "entities",
+        "mention_by_token",
+        "relations_by_mention",
+        "entity_by_mention",
+    )
+
+    def __init__(
+        self,
+        canonical_edit: CanonicalDocumentEdit,
+        interner: AnnotationInterner,
+        token_keys: typing.Optional[typing.List[typing.Hashable]] = None,
+    ):
+        """
+        :param canonical_edit:
+        :param interner:
+        :param token_keys: keys of the tokens of the edit in the token index of the interner by their position,
+            None if the edit has the same tokens as the token index
+        """
+        token_index = interner.token_index
+
+        def resolve(key: typing.Hashable) -> typing.Hashable:
+            return resolve_token_key(key, token_index, token_keys)
+
+        mention_ids = [
+            interner.intern_mention(
+                tag, map(resolve, mention_token_keys), map(resolve, content_token_keys)
+            )
+            for tag, (mention_token_keys, content_token_keys) in zip(
+                canonical_edit.mention_tags, canonical_edit.mention_token_keys
+            )
+        ]
+
+        # ids of the mentions in the order of the edit, including duplicates
+        self.mentions = array("l", (mention_ids[m] for m in canonical_edit.mentions))
+        self.relations: typing.List[CompactRelation] = [
+            (interner.intern_tag(tag), mention_ids[head], mention_ids[tail])
+            for tag, head, tail in canonical_edit.relations
+        ]
+        # every entity as the set of the ids of its mentions
+        self.entities: typing.List[frozenset[int]] = [
+            frozenset(mention_ids[m] for m in entity)
+            for entity in canonical_edit.entities
+        ]
+
+        # mention by position of the token in the reference token list
+        if token_keys is None:
+            self.mention_by_token = array(
+                "l",
+                (
+                    NO_MENTION if m == NO_MENTION else mention_ids[m]
+                    for m in canonical_edit.mention_by_token
+                ),
+            )
+        else:
+            self.mention_by_token = array("l", [NO_MENTION]) * len(token_index)
+            for mention_id in self.mentions:
+                for token_id in interner.mention_tokens[mention_id]:
+                    # For wrong data (token in multiple mentions) the first mention is kept
+                    if (
+                        token_id < len(self.mention_by_token)
+                        and self.mention_by_token[token_id] == NO_MENTION
+                    ):
+                        self.mention_by_token[token_id] = mention_id
+
+        self.relations_by_mention: typing.Dict[int, Counter] = {}
+        for relation in self.relations:
+            _, head, tail = relation
+            for mention_id in {head, tail}:
+                self.relations_by_mention.setdefault(mention_id, Counter())[
+                    relation
+                ] += 1
+
+        self.entity_by_mention: typing.Dict[int, frozenset[int]] = {}
+        for entity in self.entities:
+            for mention_id in entity:
+                self.entity_by_mention.setdefault(mention_id, entity)
+
+    def replace_mentions(
+        self,
+        mentions: typing.Sequence[int],
+        interner: AnnotationInterner,
+        token_ids: typing.Set[int],
+    ) -> typing.Set[int]:
+        """
+        Replaces the mentions of the edit, the mention by token lookup is only updated for the given tokens.
+
+        :param mentions:
+        :param interner:
+        :param token_ids: tokens of all added and removed mentions
+        :return: the tokens with another mention
+        """
+        self.mentions = array("l", mentions)
+        token_ids = {t for t in token_ids if t < len(self.mention_by_token)}
+        mention_by_token = dict.fromkeys(token_ids, NO_MENTION)
+        remaining_token_ids = set(token_ids)
+        for mention_id in self.mentions:
+            if not remaining_token_ids:
+                break
+            # the first mention of a token is kept, like in the constructor
+            found_token_ids = interner.mention_tokens[mention_id] & remaining_token_ids
+            for token_id in found_token_ids:
+                mention_by_token[token_id] = mention_id
+            remaining_token_ids -= found_token_ids
+
+        changed_token_ids = set()
+        for token_id, mention_id in mention_by_token.items():
+            if self.mention_by_token[token_id] != mention_id:
+                self.mention_by_token[token_id] = mention_id
+                changed_token_ids.add(token_id)
+        return changed_token_ids
+
+    def add_relation(self, relation: CompactRelation) -> None:
+        self.relations.append(relation)
+        _, head, tail = relation
+        for mention_id in {head, tail}:
+            self.relations_by_mention.setdefault(mention_id, Counter())[relation] += 1
+
+    def remove_relation(self, relation: CompactRelation) -> None:
+        """
+        :raises ValueError: if the relation is not part of the edit
+        """
+        self.relations.remove(relation)
+        _, head, tail = relation
+        for mention_id in {head, tail}:
+            relations = self.relations_by_mention[mention_id]
+            relations[relation] -= 1
+            if relations[relation] == 0:
+                del relations[relation]
+            if not relations:
+                del self.relations_by_mention[mention_id]
+
+    def replace_entities(
+        self, entities: typing.List[frozenset[int]]
+    ) -> typing.Set[int]:
+        """
+        :param entities:
+        :return: the mentions with another entity
+        """
+        entity_by_mention: typing.Dict[int, frozenset[int]] = {}
+        for entity in entities:
+            for mention_id in entity:
+                entity_by_mention.setdefault(mention_id, entity)
+
+        changed_mention_ids = {
+            mention_id
+            for mention_id in self.entity_by_mention.keys() | entity_by_mention.keys()
+            if self.entity_by_mention.get(mention_id)
+            != entity_by_mention.get(mention_id)
+        }
+        self.entities = entities
+        self.entity_by_mention = entity_by_mention
+        return changed_mention_ids
+
+    def get_mention_of_token(self, token_id: int) -> typing.Optional[int]:
+        mention_id = self.mention_by_token[token_id]
+        return None if mention_id == NO_MENTION else mention_id
+
+    def get_relations_of_mention(self, mention_id: int) -> Counter:
+        """
+        :return: the relations with the mention as head or tail with the number of their occurrences
+        """
+        return self.relations_by_mention.get(mention_id, Counter())
+
+    def get_entity_of_mention(self, mention_id: int) -> typing.Optional[frozenset[int]]:
+        return self.entity_by_mention.get(mention_id)
+
+
+def resolve_token_key(
+    token_key: typing.Hashable,
+    token_index: TokenIndex,
+    token_keys: typing.Optional[typing.List[typing.Hashable]],
+) -> typing.Hashable:
+    """
+    Resolves the key of a token in the token index of its edit to the key in the given token index.
+
+    :param token_key:
+    :param token_index:
+    :param token_keys: keys of the tokens of the edit in the token index by their position,
+        None if the edit has the same tokens as the token index
+    :return:
+    """
+    if token_keys is None:
+        return token_key
+    if isinstance(token_key, int):
+        return token_keys[token_key]
+    return token_index.resolve_unaligned_key(token_key)
+
+
+def group_entities(
+    mentions: typing.Sequence[int], entity_ids: typing.Sequence[typing.Optional[int]]
+) -> typing.List[frozenset[int]]:
+    """
+    Groups mentions by the ids of their entities in the same order as get_entities_with_mentions.
+
+    :param mentions: ids of the mentions
+    :param entity_ids: id of the entity of every mention
+    :return: every entity as the set of the ids of its mentions
+    """
+    unique_entity_ids = list(
+        {entity_id for entity_id in entity_ids if entity_id is not None}
+    )
+    mentions_by_entity_id = {entity_id: [] for entity_id in unique_entity_ids}
+    for mention_id, entity_id in zip(mentions, entity_ids):
+        if entity_id is not None:
+            mentions_by_entity_id[entity_id].append(mention_id)
+    return [
+        frozenset(entity_mentions) for entity_mentions in mentions_by_entity_id.values()
+    ]
+
+
+def align_document_edits(
+    document_edits: typing.List[DocumentEdit],
+    digests: typing.Optional[typing.List[DocumentEditDigest]] = None,
+) -> tuple[
+    TokenIndex,
+    typing.List[CanonicalDocumentEdit],
+    typing.List[typing.Optional[typing.List[typing.Hashable]]],
+]:
+    """
+    Validates the edits of one document and aligns their tokens to the tokens of the first edit.
+    The alignment is skipped if all edits have the same tokens.
+
+    :param document_edits:
+    :param digests: digests of the edits, if they are already digested
+    :return: token index of the first edit, the canonical edits and the keys of the tokens of every
+        edit in the token index, which are None if the edit has the same tokens as the first edit
+    """
+    if digests is None:
+        digests = digest_document_edits(document_edits)
+    canonical_edits = [
+        get_canonical_document_edit(de, digest)
+        for de, digest in zip(document_edits, digests)
+    ]
+    if len(canonical_edits) >= 2 and all(
+        ce.tokens_digest == canonical_edits[0].tokens_digest
+        for ce in canonical_edits[1:]
+    ):
+        return (
+            canonical_edits[0].token_index,
+            canonical_edits,
+            [None] * len(canonical_edits),
+        )
+
+    with measure_stage("token_validation"):
+        token_index = validate_document_edit_lists(document_edits)
+    return (
+        token_index,
+        canonical_edits,
+        [
+            [token_index.get_key(t) for t in de.document.tokens or []]
+            for de in document_edits
+        ],
+    )
+
+
+def create_compact_document_edits(
+    document_edits: typing.List[DocumentEdit],
+    digests: typing.Optional[typing.List[DocumentEditDigest]] = None,
+) -> tuple[AnnotationInterner, typing.List[CompactDocumentEdit]]:
+    """
+    Validates the edits of one document and converts them into compact edits with a shared interner.
+
+    :param document_edits:
+    :param digests: digests of the edits, if they are already digested
+    :return:
+    """
+    token_index, canonical_edits, token_keys_lists = align_document_edits(
+        document_edits, digests
+    )
+    interner = AnnotationInterner(token_index)
+    return interner, [
+        CompactDocumentEdit(ce, interner, token_keys)
+        for ce, token_keys in zip(canonical_edits, token_keys_lists)
+    ]
+
+
+_canonical_edit_cache: ResultCache | None = None
+_canonical_edit_cache_lock = threading.Lock()
+
+
+def get_canonical_edit_cache() -> ResultCache:
+    """
+    Returns the cache of the derived features of document edits, it is created on first use.
+    """
+    global _canonical_edit_cache
+    with _canonical_edit_cache_lock:
+        if _canonical_edit_cache is None:
+            _canonical_edit_cache = ResultCache(
+                max_entries=Config.EDIT_FEATURE_CACHE_MAX_ENTRIES,
+                max_bytes=Config.EDIT_FEATURE_CACHE_MAX_BYTES,
+                ttl_seconds=Config.EDIT_FEATURE_CACHE_TTL_SECONDS,
+            )
+    return _canonical_edit_cache
+
+
+def get_canonical_document_edit(
+    document_edit: DocumentEdit, digest: DocumentEditDigest
+) -> CanonicalDocumentEdit:
+    """
+    Returns the derived features of the edit, which are cached by the digest of the edit.
+    """
+    cache = get_canonical_edit_cache()
+    if not cache.enabled:
+        return CanonicalDocumentEdit(document_edit, digest.tokens_digest)
+    key = digest.edit_digest
+    canonical_edit = cache.get(key)
+    if canonical_edit is None:
+        canonical_edit = CanonicalDocumentEdit(document_edit, digest.tokens_digest)
+        cache.put(key, canonical_edit, canonical_edit.size)
+    return canonical_edit
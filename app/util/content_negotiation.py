@@ -0,0 +1,182 @@
+"""
+Compression of request and response bodies and the optional MessagePack encoding.
+zstd and MessagePack are only supported if the optional packages zstandard and msgpack are installed.
+"""
+
+import gzip
+import io
+import typing
+import zlib
+
+from flask import Response, has_request_context, request
+from flask_restx import abort
+from werkzeug.wsgi import get_input_stream
+
+from app.config import Config
+from app.util.metrics import measure_stage
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the installed packages
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the installed packages
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# size of the chunks the request body is read and decompressed in
+_CHUNK_SIZE = 64 * 1024
+_GZIP_LEVEL = 5
+_ZSTD_LEVEL = 3
+_DECOMPRESSION_ERRORS = (OSError, EOFError, zlib.error) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+
+def get_supported_encodings() -> typing.List[str]:
+    """
+    :return: content encodings of request and response bodies, the preferred first
+    """
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+
+def is_msgpack_media_type(media_type: typing.Optional[str]) -> bool:
+    return media_type in (MSGPACK_MEDIA_TYPE, "application/x-msgpack") or bool(
+        media_type and media_type.endswith("+msgpack")
+    )
+
+
+def unpack_msgpack(data: bytes) -> typing.Any:
+    try:
+        return msgpack.unpackb(data)
+    except ValueError as error:
+        abort(400, f"The request body is no valid MessagePack: {error}")
+
+
+def pack_msgpack(value: typing.Any) -> bytes:
+    return msgpack.packb(value)
+
+
+def accepts_msgpack() -> bool:
+    """
+    :return: if the client of the current request prefers MessagePack over json
+    """
+    return (
+        msgpack is not None
+        and has_request_context()
+        and request.accept_mimetypes.best_match([JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE])
+        == MSGPACK_MEDIA_TYPE
+    )
+
+
+def decompress_request_body() -> None:
+    """
+    Replaces a gzip or zstd compressed request body by the decompressed body, so the controllers
+    read it with request.get_data. The body is decompressed in chunks, so a body which exceeds
+    REQUEST_MAX_DECOMPRESSED_BYTES is rejected without decompressing it completely.
+    """
+    if is_msgpack_media_type(request.mimetype) and msgpack is None:
+        abort(415, "MessagePack is not supported, the package msgpack is missing.")
+
+    encoding = request.headers.get("Content-Encoding", "").strip().lower()
+    if encoding in ("", "identity"):
+        return
+    if encoding == "x-gzip":
+        encoding = "gzip"
+    if encoding not in get_supported_encodings():
+        abort(
+            415,
+            f"Content-Encoding {encoding} is not supported, supported are: "
+            + ", ".join(get_supported_encodings()),
+        )
+
+    with measure_stage("decompression"):
+        body = _read_decompressed(
+            _open_decompressed(encoding, get_input_stream(request.environ)),
+            Config.REQUEST_MAX_DECOMPRESSED_BYTES,
+        )
+
+    # the stream of the request is created on first access, which is after this hook
+    request.environ["wsgi.input"] = body
+    request.environ["CONTENT_LENGTH"] = str(body.getbuffer().nbytes)
+    request.environ.pop("HTTP_CONTENT_ENCODING", None)
+
+
+def _open_decompressed(encoding: str, stream: typing.IO[bytes]) -> typing.IO[bytes]:
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().stream_reader(stream)
+    return gzip.GzipFile(fileobj=stream, mode="rb")
+
+
+def _read_decompressed(reader: typing.IO[bytes], max_bytes: int) -> io.BytesIO:
+    body = io.BytesIO()
+    try:
+        while chunk := reader.read(_CHUNK_SIZE):
+            body.write(chunk)
+            if body.tell() > max_bytes:
+                abort(
+                    413,
+                    f"The decompressed request body exceeds {max_bytes} bytes.",
+                )
+    except _DECOMPRESSION_ERRORS as error:
+        abort(400, f"The request body can not be decompressed: {error}")
+    body.seek(0)
+    return body
+
+
+def compress_response(response: Response) -> Response:
+    """
+    Compresses the response with the encoding the client prefers. Streamed responses are compressed
+    chunk by chunk, so every chunk can be decompressed as soon as it arrives.
+    """
+    if (
+        response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(get_supported_encodings())
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_chunks(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < Config.RESPONSE_COMPRESSION_MIN_BYTES:
+            return response
+        with measure_stage("compression"):
+            response.set_data(_compress(encoding, data))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def _compress(encoding: str, data: bytes) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=_GZIP_LEVEL, mtime=0)
+
+
+def _compress_chunks(
+    chunks: typing.Iterable[bytes | str], encoding: str
+) -> typing.Iterator[bytes]:
+    # every chunk is flushed as a complete block without ending the stream
+    if encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compressobj()
+        flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+    else:
+        # wbits 31 writes the gzip header and trailer
+        compressor = zlib.compressobj(_GZIP_LEVEL, zlib.DEFLATED, 31)
+        flush_mode = zlib.Z_SYNC_FLUSH
+
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        yield compressor.compress(chunk) + compressor.flush(flush_mode)
+    yield compressor.flush()
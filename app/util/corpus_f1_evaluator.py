@@ -0,0 +1,136 @@
+import itertools
+import sys
+import typing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from app.model.similarity_score import (
+    CorpusF1ScoreResponse,
+    F1ScoreCounts,
+    F1ScoreResponse,
+)
+from app.util.f1_score_calculator import ScoreCalculator, calc_score_from_counts
+from app.util.process_pool import get_process_context
+from app.util.request_decoder import decode_f1_score_request
+from app.util.utils import get_entities_with_mentions
+
+# (location of the record for error messages, json of the record)
+Record = tuple[str, str]
+
+
+class CorpusF1Evaluator:
+    """
+    Calculates micro and macro averaged f1-scores for a corpus of actual and predicted document edits.
+    Records are read and scored in chunks, so only a bounded number of documents is kept in memory.
+    """
+
+    def __init__(self, workers: int = 1, chunk_size: int = 100, max_errors: int = 100):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.errors: typing.List[str] = []
+
+    def evaluate(self, records: typing.Iterable[Record]) -> CorpusF1ScoreResponse:
+        chunks = _chunk(records, self.chunk_size)
+        result = _PartialResult()
+
+        if self.workers < 2:
+            for chunk in chunks:
+                self._merge(result, _evaluate_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=get_process_context()
+            ) as executor:
+                pending = set()
+                for chunk in chunks:
+                    if len(pending) >= self.workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self._merge(result, future.result())
+                    pending.add(executor.submit(_evaluate_chunk, chunk))
+                for future in pending:
+                    self._merge(result, future.result())
+
+        return CorpusF1ScoreResponse(
+            document_count=result.document_count,
+            failed_document_count=result.failed_document_count,
+            micro=calc_score_from_counts(result.counts),
+            macro=F1ScoreResponse(
+                **{
+                    field: (
+                        score_sum / result.document_count
+                        if result.document_count
+                        else 0
+                    )
+                    for field, score_sum in result.score_sums.items()
+                }
+            ),
+        )
+
+    def _merge(self, result: "_PartialResult", chunk_result: "_PartialResult"):
+        result.merge(chunk_result)
+        self.errors.extend(chunk_result.errors[: self.max_errors - len(self.errors)])
+
+
+class _PartialResult:
+    def __init__(self):
+        self.document_count = 0
+        self.failed_document_count = 0
+        self.counts = F1ScoreCounts()
+        self.score_sums = dict.fromkeys(F1ScoreResponse.model_fields, 0.0)
+        self.errors: typing.List[str] = []
+
+    def merge(self, other: "_PartialResult"):
+        self.document_count += other.document_count
+        self.failed_document_count += other.failed_document_count
+        self.counts += other.counts
+        for field, score_sum in other.score_sums.items():
+            self.score_sums[field] += score_sum
+
+
+def _evaluate_chunk(records: typing.List[Record]) -> _PartialResult:
+    score_calculator = ScoreCalculator()
+    result = _PartialResult()
+    for location, record in records:
+        try:
+            f1_score_request = decode_f1_score_request(record)
+            actual = f1_score_request.actual
+            predicted = f1_score_request.predicted
+            actual.entities = get_entities_with_mentions(actual.mentions)
+            predicted.entities = get_entities_with_mentions(predicted.mentions)
+            counts = score_calculator.calc_counts(
+                actual_document=actual, predicted_document=predicted
+            )
+        except ValueError as error:
+            result.failed_document_count += 1
+            result.errors.append(f"{location}: {error}")
+            continue
+
+        result.document_count += 1
+        result.counts += counts
+        score = calc_score_from_counts(counts)
+        for field in result.score_sums:
+            result.score_sums[field] += getattr(score, field)
+    return result
+
+
+def _chunk(
+    records: typing.Iterable[Record], chunk_size: int
+) -> typing.Iterator[typing.List[Record]]:
+    iterator = iter(records)
+    while chunk := list(itertools.islice(iterator, chunk_size)):
+        yield chunk
+
+
+def read_ndjson_records(paths: typing.List[str]) -> typing.Iterator[Record]:
+    """
+    Reads the non-empty lines of the given NDJSON files lazily, '-' reads from stdin.
+    """
+    for path in paths:
+        file = sys.stdin if path == "-" else open(path, encoding="utf-8")
+        try:
+            for line_number, line in enumerate(file, start=1):
+                if line.strip():
+                    yield f"{path}:{line_number}", line
+        finally:
+            if file is not sys.stdin:
+                file.close()
@@ -0,0 +1,184 @@
+import random
+import typing
+
+from app.model.document import (
+    Document,
+    DocumentEdit,
+    Entity,
+    Mention,
+    Relation,
+    Token,
+)
+
+MENTION_TAGS = ("Actor", "Activity", "Activity Data", "Further Specification")
+RELATION_TAGS = ("Actor Performer", "Uses", "Flow", "Same Gateway")
+_WORDS = ("process", "order", "customer", "checks", "invoice", "sends", "clerk")
+# longest span of a mention without its determiner
+_MAX_MENTION_LENGTH = 3
+_SENTENCE_LENGTH = 20
+
+
+class _Annotation:
+    """
+    Mention of the reference annotation, which is varied by every annotator.
+    """
+
+    __slots__ = ("tag", "start", "end", "entity_id")
+
+    def __init__(self, tag: str, start: int, end: int, entity_id: typing.Optional[int]):
+        self.tag = tag
+        self.start = start
+        self.end = end
+        self.entity_id = entity_id
+
+
+def generate_document_edits(
+    token_count: int,
+    mention_density: float = 0.3,
+    relation_density: float = 0.5,
+    entity_cluster_size: int = 3,
+    annotator_count: int = 3,
+    disagreement_rate: float = 0.1,
+    seed: int = 0,
+) -> typing.List[DocumentEdit]:
+    """
+    Generates edits of one synthetic document, e.g. for benchmarks. Every annotator varies the same
+    reference annotation, so the edits agree apart from the disagreements.
+
+    :param token_count: number of tokens of the document
+    :param mention_density: share of the tokens which are part of a mention
+    :param relation_density: number of relations per mention
+    :param entity_cluster_size: number of mentions of an entity, 0 or 1 creates no entities
+    :param annotator_count: number of edits
+    :param disagreement_rate: probability that an annotator changes, drops or moves a mention, relation or entity
+    :param seed: seed of the random generator, the same parameters and seed generate the same edits
+    :return:
+    """
+    rng = random.Random(seed)
+    tokens = [
+        Token(
+            id=index,
+            text="the" if index % 7 == 0 else rng.choice(_WORDS),
+            document_index=index,
+            sentence_index=index // _SENTENCE_LENGTH,
+            pos_tag="DT" if index % 7 == 0 else "NN",
+        )
+        for index in range(token_count)
+    ]
+
+    annotations = _generate_annotations(
+        rng, token_count, mention_density, entity_cluster_size
+    )
+    relations = [
+        (
+            rng.choice(RELATION_TAGS),
+            rng.randrange(len(annotations)),
+            rng.randrange(len(annotations)),
+        )
+        for _ in range(int(len(annotations) * relation_density) if annotations else 0)
+    ]
+
+    return [
+        _generate_edit(rng, tokens, annotations, relations, disagreement_rate)
+        for _ in range(annotator_count)
+    ]
+
+
+def _generate_annotations(
+    rng: random.Random,
+    token_count: int,
+    mention_density: float,
+    entity_cluster_size: int,
+) -> typing.List[_Annotation]:
+    annotations = []
+    if mention_density <= 0:
+        return annotations
+
+    # gaps between the mentions are chosen so that mention_density of the tokens are part of mentions
+    average_length = (1 + _MAX_MENTION_LENGTH) / 2
+    average_gap = average_length * (1 - mention_density) / mention_density
+    position = 0
+    while position < token_count:
+        position += round(rng.uniform(0, 2 * average_gap))
+        length = rng.randint(1, _MAX_MENTION_LENGTH)
+        if position + length > token_count:
+            break
+        annotations.append(
+            _Annotation(rng.choice(MENTION_TAGS), position, position + length, None)
+        )
+        position += length
+
+    if entity_cluster_size > 1:
+        shuffled = list(annotations)
+        rng.shuffle(shuffled)
+        for index, annotation in enumerate(shuffled):
+            annotation.entity_id = index // entity_cluster_size
+    return annotations
+
+
+def _generate_edit(
+    rng: random.Random,
+    tokens: typing.List[Token],
+    annotations: typing.List[_Annotation],
+    relations: typing.List[tuple[str, int, int]],
+    disagreement_rate: float,
+) -> DocumentEdit:
+    edit_tokens = [token.model_copy() for token in tokens]
+
+    mentions: typing.List[typing.Optional[Mention]] = []
+    for annotation in annotations:
+        if rng.random() >= disagreement_rate:
+            mentions.append(_create_mention(edit_tokens, annotation, annotation.tag))
+            continue
+        disagreement = rng.randrange(4)
+        if disagreement == 0:
+            # the annotator missed the mention
+            mentions.append(None)
+        elif disagreement == 1:
+            tag = rng.choice([t for t in MENTION_TAGS if t != annotation.tag])
+            mentions.append(_create_mention(edit_tokens, annotation, tag))
+        elif disagreement == 2:
+            # the span also contains the token before, which is often a determiner
+            moved = _Annotation(
+                annotation.tag,
+                max(0, annotation.start - 1),
+                annotation.end,
+                annotation.entity_id,
+            )
+            mentions.append(_create_mention(edit_tokens, moved, annotation.tag))
+        else:
+            mention = _create_mention(edit_tokens, annotation, annotation.tag)
+            mention.entity = None
+            mentions.append(mention)
+
+    edit_relations = []
+    for tag, head, tail in relations:
+        if mentions[head] is None or mentions[tail] is None:
+            continue
+        if rng.random() < disagreement_rate:
+            if rng.random() < 0.5:
+                continue
+            tag = rng.choice([t for t in RELATION_TAGS if t != tag])
+        edit_relations.append(
+            Relation(tag=tag, mention_head=mentions[head], mention_tail=mentions[tail])
+        )
+
+    return DocumentEdit(
+        document=Document(tokens=edit_tokens),
+        mentions=[mention for mention in mentions if mention is not None],
+        relations=edit_relations,
+    )
+
+
+def _create_mention(
+    tokens: typing.List[Token], annotation: _Annotation, tag: str
+) -> Mention:
+    return Mention(
+        tag=tag,
+        tokens=tokens[annotation.start : annotation.end],
+        entity=(
+            Entity(id=annotation.entity_id)
+            if annotation.entity_id is not None
+            else None
+        ),
+    )
@@ -1,118 +1,359 @@
 import typing
-from app.model.document import DocumentEdit, Mention, Relation, Entity
-from app.model.similarity_score import F1ScoreResponse
-from app.util.utils import all_edits_contain_same_tokens
+from collections import deque
+
+from app.model.document import (
+    DocumentEdit,
+    Mention,
+    Relation,
+    Entity,
+    TokenIndex,
+)
+from app.model.similarity_score import (
+    F1ScoreResponse,
+    F1ScoreCounts,
+    F1Counts,
+    MentionMatching,
+)
+from app.util.interval_index import IntervalIndex
+from app.util.utils import align_tokens
 
 
 class ScoreCalculator:
     def calc_score(
-        self, actual_document: DocumentEdit, predicted_document: DocumentEdit
-    ):
-        if not (
-            all_edits_contain_same_tokens(
-                [actual_document.document.tokens, predicted_document.document.tokens]
-            )
-        ):
-            raise ValueError(
-                "Tokens in the different edits of the document are not the same."
+        self,
+        actual_document: DocumentEdit,
+        predicted_document: DocumentEdit,
+        matching: MentionMatching = "exact",
+    ) -> F1ScoreResponse:
+        return calc_score_from_counts(
+            self.calc_counts(
+                actual_document=actual_document,
+                predicted_document=predicted_document,
+                matching=matching,
             )
-        mention_score = _calc_mention_score(
-            actual_mentions=actual_document.mentions,
-            predicted_mentions=predicted_document.mentions,
-        )
-        common_actual_mentions, common_predicted_mentions = _get_common_mention_indices(
-            actual_mentions=actual_document.mentions,
-            predicted_mentions=predicted_document.mentions,
         )
-        actual_relations_by_mentions = _get_relations_by_mentions(
-            actual_document.relations, common_actual_mentions
-        )
-        predicted_relations_by_mentions = _get_relations_by_mentions(
-            predicted_document.relations, common_predicted_mentions
+
+    def calc_counts(
+        self,
+        actual_document: DocumentEdit,
+        predicted_document: DocumentEdit,
+        matching: MentionMatching = "exact",
+    ) -> F1ScoreCounts:
+        """
+        Counts the annotations and true positives the f1-scores are calculated from.
+        Counts of multiple documents can be summed up for micro averaged scores.
+
+        :param actual_document:
+        :param predicted_document:
+        :param matching: 'exact' if predicted mentions have to be equal to the actual mentions,
+            'partial' if they only have to have the same tag and overlap, every mention is matched at most once
+        :return:
+        """
+        token_index = align_tokens(
+            [actual_document.document.tokens, predicted_document.document.tokens]
         )
-        actual_entities_by_mentions = _get_entities_by_mentions(
-            actual_document.entities, common_actual_mentions
+        actual_mentions = _MentionIndex(actual_document.mentions, token_index)
+        predicted_mentions = _MentionIndex(predicted_document.mentions, token_index)
+
+        # keys of the mentions which are part of both edits, mapped to the key of the actual mention,
+        # so relations and entities of both edits are compared by the keys of the actual mentions
+        if matching == "partial":
+            matched_mentions = _match_overlapping_mentions(
+                actual_document.mentions,
+                predicted_document.mentions,
+                actual_mentions,
+                predicted_mentions,
+            )
+            actual_common_mentions = {}
+            predicted_common_mentions = {}
+            for actual, predicted in matched_mentions:
+                actual_key = actual_mentions.keys[actual]
+                actual_common_mentions[actual_key] = actual_key
+                predicted_common_mentions.setdefault(
+                    predicted_mentions.keys[predicted], actual_key
+                )
+            mention_true_positives = len(matched_mentions)
+        else:
+            actual_common_mentions = {
+                key: key for key in actual_mentions.key_set & predicted_mentions.key_set
+            }
+            predicted_common_mentions = actual_common_mentions
+            mention_true_positives = sum(
+                key in predicted_mentions.key_set for key in actual_mentions.keys
+            )
+
+        actual_relations = actual_mentions.get_relation_keys(
+            actual_document.relations, actual_common_mentions
         )
-        predicted_entities_by_mentions = _get_entities_by_mentions(
-            predicted_document.entities, common_predicted_mentions
+        predicted_relations = predicted_mentions.get_relation_keys(
+            predicted_document.relations, predicted_common_mentions
         )
-        considered_relation_quote = 0
-        if (len(actual_document.relations) + len(predicted_document.relations)) != 0:
-            considered_relation_quote = (
-                len(actual_relations_by_mentions) + len(predicted_relations_by_mentions)
-            ) / (len(actual_document.relations) + len(predicted_document.relations))
-        relation_score = _calc_relation_score(
-            actual_relations=actual_relations_by_mentions,
-            predicted_relations=predicted_relations_by_mentions,
+        actual_entities = _get_entity_keys(
+            actual_document.entities, actual_common_mentions, token_index
         )
-        considered_entity_quote = 0
-        if (len(actual_document.entities) + len(predicted_document.entities)) != 0:
-            considered_entity_quote = (
-                len(actual_entities_by_mentions) + len(predicted_entities_by_mentions)
-            ) / (len(actual_document.entities) + len(predicted_document.entities))
-        entity_score = _calc_entity_score(
-            actual_entities=actual_entities_by_mentions,
-            predicted_entities=predicted_entities_by_mentions,
+        predicted_entities = _get_entity_keys(
+            predicted_document.entities, predicted_common_mentions, token_index
         )
-        similarity_score_response = F1ScoreResponse(
-            mention_score=mention_score,
-            considered_relation_quote=considered_relation_quote,
-            relation_score=relation_score,
-            considered_entity_quote=considered_entity_quote,
-            entity_score=entity_score,
+        return F1ScoreCounts(
+            mentions=F1Counts(
+                actual=len(actual_document.mentions),
+                predicted=len(predicted_document.mentions),
+                true_positives=mention_true_positives,
+            ),
+            relations=F1Counts(
+                actual=len(actual_relations),
+                predicted=len(predicted_relations),
+                true_positives=_count_true_positive_keys(
+                    actual_relations, predicted_relations
+                ),
+            ),
+            entities=F1Counts(
+                actual=len(actual_entities),
+                predicted=len(predicted_entities),
+                true_positives=_count_true_positive_entities(
+                    actual_entities, predicted_entities
+                ),
+            ),
+            relation_count=len(actual_document.relations)
+            + len(predicted_document.relations),
+            entity_count=len(actual_document.entities)
+            + len(predicted_document.entities),
         )
-        return similarity_score_response
 
 
-def _calc_mention_score(
-    actual_mentions: typing.List[Mention], predicted_mentions: typing.List[Mention]
-):
-    true_positives = sum(
-        any(m0.equals(m1) for m1 in predicted_mentions) for m0 in actual_mentions
-    )
-    return _calc_f1_score(
-        actual_length=len(actual_mentions),
-        predicted_length=len(predicted_mentions),
-        true_positives=true_positives,
-    )
+class _MentionIndex:
+    """
+    Keys of the mentions of one edit. Mentions which are equal by Mention.equals get the same key,
+    so mentions are compared by hash lookups of their keys.
+    """
 
+    __slots__ = ("keys", "key_set", "_keys_by_structure")
 
-def _calc_relation_score(
-    actual_relations: typing.List[Relation], predicted_relations: typing.List[Relation]
-):
-    true_positives = sum(
-        any(r0.equals(r1) for r1 in predicted_relations) for r0 in actual_relations
-    )
-    return _calc_f1_score(
-        actual_length=len(actual_relations),
-        predicted_length=len(predicted_relations),
-        true_positives=true_positives,
+    def __init__(self, mentions: typing.List[Mention], token_index: TokenIndex):
+        # key by position of the mention in the mentions of the edit
+        self.keys = [mention.get_key(token_index) for mention in mentions]
+        self.key_set = set(self.keys)
+        self._keys_by_structure = {
+            _get_structure_key(mention): key
+            for mention, key in zip(mentions, self.keys)
+        }
+
+    def get_relation_keys(
+        self,
+        relations: typing.List[Relation],
+        common_mentions: typing.Dict[tuple, tuple],
+    ) -> typing.List[tuple]:
+        """
+        :param relations:
+        :param common_mentions: keys of the mentions which are part of both edits, mapped to the key they are compared by
+        :return: keys of the relations whose head and tail are mentions of the edit, which are part of both edits
+        """
+        relation_keys = []
+        for relation in relations:
+            # head and tail have to be the same as a mention of the edit, including their entity
+            head = self._keys_by_structure.get(
+                _get_structure_key(relation.mention_head)
+            )
+            tail = self._keys_by_structure.get(
+                _get_structure_key(relation.mention_tail)
+            )
+            if head in common_mentions and tail in common_mentions:
+                relation_keys.append(
+                    (relation.tag, common_mentions[head], common_mentions[tail])
+                )
+        return relation_keys
+
+
+def _get_structure_key(mention: Mention) -> tuple:
+    """
+    :return: key of all fields of the mention, mentions with the same key are ==
+    """
+    entity_key = None
+    if mention.entity is not None:
+        entity_mentions = mention.entity.mentions
+        entity_key = (
+            mention.entity.id,
+            (
+                None
+                if entity_mentions is None
+                else tuple(_get_structure_key(m) for m in entity_mentions)
+            ),
+        )
+    return (
+        mention.tag,
+        tuple(tuple(token.__dict__.values()) for token in mention.tokens),
+        entity_key,
     )
 
 
-def _calc_entity_score(
-    actual_entities: typing.List[Entity], predicted_entities: typing.List[Entity]
-):
-    true_positives = sum(
-        any(r0.equals(r1) for r1 in predicted_entities) for r0 in actual_entities
+def _get_entity_keys(
+    entities: typing.List[Entity],
+    common_mentions: typing.Dict[tuple, tuple],
+    token_index: TokenIndex,
+) -> typing.List[frozenset]:
+    """
+    :return: keys of the entities whose mentions are all part of both edits
+    """
+    entity_keys = []
+    for entity in entities:
+        mention_keys = [mention.get_key(token_index) for mention in entity.mentions]
+        if all(key in common_mentions for key in mention_keys):
+            entity_keys.append(frozenset(common_mentions[key] for key in mention_keys))
+    return entity_keys
+
+
+def _get_span(mention: Mention) -> typing.Optional[tuple[int, int]]:
+    """
+    :return: first and last document_index of the tokens of the mention
+    """
+    indices = [t.document_index for t in mention.tokens if t.document_index is not None]
+    return (min(indices), max(indices)) if indices else None
+
+
+def _match_overlapping_mentions(
+    actual_mentions: typing.List[Mention],
+    predicted_mentions: typing.List[Mention],
+    actual_index: _MentionIndex,
+    predicted_index: _MentionIndex,
+) -> typing.List[tuple[int, int]]:
+    """
+    Matches every actual mention to at most one predicted mention with the same tag and an overlapping span.
+    The predicted mentions are indexed by their spans, so only overlapping mentions are compared.
+    Mentions without document_index are only matched to equal mentions.
+
+    :return: positions of the matched actual and predicted mentions
+    """
+    spans = [_get_span(mention) for mention in predicted_mentions]
+    interval_index = IntervalIndex(
+        (span[0], span[1], position)
+        for position, span in enumerate(spans)
+        if span is not None
     )
-    return _calc_f1_score(
-        actual_length=len(actual_entities),
-        predicted_length=len(predicted_entities),
-        true_positives=true_positives,
+    positions_by_key: typing.Dict[tuple, typing.List[int]] = {}
+    for position, key in enumerate(predicted_index.keys):
+        positions_by_key.setdefault(key, []).append(position)
+
+    candidates = []
+    for position, mention in enumerate(actual_mentions):
+        span = _get_span(mention)
+        if span is None:
+            candidates.append(positions_by_key.get(actual_index.keys[position], []))
+            continue
+        overlapping = [
+            predicted
+            for predicted in interval_index.find_overlapping(*span)
+            if predicted_mentions[predicted].tag == mention.tag
+        ]
+        # mentions with a larger overlap are matched first
+        overlapping.sort(
+            key=lambda predicted: min(span[1], spans[predicted][1])
+            - max(span[0], spans[predicted][0]),
+            reverse=True,
+        )
+        candidates.append(overlapping)
+
+    return _find_maximum_matching(candidates)
+
+
+def _find_maximum_matching(
+    candidates: typing.List[typing.List[int]],
+) -> typing.List[tuple[int, int]]:
+    """
+    Finds a one-to-one matching with the most pairs by augmenting paths.
+
+    :param candidates: positions of the predicted mentions every actual mention can be matched to
+    :return: matched positions of the actual and predicted mentions
+    """
+    actual_by_predicted: typing.Dict[int, int] = {}
+    predicted_by_actual: typing.Dict[int, int] = {}
+    for actual in range(len(candidates)):
+        # breadth first search for an unmatched predicted mention, every step takes over the match of a matched one
+        reached_from: typing.Dict[int, int] = {}
+        visited = {actual}
+        queue = deque([actual])
+        unmatched = None
+        while queue and unmatched is None:
+            current = queue.popleft()
+            for predicted in candidates[current]:
+                if predicted in reached_from:
+                    continue
+                reached_from[predicted] = current
+                matched_actual = actual_by_predicted.get(predicted)
+                if matched_actual is None:
+                    unmatched = predicted
+                    break
+                if matched_actual not in visited:
+                    visited.add(matched_actual)
+                    queue.append(matched_actual)
+
+        predicted = unmatched
+        while predicted is not None:
+            current = reached_from[predicted]
+            previous = predicted_by_actual.get(current)
+            actual_by_predicted[predicted] = current
+            predicted_by_actual[current] = predicted
+            predicted = previous if current != actual else None
+
+    return sorted(predicted_by_actual.items())
+
+
+def _count_true_positive_keys(
+    actual_keys: typing.List[typing.Hashable],
+    predicted_keys: typing.List[typing.Hashable],
+) -> int:
+    predicted_key_set = set(predicted_keys)
+    return sum(key in predicted_key_set for key in actual_keys)
+
+
+def _count_true_positive_entities(
+    actual_entities: typing.List[frozenset], predicted_entities: typing.List[frozenset]
+) -> int:
+    """
+    Like Entity.equals, an actual entity is predicted if all its mentions are part of a predicted entity.
+    Only the predicted entities containing any mention of the actual entity are compared.
+    """
+    predicted_by_mention: typing.Dict[tuple, typing.List[frozenset]] = {}
+    for predicted in predicted_entities:
+        for mention in predicted:
+            predicted_by_mention.setdefault(mention, []).append(predicted)
+
+    true_positives = 0
+    for actual in actual_entities:
+        if not actual:
+            # all mentions of an entity without mentions are part of any entity
+            true_positives += bool(predicted_entities)
+            continue
+        candidates = predicted_by_mention.get(next(iter(actual)), [])
+        true_positives += any(actual <= predicted for predicted in candidates)
+    return true_positives
+
+
+def calc_score_from_counts(counts: F1ScoreCounts) -> F1ScoreResponse:
+    considered_relation_quote = 0
+    if counts.relation_count != 0:
+        considered_relation_quote = (
+            counts.relations.actual + counts.relations.predicted
+        ) / counts.relation_count
+    considered_entity_quote = 0
+    if counts.entity_count != 0:
+        considered_entity_quote = (
+            counts.entities.actual + counts.entities.predicted
+        ) / counts.entity_count
+    return F1ScoreResponse(
+        mention_score=_calc_f1_score_from_counts(counts.mentions),
+        considered_relation_quote=considered_relation_quote,
+        relation_score=_calc_f1_score_from_counts(counts.relations),
+        considered_entity_quote=considered_entity_quote,
+        entity_score=_calc_f1_score_from_counts(counts.entities),
     )
 
 
-def _get_common_mention_indices(
-    actual_mentions: typing.List[Mention], predicted_mentions: typing.List[Mention]
-) -> tuple[typing.List[Mention], typing.List[Mention]]:
-    common_mentions_0 = [
-        m0 for m0 in actual_mentions if any(m0.equals(m1) for m1 in predicted_mentions)
-    ]
-    common_mentions_1 = [
-        m1 for m1 in predicted_mentions if any(m1.equals(m0) for m0 in actual_mentions)
-    ]
-    return (common_mentions_0, common_mentions_1)
+def _calc_f1_score_from_counts(counts: F1Counts) -> float:
+    return _calc_f1_score(
+        actual_length=counts.actual,
+        predicted_length=counts.predicted,
+        true_positives=counts.true_positives,
+    )
 
 
 def _calc_f1_score(actual_length, predicted_length, true_positives):
@@ -123,30 +364,3 @@ def _calc_f1_score(actual_length, predicted_length, true_positives):
     else:
         f1_score = 0
     return f1_score
-
-
-def _get_relations_by_mentions(
-    relation_list: typing.List[Relation], mention_list: typing.List[Mention]
-) -> typing.List[Relation]:
-    relation_by_mentions_list = []
-    for relation in relation_list:
-        if (
-            relation.mention_head in mention_list
-            and relation.mention_tail in mention_list
-        ):
-            relation_by_mentions_list.append(relation)
-    return relation_by_mentions_list
-
-
-def _get_entities_by_mentions(
-    entity_list: typing.List[Entity], mention_list: typing.List[Mention]
-) -> typing.List[Entity]:
-    entity_by_mentions_list = []
-    for entity in entity_list:
-        is_entity_valid = True
-        for mention in entity.mentions:
-            if mention not in mention_list:
-                is_entity_valid = False
-        if is_entity_valid:
-            entity_by_mentions_list.append(entity)
-    return entity_by_mentions_list
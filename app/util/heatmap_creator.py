@@ -1,57 +1,155 @@
 import typing
 
-from app.model.document import DocumentEdit, Mention, Relation, Token
-from app.util.utils import validate_document_edit_lists
+from app.model.document import DocumentEdit, Token
+from app.util.compact_document import (
+    AnnotationInterner,
+    CompactDocumentEdit,
+    create_compact_document_edits,
+)
+from app.util.result_cache import DocumentEditDigest
 
 
 class HeatmapCreator:
     def create_heatmap(
-        self, document_edits: typing.List[DocumentEdit]
+        self,
+        document_edits: typing.List[DocumentEdit],
+        progress: typing.Optional[typing.Callable[[float], None]] = None,
+        digests: typing.Optional[typing.List[DocumentEditDigest]] = None,
     ) -> typing.List[Token]:
         """
         Creates a heatmap by assigning a score to each token.
         A higher score indicates greater discrepancies in annotations across documents.
 
-        TODO: The score is currently based on magic numbers and conditions. These could be further resolved to calculate a more 'scientific' value
+        :param document_edits:
+        :param progress: called with the fraction of the scored tokens
+        :param digests: digests of the edits, if they are already digested
         """
-        validate_document_edit_lists(document_edits)
+        interner, compact_edits = create_compact_document_edits(document_edits, digests)
         tokens = document_edits[0].document.tokens
 
-        for token in tokens:
-            token.score = _calculate_token_score(token, document_edits)
-
-        maxScore = max(token.score for token in tokens if token.score)
+        scores, max_score = score_tokens(tokens, compact_edits, interner, progress)
 
         # score should be between 0 and 1 (0 same annotations, 1 max different annotations)
-        for token in tokens:
-            if token.score:
-                token.score = token.score / maxScore
+        for token, score in zip(tokens, scores):
+            token.score = score / max_score if score else score
 
         return tokens
 
+    def stream_heatmap(
+        self,
+        document_edits: typing.List[DocumentEdit],
+        digests: typing.Optional[typing.List[DocumentEditDigest]] = None,
+    ) -> typing.Iterator[Token]:
+        """
+        Creates the same heatmap as create_heatmap, but returns an iterator, which normalizes the scores of
+        the tokens one by one. The edits are validated and scored before the iterator is returned, so errors
+        are raised by this call and not while the tokens are iterated. The scoring takes the same time and
+        memory as for create_heatmap, only the normalization is deferred.
+
+        :param document_edits:
+        :param digests: digests of the edits, if they are already digested
+        :return: the tokens of the first edit
+        """
+        interner, compact_edits = create_compact_document_edits(document_edits, digests)
+        tokens = document_edits[0].document.tokens
+
+        scores, max_score = score_tokens(tokens, compact_edits, interner)
+
+        return _normalize_scores(tokens, scores, max_score)
+
 
-def _calculate_token_score(
-    token: Token, document_edits: typing.List[DocumentEdit]
+def _normalize_scores(
+    tokens: typing.List[Token],
+    scores: typing.List[typing.Optional[float]],
+    max_score: float,
+) -> typing.Iterator[Token]:
+    for token, score in zip(tokens, scores):
+        # score should be between 0 and 1 (0 same annotations, 1 max different annotations)
+        token.score = score / max_score if score else score
+        yield token
+
+
+def score_tokens(
+    tokens: typing.List[Token],
+    compact_edits: typing.List[CompactDocumentEdit],
+    interner: AnnotationInterner,
+    progress: typing.Optional[typing.Callable[[float], None]] = None,
+) -> tuple[typing.List[typing.Optional[float]], float]:
+    """
+    Scores the tokens without normalizing the scores. The score of a token only depends on its mentions
+    in the edits, so every combination of mentions is scored once.
+
+    :param tokens: tokens of the first edit
+    :param compact_edits:
+    :param interner:
+    :param progress: called with the fraction of the scored tokens
+    :return: score of every token and the maximum score, 0 if all edits agree or no token is annotated
+    """
+    scores_by_mentions: typing.Dict[tuple, typing.Optional[float]] = {}
+    scores = []
+    for position, token in enumerate(tokens):
+        token_mentions = _get_token_mentions(
+            interner.token_index.get_index(token), compact_edits
+        )
+        if token_mentions not in scores_by_mentions:
+            scores_by_mentions[token_mentions] = calculate_mentions_score(
+                token_mentions, compact_edits, interner
+            )
+        scores.append(scores_by_mentions[token_mentions])
+        if progress:
+            progress((position + 1) / len(tokens))
+
+    return scores, max(filter(None, scores_by_mentions.values()), default=0)
+
+
+def _get_token_mentions(
+    token_id: int, compact_edits: typing.List[CompactDocumentEdit]
+) -> tuple:
+    return tuple(ce.get_mention_of_token(token_id) for ce in compact_edits)
+
+
+def calculate_token_score(
+    token_id: int,
+    compact_edits: typing.List[CompactDocumentEdit],
+    interner: AnnotationInterner,
 ) -> typing.Optional[float]:
     """
     Calculates a score for a token based on annotation consistency across documents.
     A score of 0 means full agreement, while higher scores indicate greater differences.
     """
-    token_mentions = [de.get_mention_of_token(token) for de in document_edits]
+    return calculate_mentions_score(
+        _get_token_mentions(token_id, compact_edits), compact_edits, interner
+    )
+
+
+def calculate_mentions_score(
+    token_mentions: typing.Sequence[typing.Optional[int]],
+    compact_edits: typing.List[CompactDocumentEdit],
+    interner: AnnotationInterner,
+) -> typing.Optional[float]:
+    """
+    Calculates the score of a token from its mention in every edit.
 
+    :param token_mentions: mention id of the token in every edit, None if the edit has no mention of the token
+    :param compact_edits:
+    :param interner:
+    :return:
+    """
     # If no document has a mention for this token, no score can be calculated
     if all(mention is None for mention in token_mentions):
         return None
 
     score = 0.0
-    score += _calculate_difference_mention_score(token_mentions)
-    score += _calculate_difference_entities_score(token_mentions, document_edits)
-    score += _calculate_difference_relations_score(token_mentions, document_edits)
+    score += _calculate_difference_mention_score(token_mentions, interner)
+    score += _calculate_difference_entities_score(token_mentions, compact_edits)
+    score += _calculate_difference_relations_score(token_mentions, compact_edits)
 
     return score
 
 
-def _calculate_difference_mention_score(mentions: typing.List[Mention]) -> float:
+def _calculate_difference_mention_score(
+    mentions: typing.Sequence[typing.Optional[int]], interner: AnnotationInterner
+) -> float:
     """
     Computes a score based on whether tokens are annotated the same way across different documents.
     Mention score is
@@ -60,11 +158,7 @@ def _calculate_difference_mention_score(mentions: typing.List[Mention]) -> float
     - 1 if the mentions are different
     """
     score_list = [
-        (
-            0
-            if (m1 is None and m2 is None) or (m1 and m2 and m1.equals(m2))
-            else m1.get_equals_score(m2) if m1 else 1
-        )
+        (0 if m1 == m2 else interner.get_equals_score(m1, m2) if m1 is not None else 1)
         for i, m1 in enumerate(mentions)
         for j, m2 in enumerate(mentions)
         if i < j
@@ -73,7 +167,8 @@ def _calculate_difference_mention_score(mentions: typing.List[Mention]) -> float
 
 
 def _calculate_difference_relations_score(
-    mentions: typing.List[Mention], document_edits: typing.List[DocumentEdit]
+    mentions: typing.Sequence[typing.Optional[int]],
+    compact_edits: typing.List[CompactDocumentEdit],
 ) -> float:
     """
     Compares relations of mentions between documents and calculates a discrepancy score.
@@ -85,14 +180,17 @@ def _calculate_difference_relations_score(
             if i >= j:
                 continue
 
-            if mention1 and mention2 and mention1.equals(mention2):
-                relations1 = document_edits[i].get_all_relations_of_mention(mention1)
-                relations2 = document_edits[j].get_all_relations_of_mention(mention2)
+            if mention1 is not None and mention1 == mention2:
+                relations1 = compact_edits[i].get_relations_of_mention(mention1)
+                relations2 = compact_edits[j].get_relations_of_mention(mention2)
 
+                # every pair of equal relations is counted
                 common_relations = sum(
-                    1 for r1 in relations1 for r2 in relations2 if r1.equals(r2)
+                    count * relations2[relation]
+                    for relation, count in relations1.items()
+                    if relation in relations2
                 )
-                max_relations = max(len(relations1), len(relations2))
+                max_relations = max(relations1.total(), relations2.total())
 
                 score_list.append(
                     common_relations / max_relations * 2 if max_relations > 0 else 0
@@ -102,7 +200,8 @@ def _calculate_difference_relations_score(
 
 
 def _calculate_difference_entities_score(
-    mentions: typing.List[Mention], document_edits: typing.List[DocumentEdit]
+    mentions: typing.Sequence[typing.Optional[int]],
+    compact_edits: typing.List[CompactDocumentEdit],
 ) -> float:
     """
     Compares entity annotations of mentions and assigns a discrepancy score based on differences.
@@ -114,11 +213,12 @@ def _calculate_difference_entities_score(
             if i >= j:
                 continue
 
-            if mention1 and mention2 and mention1.equals(mention2):
-                entity1 = document_edits[i].get_entity_of_mention(mention1)
-                entity2 = document_edits[j].get_entity_of_mention(mention2)
+            if mention1 is not None and mention1 == mention2:
+                entity1 = compact_edits[i].get_entity_of_mention(mention1)
+                entity2 = compact_edits[j].get_entity_of_mention(mention2)
 
-                if entity1 and entity2 and entity1.equals(entity2):
+                # same as Entity.equals, all mentions of entity1 are part of entity2
+                if entity1 and entity2 and entity1 <= entity2:
                     # entities are the same, no score should be added here
                     continue
 
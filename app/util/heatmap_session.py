@@ -0,0 +1,212 @@
+import threading
+import typing
+import uuid
+from collections import Counter
+
+from app.config import Config
+from app.model.document import DocumentEdit, Mention, Relation, Token
+from app.model.heatmap_session import HeatmapSessionDelta, TokenScore
+from app.util.compact_document import (
+    DETERMINER_POS_TAG,
+    AnnotationInterner,
+    CompactDocumentEdit,
+    CompactRelation,
+    align_document_edits,
+    group_entities,
+    resolve_token_key,
+)
+from app.util.heatmap_creator import calculate_token_score
+from app.util.result_cache import ResultCache
+
+
+class InvalidDeltaError(ValueError):
+    """
+    Raised if a delta does not fit the session, i.e. the edit does not exist or removed annotations are not part of it.
+    """
+
+
+class HeatmapSession:
+    """
+    Heatmap of the edits of one document, which is updated by changes of single edits.
+    Only the scores of the tokens affected by a change and the maximum score used for the
+    normalization are calculated again.
+    """
+
+    def __init__(self, document_edits: typing.List[DocumentEdit]):
+        self.session_id = uuid.uuid4().hex
+        self.lock = threading.Lock()
+        token_index, self._canonical_edits, self._token_keys_lists = (
+            align_document_edits(document_edits)
+        )
+        self._interner = AnnotationInterner(token_index)
+        self._compact_edits = [
+            CompactDocumentEdit(ce, self._interner, token_keys)
+            for ce, token_keys in zip(self._canonical_edits, self._token_keys_lists)
+        ]
+
+        # entity id of every mention of the edits, the entities are grouped by them
+        self._entity_ids = [
+            [m.entity.id if m.entity else None for m in de.mentions or []]
+            for de in document_edits
+        ]
+
+        self.tokens: typing.List[Token] = document_edits[0].document.tokens
+        self._token_ids = [token_index.get_index(t) for t in self.tokens]
+        # positions of the tokens by token id, duplicated tokens share an id
+        self._positions_by_token_id: typing.Dict[int, typing.List[int]] = {}
+        for position, token_id in enumerate(self._token_ids):
+            self._positions_by_token_id.setdefault(token_id, []).append(position)
+
+        # scores before the normalization
+        self._scores = [self._calculate_score(token_id) for token_id in self._token_ids]
+        self._max_score = _get_max_score(self._scores)
+        for position in range(len(self.tokens)):
+            self.tokens[position].score = self._normalize(self._scores[position])
+
+    @property
+    def size(self) -> int:
+        """
+        Rough estimation of the memory used by the session
+        """
+        return sum(ce.size for ce in self._canonical_edits)
+
+    def apply_delta(self, delta: HeatmapSessionDelta) -> typing.List[TokenScore]:
+        """
+        Changes the annotations of one edit and updates the heatmap.
+
+        :param delta:
+        :return: the tokens whose normalized score changed
+        :raises InvalidDeltaError: if the edit does not exist or removed annotations are not part of it
+        """
+        if not 0 <= delta.edit_index < len(self._compact_edits):
+            raise InvalidDeltaError(f"The session has no edit {delta.edit_index}.")
+        compact_edit = self._compact_edits[delta.edit_index]
+
+        # the changes are validated before the edit is changed
+        mentions = list(compact_edit.mentions)
+        entity_ids = list(self._entity_ids[delta.edit_index])
+        # mentions which are added or removed
+        touched_mentions = set()
+        for mention in delta.removed_mentions:
+            mention_id = self._intern_mention(delta.edit_index, mention)
+            if mention_id not in mentions:
+                raise InvalidDeltaError(
+                    f"Mention with tag '{mention.tag}' is not part of the edit."
+                )
+            position = mentions.index(mention_id)
+            del mentions[position]
+            del entity_ids[position]
+            touched_mentions.add(mention_id)
+        for mention in delta.added_mentions:
+            mentions.append(self._intern_mention(delta.edit_index, mention))
+            entity_ids.append(mention.entity.id if mention.entity else None)
+            touched_mentions.add(mentions[-1])
+        removed_relations = [
+            self._intern_relation(delta.edit_index, r) for r in delta.removed_relations
+        ]
+        added_relations = [
+            self._intern_relation(delta.edit_index, r) for r in delta.added_relations
+        ]
+        remaining_relations = Counter(compact_edit.relations)
+        remaining_relations.subtract(removed_relations)
+        if any(count < 0 for count in remaining_relations.values()):
+            raise InvalidDeltaError("Relation is not part of the edit.")
+
+        affected_token_ids = compact_edit.replace_mentions(
+            mentions,
+            self._interner,
+            set().union(*(self._interner.mention_tokens[m] for m in touched_mentions)),
+        )
+        for relation in removed_relations:
+            compact_edit.remove_relation(relation)
+        for relation in added_relations:
+            compact_edit.add_relation(relation)
+        self._entity_ids[delta.edit_index] = entity_ids
+        # mentions with changed relations or entity
+        changed_mentions = {
+            mention_id
+            for _, head, tail in removed_relations + added_relations
+            for mention_id in (head, tail)
+        } | compact_edit.replace_entities(group_entities(mentions, entity_ids))
+        for mention_id in changed_mentions:
+            affected_token_ids.update(self._interner.mention_tokens[mention_id])
+
+        changed_positions = set()
+        for token_id in affected_token_ids:
+            for position in self._positions_by_token_id.get(token_id, []):
+                self._scores[position] = self._calculate_score(token_id)
+                changed_positions.add(position)
+
+        max_score = _get_max_score(self._scores)
+        if max_score != self._max_score:
+            # all normalized scores depend on the maximum
+            self._max_score = max_score
+            changed_positions = range(len(self.tokens))
+
+        changed_tokens = []
+        for position in sorted(changed_positions):
+            token = self.tokens[position]
+            score = self._normalize(self._scores[position])
+            if score != token.score:
+                token.score = score
+                changed_tokens.append(
+                    TokenScore(index=position, id=token.id, score=score)
+                )
+        return changed_tokens
+
+    def _intern_mention(self, edit_index: int, mention: Mention) -> int:
+        token_index = self._canonical_edits[edit_index].token_index
+        token_keys = [
+            resolve_token_key(
+                token_index.get_key(token),
+                self._interner.token_index,
+                self._token_keys_lists[edit_index],
+            )
+            for token in mention.tokens
+        ]
+        return self._interner.intern_mention(
+            mention.tag,
+            token_keys,
+            [
+                key
+                for key, token in zip(token_keys, mention.tokens)
+                if token.pos_tag != DETERMINER_POS_TAG
+            ],
+        )
+
+    def _intern_relation(self, edit_index: int, relation: Relation) -> CompactRelation:
+        return (
+            self._interner.intern_tag(relation.tag),
+            self._intern_mention(edit_index, relation.mention_head),
+            self._intern_mention(edit_index, relation.mention_tail),
+        )
+
+    def _calculate_score(self, token_id: int) -> typing.Optional[float]:
+        return calculate_token_score(token_id, self._compact_edits, self._interner)
+
+    def _normalize(self, score: typing.Optional[float]) -> typing.Optional[float]:
+        # score should be between 0 and 1 (0 same annotations, 1 max different annotations)
+        return score / self._max_score if score else score
+
+
+def _get_max_score(scores: typing.List[typing.Optional[float]]) -> float:
+    return max(filter(None, scores), default=0)
+
+
+_heatmap_sessions: ResultCache | None = None
+_heatmap_sessions_lock = threading.Lock()
+
+
+def get_heatmap_sessions() -> ResultCache:
+    """
+    Returns the store of the heatmap sessions by session id, it is created on first use.
+    """
+    global _heatmap_sessions
+    with _heatmap_sessions_lock:
+        if _heatmap_sessions is None:
+            _heatmap_sessions = ResultCache(
+                max_entries=Config.HEATMAP_SESSION_MAX_COUNT,
+                max_bytes=Config.HEATMAP_SESSION_MAX_BYTES,
+                ttl_seconds=Config.HEATMAP_SESSION_TTL_SECONDS,
+            )
+    return _heatmap_sessions
@@ -0,0 +1,87 @@
+import typing
+
+T = typing.TypeVar("T")
+
+
+class _Node(typing.Generic[T]):
+    """
+    Node of a centered interval tree, it holds the intervals containing its center.
+    """
+
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(
+        self,
+        center: int,
+        intervals: typing.List[tuple[int, int, T]],
+        left: typing.Optional["_Node[T]"],
+        right: typing.Optional["_Node[T]"],
+    ):
+        self.center = center
+        self.by_start = sorted(intervals, key=lambda interval: interval[0])
+        self.by_end = sorted(intervals, key=lambda interval: interval[1], reverse=True)
+        self.left = left
+        self.right = right
+
+
+class IntervalIndex(typing.Generic[T]):
+    """
+    Static index of closed intervals, e.g. the spans of mentions over the document_index of their tokens.
+    The intervals overlapping a query interval are found in O(log n + k) for k overlapping intervals.
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, intervals: typing.Iterable[tuple[int, int, T]]):
+        """
+        :param intervals: (start, end, item) with start <= end
+        """
+        intervals = list(intervals)
+        self._size = len(intervals)
+        self._root = _build(intervals)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def find_overlapping(self, start: int, end: int) -> typing.List[T]:
+        """
+        :return: items of the intervals which share at least one position with [start, end]
+        """
+        items = []
+        nodes = [self._root]
+        while nodes:
+            node = nodes.pop()
+            if node is None:
+                continue
+            if end < node.center:
+                # all intervals of the node end at or after the center, so they overlap if they start early enough
+                for interval_start, _, item in node.by_start:
+                    if interval_start > end:
+                        break
+                    items.append(item)
+                nodes.append(node.left)
+            elif start > node.center:
+                for _, interval_end, item in node.by_end:
+                    if interval_end < start:
+                        break
+                    items.append(item)
+                nodes.append(node.right)
+            else:
+                items.extend(item for _, _, item in node.by_start)
+                nodes.append(node.left)
+                nodes.append(node.right)
+        return items
+
+
+def _build(intervals: typing.List[tuple[int, int, T]]) -> typing.Optional[_Node[T]]:
+    if not intervals:
+        return None
+    # the median of the endpoints splits the intervals into halves, so the depth is logarithmic
+    endpoints = sorted(position for interval in intervals for position in interval[:2])
+    center = endpoints[len(endpoints) // 2]
+    left = [interval for interval in intervals if interval[1] < center]
+    right = [interval for interval in intervals if interval[0] > center]
+    containing = [
+        interval for interval in intervals if interval[0] <= center <= interval[1]
+    ]
+    return _Node(center, containing, _build(left), _build(right))
@@ -1,32 +1,75 @@
 import typing
+from collections import Counter
 from itertools import combinations
 
-from app.model.document import DocumentEdit, Relation, SupportsIsEqual, Entity
+from app.config import Config
+from app.model.document import DocumentEdit
 from app.model.similarity_score import JaccardIndexResponse, JaccardScore
-from app.util.utils import validate_document_edit_lists, get_entities_with_mentions
+from app.util.compact_document import (
+    CompactDocumentEdit,
+    CompactRelation,
+    create_compact_document_edits,
+)
+from app.util.process_pool import get_process_pool
+from app.util.result_cache import DocumentEditDigest
 
 
 class JaccardIndexCalculator:
 
     def calculate(
-        self, document_edits: typing.List[DocumentEdit]
+        self,
+        document_edits: typing.List[DocumentEdit],
+        with_matrix: bool = False,
+        progress: typing.Optional[typing.Callable[[float], None]] = None,
+        digests: typing.Optional[typing.List[DocumentEditDigest]] = None,
     ) -> JaccardIndexResponse:
-        validate_document_edit_lists(document_edits)
+        """
+        :param document_edits:
+        :param with_matrix: if the jaccard index of every pair of edits should be returned as matrix
+        :param progress: called with the fraction of the finished steps of the calculation
+        :param digests: digests of the edits, if they are already digested
+        :return:
+        """
+        _, compact_edits = create_compact_document_edits(document_edits, digests)
+        edit_features = extract_edit_features(compact_edits)
+        if progress:
+            progress(0.25)
+        pairs = list(combinations(range(len(document_edits)), 2))
+        if with_matrix:
+            pairs += [(i, i) for i in range(len(document_edits))]
+        pair_scores = calculate_pairwise_jaccard_indices(edit_features, pairs)
+        if progress:
+            progress(0.75)
 
         return JaccardIndexResponse(
-            combined=calculate_combined_jaccard_index(document_edits),
-            average=calculate_average_jaccard_index(document_edits),
+            combined=calculate_combined_jaccard_index(compact_edits),
+            average=calculate_average_jaccard_index(
+                [
+                    pair_scores[pair]
+                    for pair in combinations(range(len(document_edits)), 2)
+                ]
+            ),
+            matrix=(
+                [
+                    [
+                        pair_scores[(min(i, j), max(i, j))]
+                        for j in range(len(document_edits))
+                    ]
+                    for i in range(len(document_edits))
+                ]
+                if with_matrix
+                else None
+            ),
         )
 
 
 def calculate_combined_jaccard_index(
-    document_edits: typing.List[DocumentEdit],
-) -> JaccardIndexResponse:
+    compact_edits: typing.List[CompactDocumentEdit],
+) -> JaccardScore:
     # Mentions
-    mention_union = get_union(list(map(lambda d: d.mentions, document_edits)))
-    mention_intersection = get_intersection(
-        list(map(lambda d: d.mentions, document_edits))
-    )
+    mention_union = get_union([ce.mentions for ce in compact_edits])
+    mention_intersection = get_intersection([ce.mentions for ce in compact_edits])
+    mention_union_ids = set(mention_union)
     mention_index = (
         (len(mention_union) / len(mention_intersection))
         if len(mention_intersection) > 0
@@ -34,16 +77,10 @@ def calculate_combined_jaccard_index(
     )
 
     # Relations
-    relations_lists = list(map(lambda d: d.relations, document_edits))
+    relations_lists = [ce.relations for ce in compact_edits]
     relation_index = calculate_jaccard_index_for_relations(relations_lists)
     considered_relations_lists = [
-        list(
-            filter(
-                lambda r: (any(m.equals(r.mention_head) for m in mention_union))
-                and (any(m.equals(r.mention_head) for m in mention_union)),
-                relations,
-            )
-        )
+        [relation for relation in relations if relation[1] in mention_union_ids]
         for relations in relations_lists
     ]
     considered_relation_index = calculate_jaccard_index_for_relations(
@@ -51,20 +88,10 @@ def calculate_combined_jaccard_index(
     )
 
     # Entities (with mentions as attributes)
-    entities_lists: typing.List[typing.List[Entity]] = [
-        get_entities_with_mentions(de.mentions) for de in document_edits
-    ]
+    entities_lists = [ce.entities for ce in compact_edits]
     entity_index = calculate_jaccard_index_for_entities(entities_lists)
     considered_entities_lists = [
-        list(
-            filter(
-                lambda entity: all(
-                    any(mention_of_entity.equals(mention) for mention in mention_union)
-                    for mention_of_entity in entity.mentions
-                ),
-                entities,
-            )
-        )
+        [entity for entity in entities if entity <= mention_union_ids]
         for entities in entities_lists
     ]
     considered_entity_index = calculate_jaccard_index_for_entities(
@@ -83,16 +110,8 @@ def calculate_combined_jaccard_index(
 
 
 def calculate_average_jaccard_index(
-    document_edits: typing.List[DocumentEdit],
-) -> JaccardIndexResponse:
-    jaccard_scores: typing.List[JaccardScore] = []
-
-    # all possible pairs with size 2 of given document_edits
-    for document_edit_pair in combinations(document_edits, 2):
-        jaccard_scores.append(
-            calculate_combined_jaccard_index(list(document_edit_pair))
-        )
-
+    jaccard_scores: typing.List[JaccardScore],
+) -> JaccardScore:
     total_combinations = len(jaccard_scores)
 
     mention_index = (
@@ -125,6 +144,189 @@ def calculate_average_jaccard_index(
     )
 
 
+class EditFeatures:
+    """
+    Annotations of a document edit as bitsets over the keys of all compared edits.
+    They are extracted once per edit, so comparing a pair of edits only combines the precomputed sets.
+    """
+
+    def __init__(self):
+        self.mentions = 0
+        # additional occurrences of duplicated mentions by bit
+        self.mention_duplicates: typing.Dict[int, int] = {}
+        self.relations = 0
+        self.relation_duplicates: typing.Dict[int, int] = {}
+        # (relation bit, head mention bit) of every relation
+        self.relation_items: typing.List[tuple[int, int]] = []
+        # (bitset of the mentions, key) of every entity
+        self.entity_items: typing.List[tuple[int, frozenset]] = []
+
+
+def extract_edit_features(
+    compact_edits: typing.List[CompactDocumentEdit],
+) -> typing.List[EditFeatures]:
+    # mentions are already interned, so their ids are used as bits
+    relation_bits: typing.Dict[CompactRelation, int] = {}
+    edit_features = []
+
+    for compact_edit in compact_edits:
+        features = EditFeatures()
+
+        features.mentions, features.mention_duplicates = _to_bitset(
+            compact_edit.mentions
+        )
+
+        features.relation_items = [
+            (relation_bits.setdefault(r, len(relation_bits)), r[1])
+            for r in compact_edit.relations
+        ]
+        features.relations, features.relation_duplicates = _to_bitset(
+            [relation_bit for relation_bit, _ in features.relation_items]
+        )
+
+        for entity in compact_edit.entities:
+            entity_mentions = 0
+            for mention_id in entity:
+                entity_mentions |= 1 << mention_id
+            features.entity_items.append((entity_mentions, entity))
+
+        edit_features.append(features)
+    return edit_features
+
+
+def _to_bitset(bits: typing.Sequence[int]) -> tuple[int, typing.Dict[int, int]]:
+    bitset = 0
+    for bit in bits:
+        bitset |= 1 << bit
+    duplicates = {bit: count - 1 for bit, count in Counter(bits).items() if count > 1}
+    return bitset, duplicates
+
+
+def calculate_pairwise_jaccard_indices(
+    edit_features: typing.List[EditFeatures], pairs: typing.List[tuple[int, int]]
+) -> typing.Dict[tuple[int, int], JaccardScore]:
+    """
+    Calculates the jaccard index of the given pairs of edits. For many edits the pairs are split
+    over the process pool.
+    """
+    if (
+        len(edit_features) < Config.JACCARD_PARALLEL_MIN_EDITS
+        or Config.PROCESS_POOL_WORKERS < 2
+    ):
+        return dict(zip(pairs, _calculate_jaccard_indices(edit_features, pairs)))
+
+    chunk_count = Config.PROCESS_POOL_WORKERS
+    chunks = [pairs[i::chunk_count] for i in range(chunk_count)]
+    results = get_process_pool().map(
+        _calculate_jaccard_indices, [edit_features] * chunk_count, chunks
+    )
+    pair_scores = {}
+    for chunk, scores in zip(chunks, results):
+        pair_scores.update(zip(chunk, scores))
+    return pair_scores
+
+
+def _calculate_jaccard_indices(
+    edit_features: typing.List[EditFeatures], pairs: typing.List[tuple[int, int]]
+) -> typing.List[JaccardScore]:
+    return [
+        calculate_pairwise_jaccard_index(edit_features[i], edit_features[j])
+        for i, j in pairs
+    ]
+
+
+def calculate_pairwise_jaccard_index(
+    features1: EditFeatures, features2: EditFeatures
+) -> JaccardScore:
+    """
+    Same as calculate_combined_jaccard_index for two edits, but on the extracted features
+    """
+    common_mentions = features1.mentions & features2.mentions
+    mention_index = _calculate_bitset_index(
+        features1.mentions, features1.mention_duplicates, features2.mentions
+    )
+
+    relation_index = _calculate_bitset_index(
+        features1.relations, features1.relation_duplicates, features2.relations
+    )
+    considered_relations1 = [
+        relation_bit
+        for relation_bit, head_bit in features1.relation_items
+        if common_mentions >> head_bit & 1
+    ]
+    considered_relations2 = [
+        relation_bit
+        for relation_bit, head_bit in features2.relation_items
+        if common_mentions >> head_bit & 1
+    ]
+    considered_relations1_bitset, considered_relations1_duplicates = _to_bitset(
+        considered_relations1
+    )
+    considered_relations2_bitset, _ = _to_bitset(considered_relations2)
+    considered_relation_index = _calculate_bitset_index(
+        considered_relations1_bitset,
+        considered_relations1_duplicates,
+        considered_relations2_bitset,
+    )
+
+    entity_index = _calculate_entity_keys_index(
+        [key for _, key in features1.entity_items],
+        [key for _, key in features2.entity_items],
+    )
+    considered_entity_index = _calculate_entity_keys_index(
+        [
+            key
+            for mentions, key in features1.entity_items
+            if mentions & ~common_mentions == 0
+        ],
+        [
+            key
+            for mentions, key in features2.entity_items
+            if mentions & ~common_mentions == 0
+        ],
+    )
+    return JaccardScore(
+        mention_index=mention_index,
+        relation_index=relation_index,
+        considered_relation_index=considered_relation_index,
+        entity_index=entity_index,
+        considered_entities_index=considered_entity_index,
+        combined_index=calculate_combined_index(
+            mention_index, considered_relation_index, considered_entity_index
+        ),
+    )
+
+
+def _calculate_bitset_index(
+    bitset1: int, duplicates1: typing.Dict[int, int], bitset2: int
+) -> float:
+    # like get_union, duplicated items of the first edit are counted for each occurrence
+    common = bitset1 & bitset2
+    common_count = common.bit_count() + sum(
+        count for bit, count in duplicates1.items() if common >> bit & 1
+    )
+    union_count = (bitset1 | bitset2).bit_count()
+    if union_count == 0:
+        return 0
+    return common_count / union_count
+
+
+def _calculate_entity_keys_index(
+    entity_keys1: typing.List[frozenset], entity_keys2: typing.List[frozenset]
+) -> float:
+    entity_key_set2 = EntityKeySet(entity_keys2)
+    common_count = sum(1 for key in entity_keys1 if key in entity_key_set2)
+    union_key_set = EntityKeySet()
+    union_count = 0
+    for key in entity_keys1 + entity_keys2:
+        if key not in union_key_set:
+            union_key_set.add(key)
+            union_count += 1
+    if union_count == 0:
+        return 0
+    return common_count / union_count
+
+
 def calculate_combined_index(
     mention_index: float, relation_index: float, entity_index: float
 ) -> float:
@@ -134,7 +336,7 @@ def calculate_combined_index(
 
 
 def calculate_jaccard_index_for_relations(
-    relations: typing.List[typing.List[Relation]],
+    relations: typing.List[typing.List[CompactRelation]],
 ) -> float:
     union = get_union(relations)
     intersection = get_intersection(relations)
@@ -144,46 +346,83 @@ def calculate_jaccard_index_for_relations(
 
 
 def calculate_jaccard_index_for_entities(
-    entities: typing.List[typing.List[Entity]],
+    entities: typing.List[typing.List[frozenset[int]]],
 ) -> float:
-    union = get_union(entities)
-    intersection = get_intersection(entities)
+    union = get_union(entities, EntityKeySet)
+    intersection = get_intersection(entities, EntityKeySet)
     if len(intersection) == 0:
         return 0
     return len(union) / len(intersection)
 
 
+class EntityKeySet:
+    """
+    Set of entity keys where a key is contained if it is a subset of any added key.
+    This mirrors Entity.equals, which only checks that all mentions of the entity are
+    part of the other entity. Added keys are indexed by their mentions, so a lookup only
+    has to check the entities which share a mention with the searched one.
+    """
+
+    def __init__(self, keys: typing.Iterable[typing.Optional[frozenset]] = ()):
+        self._keys_by_mention_key: typing.Dict[typing.Hashable, list[frozenset]] = {}
+        self._contains_none = False
+        self._contains_any = False
+        for key in keys:
+            self.add(key)
+
+    def add(self, key: typing.Optional[frozenset]) -> None:
+        if key is None:
+            self._contains_none = True
+            return
+        self._contains_any = True
+        for mention_key in key:
+            self._keys_by_mention_key.setdefault(mention_key, []).append(key)
+
+    def __contains__(self, key: typing.Optional[frozenset]) -> bool:
+        if key is None:
+            return self._contains_none
+        if not key:
+            return self._contains_any
+        candidates = self._keys_by_mention_key.get(next(iter(key)), [])
+        return any(key <= candidate for candidate in candidates)
+
+
 def get_union(
-    items_lists: typing.List[typing.List[SupportsIsEqual]],
-) -> typing.List[SupportsIsEqual]:
+    items_lists: typing.List[typing.Sequence[typing.Hashable]],
+    key_set_type: typing.Callable[..., typing.Any] = set,
+) -> typing.List[typing.Hashable]:
     """
 
-    :param items_lists:
+    :param items_lists: interned items, equal items have to be equal by ==
+    :param key_set_type: set-like type used for the membership checks of the items
     :return: union of all items from all given items lists
     """
-    union: typing.List[SupportsIsEqual] = []
     base_items = items_lists[0]
-    remaining_items_lists = items_lists[1:]
-    for base_item in base_items:
-        if all(
-            any(base_item.equals(remaining_item) for remaining_item in remaining_items)
-            for remaining_items in remaining_items_lists
-        ):
-            union.append(base_item)
-    return union
+    remaining_items_sets = [
+        key_set_type(remaining_items) for remaining_items in items_lists[1:]
+    ]
+    return [
+        base_item
+        for base_item in base_items
+        if all(base_item in remaining_items for remaining_items in remaining_items_sets)
+    ]
 
 
 def get_intersection(
-    items_lists: typing.List[typing.List[SupportsIsEqual]],
-) -> typing.List[SupportsIsEqual]:
+    items_lists: typing.List[typing.Sequence[typing.Hashable]],
+    key_set_type: typing.Callable[..., typing.Any] = set,
+) -> typing.List[typing.Hashable]:
     """
 
-    :param items_lists:
+    :param items_lists: interned items, equal items have to be equal by ==
+    :param key_set_type: set-like type used for the membership checks of the items
     :return: intersection of all items from all given items lists
     """
-    intersection: typing.List[SupportsIsEqual] = []
+    intersection: typing.List[typing.Hashable] = []
+    intersection_items = key_set_type()
     for items in items_lists:
         for item in items:
-            if not any(item.equals(i) for i in intersection):
+            if item not in intersection_items:
+                intersection_items.add(item)
                 intersection.append(item)
     return intersection
@@ -0,0 +1,218 @@
+import multiprocessing
+import threading
+import time
+import typing
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from app.config import Config
+from app.exception import get_status_code
+from app.model.job import JobError, JobResponse, JobStatus
+from app.util.process_pool import get_process_context
+
+ProgressCallback = typing.Callable[[float], None]
+
+# set in the worker processes of the job pool
+_progress_queue: typing.Optional[multiprocessing.Queue] = None
+
+
+class JobQueueFullError(Exception):
+    """
+    Raised if a job is submitted while the maximum number of jobs is queued or running.
+    """
+
+
+class Job:
+    __slots__ = (
+        "id",
+        "kind",
+        "status",
+        "progress",
+        "result",
+        "error",
+        "future",
+        "finished_at",
+    )
+
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status: JobStatus = "queued"
+        self.progress = 0.0
+        self.result: typing.Any = None
+        self.error: typing.Optional[JobError] = None
+        self.future: typing.Optional[Future] = None
+        self.finished_at: typing.Optional[float] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def to_response(self) -> JobResponse:
+        return JobResponse(
+            id=self.id,
+            kind=self.kind,
+            status=self.status,
+            progress=self.progress,
+            error=self.error,
+        )
+
+
+class JobManager:
+    """
+    Runs calculations as jobs in a separate process pool, so long calculations do not block
+    the request handling. The number of queued and running jobs is bounded, finished jobs are
+    kept for result_ttl_seconds.
+    """
+
+    def __init__(self, workers: int, max_pending_jobs: int, result_ttl_seconds: float):
+        self.max_pending_jobs = max_pending_jobs
+        self.result_ttl_seconds = result_ttl_seconds
+        self._jobs: typing.Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        context = get_process_context()
+        self._progress_queue = context.Queue()
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_job_worker,
+            initargs=(self._progress_queue,),
+        )
+        threading.Thread(target=self._receive_progress, daemon=True).start()
+
+    def submit(
+        self, kind: str, task: typing.Callable[..., typing.Any], *args: typing.Any
+    ) -> Job:
+        """
+        :param kind: name of the calculation
+        :param task: picklable function, which gets the arguments and a progress callback as keyword progress
+        :param args: picklable arguments of the task
+        :return:
+        :raises JobQueueFullError: if max_pending_jobs jobs are queued or running
+        """
+        with self._lock:
+            self._remove_expired_jobs()
+            # cancelled jobs which are still running keep their worker, so they are counted until they end
+            pending_jobs = sum(
+                1 for job in self._jobs.values() if not job.future.done()
+            )
+            if pending_jobs >= self.max_pending_jobs:
+                raise JobQueueFullError(
+                    f"{pending_jobs} jobs are queued or running, try again later."
+                )
+            job = Job(kind)
+            self._jobs[job.id] = job
+            job.future = self._pool.submit(_run_job, job.id, task, *args)
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job
+
+    def get(self, job_id: str) -> typing.Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> typing.Optional[Job]:
+        """
+        Cancels the job. A queued job is not started anymore, a running job can not be interrupted,
+        it keeps its worker and its place in the queue until it is finished, but its result is discarded.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.is_finished:
+                return job
+            job.status = "cancelled"
+            job.finished_at = time.monotonic()
+        # the done callback of a cancelled future is called immediately and takes the lock
+        job.future.cancel()
+        return job
+
+    def _finish(self, job: Job, future: Future) -> None:
+        with self._lock:
+            if job.status == "cancelled":
+                return
+            try:
+                result, error = future.result()
+            except Exception as exception:
+                # e.g. the worker process was killed
+                result, error = None, JobError(
+                    type=type(exception).__name__,
+                    message=str(exception),
+                    status_code=500,
+                )
+            job.result = result
+            job.error = error
+            job.status = "failed" if error else "done"
+            job.progress = 1.0
+            job.finished_at = time.monotonic()
+
+    def _receive_progress(self) -> None:
+        while True:
+            job_id, progress = self._progress_queue.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None and not job.is_finished:
+                    job.status = "running"
+                    job.progress = progress
+
+    def _remove_expired_jobs(self) -> None:
+        expired_before = time.monotonic() - self.result_ttl_seconds
+        for job_id in [
+            job.id
+            for job in self._jobs.values()
+            if job.finished_at is not None and job.finished_at < expired_before
+            # a cancelled job, which is still running, is counted as pending until it ends
+            and job.future.done()
+        ]:
+            del self._jobs[job_id]
+
+
+def _init_job_worker(progress_queue: multiprocessing.Queue) -> None:
+    global _progress_queue
+    _progress_queue = progress_queue
+    # jobs run in parallel to each other, their calculations must not use the shared process pool
+    Config.PROCESS_POOL_WORKERS = 1
+
+
+def _run_job(
+    job_id: str, task: typing.Callable[..., typing.Any], *args: typing.Any
+) -> tuple[typing.Any, typing.Optional[JobError]]:
+    """
+    Runs the task in a worker process. Errors are returned instead of raised,
+    because not all exceptions can be pickled.
+    """
+    reported_progress = 0.0
+
+    def report_progress(progress: float) -> None:
+        nonlocal reported_progress
+        # updates are sent in steps of at least 1%
+        if progress - reported_progress >= 0.01 or progress == 0:
+            reported_progress = progress
+            _progress_queue.put((job_id, progress))
+
+    report_progress(0)
+    try:
+        return task(*args, progress=report_progress), None
+    except Exception as error:
+        return None, JobError(
+            type=type(error).__name__,
+            message=str(error),
+            status_code=get_status_code(error),
+        )
+
+
+_job_manager: JobManager | None = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """
+    Returns the job manager, it is created on first use.
+    """
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager(
+                workers=Config.JOB_WORKERS,
+                max_pending_jobs=Config.JOB_QUEUE_SIZE,
+                result_ttl_seconds=Config.JOB_RESULT_TTL_SECONDS,
+            )
+    return _job_manager
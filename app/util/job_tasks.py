@@ -0,0 +1,62 @@
+"""
+Calculations which can be submitted as jobs. They are executed in the worker processes of the
+job pool, so they get the raw request data, decode it there and return the serialized response.
+"""
+
+import pydantic_core
+
+from app.util.batch_evaluator import BatchEvaluator
+from app.util.f1_score_calculator import ScoreCalculator
+from app.util.heatmap_creator import HeatmapCreator
+from app.util.jaccard_index_calculator import JaccardIndexCalculator
+from app.util.job_manager import ProgressCallback
+from app.util.request_decoder import (
+    decode_batch_request,
+    decode_document_edits,
+    decode_f1_score_request,
+)
+from app.util.utils import get_entities_with_mentions
+
+
+def run_heatmap(data: bytes, media_type: str, progress: ProgressCallback) -> bytes:
+    document_edits = decode_document_edits(data, media_type)
+    for document_edit in document_edits:
+        document_edit.entities = get_entities_with_mentions(document_edit.mentions)
+
+    tokens = HeatmapCreator().create_heatmap(document_edits, progress=progress)
+    return pydantic_core.to_json(tokens)
+
+
+def run_jaccard_index(
+    data: bytes, media_type: str, with_matrix: bool, progress: ProgressCallback
+) -> bytes:
+    document_edits = decode_document_edits(data, media_type)
+    for document_edit in document_edits:
+        document_edit.entities = get_entities_with_mentions(document_edit.mentions)
+
+    result = JaccardIndexCalculator().calculate(
+        document_edits, with_matrix=with_matrix, progress=progress
+    )
+    return pydantic_core.to_json(result, exclude_none=True)
+
+
+def run_f1_score(
+    data: bytes, media_type: str, matching: str, progress: ProgressCallback
+) -> bytes:
+    f1_score_request_data = decode_f1_score_request(data, media_type)
+    actual = f1_score_request_data.actual
+    predicted = f1_score_request_data.predicted
+    actual.entities = get_entities_with_mentions(actual.mentions)
+    predicted.entities = get_entities_with_mentions(predicted.mentions)
+
+    score = ScoreCalculator().calc_score(
+        actual_document=actual, predicted_document=predicted, matching=matching
+    )
+    return pydantic_core.to_json(score)
+
+
+def run_batch(data: bytes, media_type: str, progress: ProgressCallback) -> bytes:
+    batch = decode_batch_request(data, media_type)
+
+    result = BatchEvaluator().evaluate(batch.documents, progress=progress)
+    return pydantic_core.to_json(result)
@@ -1,56 +1,164 @@
+import atexit
 import logging
+import multiprocessing
 import os
+import queue
+import random
+import sys
+import threading
 from datetime import datetime
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 
 from app.config import Config
 
 
+class _LazyQueueHandler(QueueHandler):
+    """
+    Puts the records into the queue without formatting them, so messages and tracebacks are
+    formatted by the listener thread. Arguments must not be changed after they were logged.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
 class Logger:
+    """
+    Logs through a background thread. The handlers are created and the thread is started by start, which the
+    setup of the app and of the command line tools calls. Other processes, e.g. the workers of the process pools,
+    start it with the settings of Config on their first record, so importing the logger creates no files.
+    """
+
     _instance = None
 
-    def __new__(cls, log_dir="logs"):
+    def __new__(cls, log_dir=None):
         if cls._instance is None:
             cls._instance = super(Logger, cls).__new__(cls)
-            cls._instance._init_logger(log_dir, Config.DEBUG)
+            cls._instance._init_logger(
+                Config.LOG_DIR if log_dir is None else log_dir, Config.DEBUG
+            )
         return cls._instance
 
     def _init_logger(self, log_dir, debug):
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-
-        log_filename = os.path.join(log_dir, datetime.now().strftime("%Y-%m-%d.log"))
         self.logger = logging.getLogger("CustomLogger")
         self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
 
-        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-
-        if debug:
-            console_handler = logging.StreamHandler()
-            console_handler.setFormatter(formatter)
-            self.logger.addHandler(console_handler)
-
+        self._log_dir = log_dir
+        self._debug = debug
+        self._formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+        self._listener: QueueListener | None = None
+        self._start_lock = threading.Lock()
+
+        # records are written by a background thread, the request thread only puts them into the queue
+        self._queue_handler = _LazyQueueHandler(queue.SimpleQueue())
+        self.logger.addHandler(self._queue_handler)
+        # threads are not copied into forked processes, e.g. the workers of the server
+        os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def start(self, log_dir: str | None = None) -> None:
+        """
+        Creates the handlers and starts the thread writing the records, if it is not started yet.
+
+        :param log_dir: directory of the log files instead of LOG_DIR, the records are only written to stderr if
+            it is empty
+        """
+        with self._start_lock:
+            if self._listener is not None:
+                return
+            if log_dir is not None:
+                self._log_dir = log_dir
+            handlers = []
+
+            if self._debug or not self._log_dir:
+                # stdout is left to the output of the command line tools, e.g. the json of the f1 evaluation
+                console_handler = logging.StreamHandler(sys.stderr)
+                console_handler.setFormatter(self._formatter)
+                handlers.append(console_handler)
+
+            if self._log_dir:
+                # worker processes of the pools are started with this module imported again
+                handlers.append(
+                    self._create_file_handler(
+                        with_pid=multiprocessing.parent_process() is not None
+                    )
+                )
+
+            self._start_listener(handlers)
+
+    def _create_file_handler(self, with_pid: bool) -> TimedRotatingFileHandler:
+        """
+        :param with_pid: if the file name contains the pid, so processes do not write and rotate the same file
+        """
+        os.makedirs(self._log_dir, exist_ok=True)
+        name = datetime.now().strftime("%Y-%m-%d")
+        if with_pid:
+            name += f"-{os.getpid()}"
         file_handler = TimedRotatingFileHandler(
-            log_filename, when="midnight", interval=1, backupCount=7
+            os.path.join(self._log_dir, name + ".log"),
+            when="midnight",
+            interval=1,
+            backupCount=7,
         )
-        file_handler.setFormatter(formatter)
+        file_handler.setFormatter(self._formatter)
         file_handler.suffix = "%Y-%m-%d"
-        self.logger.addHandler(file_handler)
-
-    def debug(self, message):
-        self.logger.debug(message)
-
-    def info(self, message):
-        self.logger.info(message)
-
-    def warning(self, message):
-        self.logger.warning(message)
-
-    def error(self, message):
-        self.logger.error(message)
-
-    def critical(self, message):
-        self.logger.critical(message)
+        return file_handler
+
+    def _restart_in_child(self) -> None:
+        self._start_lock = threading.Lock()
+        if self._listener is None:
+            return
+        # the file of the parent is left to the parent, the child writes its own file
+        handlers = [
+            (
+                self._create_file_handler(with_pid=True)
+                if isinstance(handler, TimedRotatingFileHandler)
+                else handler
+            )
+            for handler in self._listener.handlers
+        ]
+        self._start_listener(handlers)
+
+    def _start_listener(self, handlers) -> None:
+        log_queue = queue.SimpleQueue()
+        self._queue_handler.queue = log_queue
+        self._listener = QueueListener(log_queue, *handlers)
+        self._listener.start()
+        # remaining records are written when the process exits
+        atexit.register(self._listener.stop)
+
+    def debug(self, message, *args, **kwargs):
+        self._ensure_started()
+        self.logger.debug(message, *args, **kwargs)
+
+    def info(self, message, *args, **kwargs):
+        self._ensure_started()
+        self.logger.info(message, *args, **kwargs)
+
+    def warning(self, message, *args, **kwargs):
+        self._ensure_started()
+        self.logger.warning(message, *args, **kwargs)
+
+    def error(self, message, *args, **kwargs):
+        self._ensure_started()
+        self.logger.error(message, *args, **kwargs)
+
+    def critical(self, message, *args, **kwargs):
+        self._ensure_started()
+        self.logger.critical(message, *args, **kwargs)
+
+    def _ensure_started(self) -> None:
+        if self._listener is None:
+            self.start()
+
+    def should_dump_payload(self) -> bool:
+        """
+        Large payloads are only summarized. They are logged completely in debug mode
+        and for the sampled share LOG_PAYLOAD_SAMPLE_RATE of the requests.
+        """
+        return (
+            self.logger.isEnabledFor(logging.DEBUG)
+            or random.random() < Config.LOG_PAYLOAD_SAMPLE_RATE
+        )
 
 
 # Create a global logger instance
@@ -0,0 +1,413 @@
+import contextlib
+import fcntl
+import glob
+import json
+import os
+import threading
+import uuid
+import time
+import typing
+from bisect import bisect_left
+
+from flask import Response, g, has_request_context, request
+
+from app.config import Config
+from app.model.document import DocumentEdit
+
+# upper bounds of the latency buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# upper bounds of the buckets of the number of tokens, mentions, relations and edits of a request
+ITEM_COUNT_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+
+class Histogram:
+    __slots__ = ("buckets", "bucket_counts", "sum", "count")
+
+    def __init__(self, buckets: typing.Sequence[float]):
+        self.buckets = buckets
+        # the last count is the +Inf bucket
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def add(
+        self, bucket_counts: typing.List[int], value_sum: float, count: int
+    ) -> None:
+        """
+        Adds the observations of another histogram with the same buckets.
+        """
+        for position, bucket_count in enumerate(bucket_counts):
+            self.bucket_counts[position] += bucket_count
+        self.sum += value_sum
+        self.count += count
+
+
+# histograms of the metrics by their name in the files of the processes, with their buckets
+_HISTOGRAM_BUCKETS = {
+    "request_durations": LATENCY_BUCKETS,
+    "stage_durations": LATENCY_BUCKETS,
+    "item_counts": ITEM_COUNT_BUCKETS,
+}
+
+
+class Metrics:
+    """
+    Collects the metrics of the service in memory and renders them in the prometheus text format.
+    Every process has its own metrics. With a multiprocess_dir, every process writes its metrics into its own
+    file of the directory every write_interval_seconds and when it renders them. The metrics of all files are
+    rendered summed up, so all workers of the server report the same metrics. The files of exited processes are
+    merged by merge_process_files, so the counts do not decrease.
+    """
+
+    def __init__(self, multiprocess_dir: str = "", write_interval_seconds: float = 5):
+        self.multiprocess_dir = multiprocess_dir
+        self.write_interval_seconds = write_interval_seconds
+        self._histograms: typing.Dict[str, typing.Dict[tuple, Histogram]] = {
+            name: {} for name in _HISTOGRAM_BUCKETS
+        }
+        self._pid = os.getpid()
+        self._file = None
+        # if there are observations which are not written yet
+        self._changed = False
+        self._writer: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def observe_request(
+        self, endpoint: str, method: str, status: int, seconds: float
+    ) -> None:
+        self._observe("request_durations", (endpoint, method, str(status)), seconds)
+
+    def observe_stage(self, endpoint: str, stage: str, seconds: float) -> None:
+        self._observe("stage_durations", (endpoint, stage), seconds)
+
+    def observe_item_count(self, endpoint: str, item: str, count: int) -> None:
+        self._observe("item_counts", (endpoint, item), count)
+
+    def render(
+        self, values: typing.Iterable[tuple[str, str, str, dict, float]] = ()
+    ) -> str:
+        """
+        :param values: further values as (name, type, help, labels, value), e.g. the statistics of the caches.
+            They are values of this process, with a multiprocess_dir they are labeled with its pid
+        :return: the metrics in the prometheus text format
+        """
+        if self.multiprocess_dir:
+            self.write_file()
+            lines = _render_all_histograms(_read_files(self.multiprocess_dir))
+        else:
+            with self._lock:
+                lines = _render_all_histograms(self._histograms)
+
+        rendered_names = set()
+        for name, metric_type, help_text, labels, value in values:
+            if self.multiprocess_dir:
+                labels = {**labels, "pid": self._pid}
+            if name not in rendered_names:
+                rendered_names.add(name)
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self) -> None:
+        """
+        Writes the metrics of the process into its file of the multiprocess_dir.
+        """
+        if not self.multiprocess_dir:
+            return
+        with self._lock:
+            self._check_process()
+            if not self._changed and self._file is not None:
+                return
+            self._changed = False
+            if self._file is None:
+                # pids are reused, the files of exited processes must not be overwritten
+                self._file = os.path.join(
+                    self.multiprocess_dir,
+                    f"metrics-{self._pid}-{uuid.uuid4().hex[:8]}.json",
+                )
+            data = json.dumps(
+                {
+                    name: [
+                        [labels, h.bucket_counts, h.sum, h.count]
+                        for labels, h in histograms.items()
+                    ]
+                    for name, histograms in self._histograms.items()
+                }
+            )
+        # the file is replaced at once, so other processes never read a partial file
+        temporary_file = self._file + ".tmp"
+        with open(temporary_file, "w") as f:
+            f.write(data)
+        os.replace(temporary_file, self._file)
+
+    def _observe(self, name: str, labels: tuple, value: float) -> None:
+        with self._lock:
+            self._check_process()
+            histograms = self._histograms[name]
+            histogram = histograms.get(labels)
+            if histogram is None:
+                histogram = histograms[labels] = Histogram(_HISTOGRAM_BUCKETS[name])
+            histogram.observe(value)
+            self._changed = True
+            if self.multiprocess_dir and self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_periodically, name="metrics-writer", daemon=True
+                )
+                self._writer.start()
+
+    def _write_periodically(self) -> None:
+        # the requests are not delayed by writing the file
+        while True:
+            time.sleep(self.write_interval_seconds)
+            self.write_file()
+
+    def _check_process(self) -> None:
+        # a forked process starts without the metrics of its parent, they are reported by the parent
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._file = None
+            self._changed = False
+            # threads do not survive a fork
+            self._writer = None
+            self._histograms = {name: {} for name in _HISTOGRAM_BUCKETS}
+
+
+def _read_files(
+    multiprocess_dir: str,
+) -> typing.Dict[str, typing.Dict[tuple, Histogram]]:
+    """
+    :return: the sum of the histograms in the files of all processes
+    """
+    with _lock_multiprocess_dir(multiprocess_dir, fcntl.LOCK_SH):
+        return _sum_files(glob.glob(os.path.join(multiprocess_dir, "metrics-*.json")))
+
+
+def _sum_files(
+    paths: typing.Iterable[str],
+) -> typing.Dict[str, typing.Dict[tuple, Histogram]]:
+    histograms = {name: {} for name in _HISTOGRAM_BUCKETS}
+    for path in paths:
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # the file was removed in the meantime
+            continue
+        for name, entries in data.items():
+            for labels, bucket_counts, value_sum, count in entries:
+                labels = tuple(labels)
+                histogram = histograms[name].get(labels)
+                if histogram is None:
+                    histogram = histograms[name][labels] = Histogram(
+                        _HISTOGRAM_BUCKETS[name]
+                    )
+                histogram.add(bucket_counts, value_sum, count)
+    return histograms
+
+
+def merge_process_files(multiprocess_dir: str, pid: int) -> None:
+    """
+    Merges the metrics files of an exited process into the file of all exited processes,
+    so the number of files does not grow with every restart of a worker.
+
+    :param multiprocess_dir:
+    :param pid: pid of the exited process
+    """
+    exited_file = os.path.join(multiprocess_dir, "metrics-exited.json")
+    with _lock_multiprocess_dir(multiprocess_dir, fcntl.LOCK_EX):
+        process_files = glob.glob(
+            os.path.join(multiprocess_dir, f"metrics-{pid}-*.json")
+        )
+        if not process_files:
+            return
+        histograms = _sum_files([exited_file, *process_files])
+        data = json.dumps(
+            {
+                name: [
+                    [labels, h.bucket_counts, h.sum, h.count]
+                    for labels, h in entries.items()
+                ]
+                for name, entries in histograms.items()
+            }
+        )
+        with open(exited_file + ".tmp", "w") as f:
+            f.write(data)
+        os.replace(exited_file + ".tmp", exited_file)
+        for path in process_files:
+            os.remove(path)
+
+
+@contextlib.contextmanager
+def _lock_multiprocess_dir(
+    multiprocess_dir: str, operation: int
+) -> typing.Iterator[None]:
+    # readers never see the files of an exited process twice or not at all while they are merged
+    with open(os.path.join(multiprocess_dir, "metrics.lock"), "a") as lock_file:
+        fcntl.flock(lock_file, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def clear_multiprocess_dir(multiprocess_dir: str) -> None:
+    """
+    Removes the metrics files of a previous run of the server.
+    """
+    for path in glob.glob(os.path.join(multiprocess_dir, "metrics-*.json*")):
+        os.remove(path)
+
+
+def _render_all_histograms(
+    histograms: typing.Dict[str, typing.Dict[tuple, Histogram]],
+) -> typing.List[str]:
+    lines = []
+    _render_histograms(
+        lines,
+        "difference_calc_request_duration_seconds",
+        "Duration of the requests until the response is returned",
+        ("endpoint", "method", "status"),
+        histograms["request_durations"],
+    )
+    _render_histograms(
+        lines,
+        "difference_calc_stage_duration_seconds",
+        "Duration of the processing stages of the requests",
+        ("endpoint", "stage"),
+        histograms["stage_durations"],
+    )
+    _render_histograms(
+        lines,
+        "difference_calc_request_items",
+        "Number of edits, tokens, mentions and relations per request",
+        ("endpoint", "item"),
+        histograms["item_counts"],
+    )
+    return lines
+
+
+def _render_histograms(
+    lines: typing.List[str],
+    name: str,
+    help_text: str,
+    label_names: typing.Sequence[str],
+    histograms: typing.Dict[tuple, Histogram],
+) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for label_values, histogram in sorted(histograms.items()):
+        labels = dict(zip(label_names, label_values))
+        cumulative_count = 0
+        for bound, count in zip(
+            (*histogram.buckets, float("inf")), histogram.bucket_counts
+        ):
+            cumulative_count += count
+            bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+            lines.append(f"{name}_bucket{bucket_labels} {cumulative_count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(value)
+
+
+def _get_endpoint() -> str:
+    # the rule is used instead of the path, so ids in the path do not create new labels
+    return request.url_rule.rule if request.url_rule else "unknown"
+
+
+@contextlib.contextmanager
+def measure_stage(stage: str) -> typing.Iterator[None]:
+    """
+    Measures the duration of a stage of the current request. Outside of requests, e.g. in jobs, nothing is measured.
+
+    :param stage: name of the stage, e.g. validation
+    """
+    if not has_request_context():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        get_metrics().observe_stage(_get_endpoint(), stage, seconds)
+        # set for profiled requests
+        server_timings = g.get("server_timings")
+        if server_timings is not None:
+            server_timings.append((stage, seconds))
+
+
+def count_document_edits(document_edits: typing.List[DocumentEdit]) -> None:
+    """
+    Counts the edits, tokens, mentions and relations of the current request.
+    """
+    if not has_request_context():
+        return
+    endpoint = _get_endpoint()
+    metrics = get_metrics()
+    metrics.observe_item_count(endpoint, "edits", len(document_edits))
+    metrics.observe_item_count(
+        endpoint,
+        "tokens",
+        sum(len(de.document.tokens or []) for de in document_edits),
+    )
+    metrics.observe_item_count(
+        endpoint, "mentions", sum(len(de.mentions or []) for de in document_edits)
+    )
+    metrics.observe_item_count(
+        endpoint, "relations", sum(len(de.relations or []) for de in document_edits)
+    )
+
+
+def start_request_timer() -> None:
+    g.request_start = time.perf_counter()
+
+
+def observe_request_duration(response: Response) -> Response:
+    start = g.pop("request_start", None)
+    if start is not None:
+        get_metrics().observe_request(
+            _get_endpoint(),
+            request.method,
+            response.status_code,
+            time.perf_counter() - start,
+        )
+    return response
+
+
+_metrics: Metrics | None = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """
+    Returns the metrics of the process, they are created on first use.
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics(
+                Config.METRICS_MULTIPROCESS_DIR,
+                Config.METRICS_WRITE_INTERVAL_SECONDS,
+            )
+    return _metrics
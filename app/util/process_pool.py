@@ -0,0 +1,33 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config import Config
+
+_process_pool: ProcessPoolExecutor | None = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_context() -> multiprocessing.context.BaseContext:
+    """
+    Returns the context the worker processes are started with. Forked workers would copy the threads
+    and locks of the server in their current state, e.g. a lock held by the log listener, so workers are
+    started by a fork server, or spawned where there is none.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Returns the process pool shared by all CPU heavy calculations, it is created on first use.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=Config.PROCESS_POOL_WORKERS,
+                mp_context=get_process_context(),
+            )
+    return _process_pool
@@ -0,0 +1,76 @@
+import cProfile
+import os
+import re
+import threading
+import time
+import uuid
+
+from flask import Response, g, request
+
+from app.config import Config
+from app.util.logger import logger
+
+PROFILING_HEADER = "X-Profile"
+PROFILE_DUMP_HEADER = "X-Profile-Dump"
+
+# only one cProfile profiler can be active in a process at a time
+_profiler_lock = threading.Lock()
+
+
+def start_profiling() -> None:
+    """
+    Starts profiling the request if profiling is enabled and requested by the header.
+    The durations of the stages measured by measure_stage are collected in g.server_timings.
+    """
+    if not Config.PROFILING_ENABLED:
+        return
+    if request.headers.get(PROFILING_HEADER, "").lower() not in ("1", "true"):
+        return
+    g.server_timings = []
+    g.profiling_start = time.perf_counter()
+    # concurrent profiled requests only get the stage durations
+    if Config.PROFILING_DIR and _profiler_lock.acquire(blocking=False):
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+def finish_profiling(response: Response) -> Response:
+    server_timings = g.pop("server_timings", None)
+    if server_timings is None:
+        return response
+
+    server_timings.append(("total", time.perf_counter() - g.pop("profiling_start")))
+
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        _profiler_lock.release()
+        response.headers[PROFILE_DUMP_HEADER] = _dump_stats(profiler)
+    response.headers["Server-Timing"] = ", ".join(
+        f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in server_timings
+    )
+    return response
+
+
+def stop_profiler(error: BaseException | None = None) -> None:
+    """
+    Stops the profiler if the response of the request was not finished by finish_profiling.
+    """
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        _profiler_lock.release()
+
+
+def _dump_stats(profiler: cProfile.Profile) -> str:
+    """
+    :return: name of the file in the profiling directory, it can be read with pstats
+    """
+    endpoint = re.sub(r"\W+", "-", request.path).strip("-")
+    file_name = (
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{endpoint}-{uuid.uuid4().hex[:8]}.pstats"
+    )
+    os.makedirs(Config.PROFILING_DIR, exist_ok=True)
+    profiler.dump_stats(os.path.join(Config.PROFILING_DIR, file_name))
+    logger.info("Profile of %s stored as %s", request.path, file_name)
+    return file_name
@@ -0,0 +1,86 @@
+import typing
+
+from pydantic import TypeAdapter
+
+from app.model.batch import BatchRequest
+from app.model.document import DocumentEdit, DocumentEditRequest
+from app.model.heatmap_session import HeatmapSessionDelta
+from app.model.reference_document import (
+    ReferenceDocumentEditsRequest,
+    ReferenceF1ScoreRequest,
+)
+from app.model.similarity_score import F1ScoreRequest, MentionMatching
+from app.util.content_negotiation import is_msgpack_media_type, unpack_msgpack
+
+# media type of requests, which send the tokens once and reference tokens and mentions by id and position
+REFERENCE_MEDIA_TYPE = "application/vnd.difference-calc.reference+json"
+REFERENCE_MSGPACK_MEDIA_TYPE = "application/vnd.difference-calc.reference+msgpack"
+
+# Validators are built once, building them is expensive compared to validating small requests
+_document_edits_adapter = TypeAdapter(typing.List[DocumentEditRequest])
+_f1_score_request_adapter = TypeAdapter(F1ScoreRequest)
+_batch_request_adapter = TypeAdapter(BatchRequest)
+_heatmap_session_delta_adapter = TypeAdapter(HeatmapSessionDelta)
+_reference_document_edits_adapter = TypeAdapter(ReferenceDocumentEditsRequest)
+_reference_f1_score_request_adapter = TypeAdapter(ReferenceF1ScoreRequest)
+_mention_matching_adapter = TypeAdapter(MentionMatching)
+
+
+def _validate(
+    adapter: TypeAdapter, data: bytes | str, media_type: typing.Optional[str]
+) -> typing.Any:
+    if is_msgpack_media_type(media_type):
+        return adapter.validate_python(unpack_msgpack(data))
+    return adapter.validate_json(data)
+
+
+def decode_document_edits(
+    data: bytes | str, media_type: typing.Optional[str] = None
+) -> typing.List[DocumentEdit]:
+    """
+    Parses and validates a json or MessagePack list of document edits in one pass.
+
+    :param data:
+    :param media_type: media type of the data, e.g. REFERENCE_MEDIA_TYPE if the edits are sent in the reference format
+    :raises pydantic.ValidationError: if the data is not a valid list of document edits
+    """
+    if media_type in (REFERENCE_MEDIA_TYPE, REFERENCE_MSGPACK_MEDIA_TYPE):
+        return _validate(
+            _reference_document_edits_adapter, data, media_type
+        ).to_document_edits()
+    return _validate(_document_edits_adapter, data, media_type)
+
+
+def decode_f1_score_request(
+    data: bytes | str, media_type: typing.Optional[str] = None
+) -> F1ScoreRequest:
+    if media_type in (REFERENCE_MEDIA_TYPE, REFERENCE_MSGPACK_MEDIA_TYPE):
+        reference_request = _validate(
+            _reference_f1_score_request_adapter, data, media_type
+        )
+        actual, predicted = ReferenceDocumentEditsRequest.model_construct(
+            document=reference_request.document,
+            edits=[reference_request.actual, reference_request.predicted],
+        ).to_document_edits()
+        return F1ScoreRequest.model_construct(actual=actual, predicted=predicted)
+    return _validate(_f1_score_request_adapter, data, media_type)
+
+
+def decode_mention_matching(value: typing.Optional[str]) -> MentionMatching:
+    """
+    :param value: the matching parameter of the request, exact if it is not set
+    :raises pydantic.ValidationError: if the value is no matching
+    """
+    return _mention_matching_adapter.validate_python(value or "exact")
+
+
+def decode_batch_request(
+    data: bytes | str, media_type: typing.Optional[str] = None
+) -> BatchRequest:
+    return _validate(_batch_request_adapter, data, media_type)
+
+
+def decode_heatmap_session_delta(
+    data: bytes | str, media_type: typing.Optional[str] = None
+) -> HeatmapSessionDelta:
+    return _validate(_heatmap_session_delta_adapter, data, media_type)
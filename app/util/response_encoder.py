@@ -0,0 +1,53 @@
+import json
+import typing
+
+import pydantic_core
+from flask import Response
+
+from app.util.content_negotiation import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    accepts_msgpack,
+    pack_msgpack,
+)
+
+
+def encode_response(
+    value: typing.Any, status: int = 200, exclude_none: bool = False
+) -> Response:
+    """
+    Creates a response from pydantic models, lists of them or other json compatible values.
+    The response is MessagePack if the client prefers it by its Accept header, json otherwise.
+    Json is written by the serializer of pydantic-core in one pass, without converting the
+    models to dicts first. Fields are written in the order of the models.
+
+    :param value:
+    :param status:
+    :param exclude_none: if fields with the value None are left out
+    :return:
+    """
+    if accepts_msgpack():
+        return Response(
+            pack_msgpack(
+                pydantic_core.to_jsonable_python(value, exclude_none=exclude_none)
+            ),
+            status=status,
+            mimetype=MSGPACK_MEDIA_TYPE,
+        )
+    return Response(
+        pydantic_core.to_json(value, exclude_none=exclude_none),
+        status=status,
+        mimetype=JSON_MEDIA_TYPE,
+    )
+
+
+def encode_json_bytes_response(data: bytes, status: int = 200) -> Response:
+    """
+    Creates a response of json which is already serialized, e.g. the result of a job.
+    It is only converted if the client prefers MessagePack.
+    """
+    if accepts_msgpack():
+        return Response(
+            pack_msgpack(json.loads(data)), status=status, mimetype=MSGPACK_MEDIA_TYPE
+        )
+    return Response(data, status=status, mimetype=JSON_MEDIA_TYPE)
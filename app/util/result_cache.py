@@ -0,0 +1,228 @@
+import hashlib
+import threading
+import time
+import typing
+from collections import OrderedDict
+
+from pydantic import BaseModel
+
+from app.config import Config
+from app.model.cache import ResultCacheStats
+from app.model.document import DocumentEdit
+
+
+class _CacheEntry:
+    __slots__ = ("value", "size", "expires_at")
+
+    def __init__(self, value: typing.Any, size: int, expires_at: float):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class ResultCache:
+    """
+    In-process LRU cache for calculation results, bounded by the number of entries and
+    their approximated size in bytes. Entries expire after ttl_seconds.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[typing.Hashable, _CacheEntry] = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key: typing.Hashable) -> typing.Optional[typing.Any]:
+        """
+        :return: the cached value or None, if there is no value for the key or it is expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry.value
+
+    def put(self, key: typing.Hashable, value: typing.Any, size: int) -> bool:
+        """
+        Adds the value and evicts the least recently used entries until the cache fits its bounds.
+        Values larger than max_bytes are not cached.
+
+        :param key:
+        :param value: value, it must not be changed after it was added
+        :param size: approximated size of the value in bytes
+        :return: False if the value was not cached, a previous value of the key is kept then
+        """
+        if not self.enabled or size > self.max_bytes:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _CacheEntry(
+                value, size, time.monotonic() + self.ttl_seconds
+            )
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+        return True
+
+    def get_or_calculate(
+        self, key: typing.Hashable, calculate: typing.Callable[[], typing.Any]
+    ) -> typing.Any:
+        """
+        Returns the cached value of the key or calculates and caches it.
+        The size of a calculated value is estimated by estimate_size.
+        """
+        if not self.enabled:
+            return calculate()
+        value = self.get(key)
+        if value is None:
+            value = calculate()
+            self.put(key, value, estimate_size(value))
+        return value
+
+    def remove(self, key: typing.Hashable) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def get_stats(self) -> ResultCacheStats:
+        with self._lock:
+            return ResultCacheStats(
+                entries=len(self._entries),
+                size=self._size,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+            )
+
+    def _remove(self, key: typing.Hashable) -> None:
+        self._size -= self._entries.pop(key).size
+
+
+# number of items of a list, whose size is used to estimate the size of the list
+_SIZE_SAMPLES = 3
+# approximated size of numbers, booleans and None
+_SCALAR_SIZE = 8
+
+
+def estimate_size(value: typing.Any) -> int:
+    """
+    Estimates the size of a value in bytes, like the length of its json serialization.
+    Lists are estimated from a few of their items, so the estimate does not depend on their length.
+    """
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, BaseModel):
+        return sum(
+            len(name) + estimate_size(field) for name, field in value.__dict__.items()
+        )
+    if isinstance(value, dict):
+        return sum(
+            estimate_size(key) + estimate_size(item) for key, item in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return 0
+        step = max(1, len(value) // _SIZE_SAMPLES)
+        samples = value[::step][:_SIZE_SAMPLES]
+        return len(value) * sum(map(estimate_size, samples)) // len(samples)
+    return _SCALAR_SIZE
+
+
+# fields which define the equality of tokens, the score is set by the heatmap
+_TOKEN_FIELDS = {"id", "text", "document_index", "sentence_index", "pos_tag"}
+
+
+class DocumentEditDigest:
+    """
+    Digests of the content of a parsed document edit. Entities are derived from the mentions
+    and scores are set on the tokens by the heatmap, so they are not part of the digests.
+    The tokens and the other fields are serialized once, the digest of the edit is derived from the
+    digest of its tokens.
+    """
+
+    __slots__ = ("tokens_digest", "edit_digest")
+
+    def __init__(self, document_edit: DocumentEdit):
+        # digest of the tokens of the document, edits with the same tokens do not need to be aligned
+        self.tokens_digest = hashlib.blake2b(
+            document_edit.document.model_dump_json(
+                include={"tokens": {"__all__": _TOKEN_FIELDS}}
+            ).encode(),
+            digest_size=16,
+        ).digest()
+        edit_hash = hashlib.blake2b(self.tokens_digest, digest_size=16)
+        edit_hash.update(
+            document_edit.model_dump_json(
+                exclude={"entities": True, "document": {"tokens"}}
+            ).encode()
+        )
+        self.edit_digest = edit_hash.hexdigest()
+
+
+def digest_document_edits(
+    document_edits: typing.List[DocumentEdit],
+) -> typing.List[DocumentEditDigest]:
+    return [DocumentEditDigest(de) for de in document_edits]
+
+
+def create_result_key(
+    endpoint: str,
+    digests: typing.List[DocumentEditDigest],
+    params: tuple = (),
+    order_insensitive: bool = False,
+) -> tuple:
+    """
+    Creates the cache key of the result of an endpoint for the given edits.
+
+    :param endpoint:
+    :param digests: digests of the edits, which are passed on to the calculation, so every edit is digested once
+    :param params: further parameters the result depends on
+    :param order_insensitive: if the result only depends on the first edit and the set of the other edits,
+        so the same edits in a different order get the same key
+    :return:
+    """
+    edit_digests = [digest.edit_digest for digest in digests]
+    if order_insensitive and edit_digests:
+        return endpoint, edit_digests[0], tuple(sorted(edit_digests[1:])), *params
+    return endpoint, tuple(edit_digests), *params
+
+
+_result_cache: ResultCache | None = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """
+    Returns the result cache shared by all endpoints, it is created on first use.
+    """
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache(
+                max_entries=Config.RESULT_CACHE_MAX_ENTRIES,
+                max_bytes=Config.RESULT_CACHE_MAX_BYTES,
+                ttl_seconds=Config.RESULT_CACHE_TTL_SECONDS,
+            )
+    return _result_cache
@@ -1,16 +1,99 @@
 import typing
-from app.model.document import Token, DocumentEdit, Mention, Entity
+from app.model.document import Token, DocumentEdit, Mention, Entity, TokenIndex
+
+
+class TokenAlignmentError(ValueError):
+    """
+    Raised if the token lists of the edits of a document can not be aligned to each other.
+    Contains the tokens without counterpart by index of the edit.
+    """
+
+    def __init__(
+        self,
+        unknown_tokens: typing.Dict[int, typing.List[Token]],
+        missing_tokens: typing.Dict[int, typing.List[Token]],
+    ):
+        self.unknown_tokens = unknown_tokens
+        self.missing_tokens = missing_tokens
+
+        details = []
+        for edit_index in sorted(unknown_tokens.keys() | missing_tokens.keys()):
+            edit_details = []
+            if edit_index in unknown_tokens:
+                edit_details.append(
+                    f"tokens not in the first edit"
+                    f" {_format_token_ids(unknown_tokens[edit_index])}"
+                )
+            if edit_index in missing_tokens:
+                edit_details.append(
+                    f"tokens of the first edit missing"
+                    f" {_format_token_ids(missing_tokens[edit_index])}"
+                )
+            details.append(f"edit {edit_index}: {' and '.join(edit_details)}")
+        super().__init__(
+            "Tokens in the different edits of the document are not the same. "
+            + "; ".join(details)
+        )
+
+    def get_details(self) -> typing.Dict[str, typing.Dict[str, typing.List[int]]]:
+        """
+        :return: ids of the unknown and missing tokens by index of the edit, for the error response
+        """
+        return {
+            "unknown_tokens": _get_token_ids_by_edit(self.unknown_tokens),
+            "missing_tokens": _get_token_ids_by_edit(self.missing_tokens),
+        }
+
+
+def _get_token_ids_by_edit(
+    tokens: typing.Dict[int, typing.List[Token]],
+) -> typing.Dict[str, typing.List[int]]:
+    return {
+        str(edit_index): [token.id for token in edit_tokens]
+        for edit_index, edit_tokens in sorted(tokens.items())
+    }
+
+
+def _format_token_ids(tokens: typing.List[Token], limit: int = 10) -> str:
+    ids = ", ".join(str(token.id) for token in tokens[:limit])
+    return f"({len(tokens)}, ids: {ids}{', ...' if len(tokens) > limit else ''})"
+
+
+def align_tokens(token_lists: typing.List[typing.List[Token]]) -> TokenIndex:
+    """
+    Aligns the tokens of all lists to the first list. Tokens are matched by id first and by
+    text, document_index, sentence_index and pos_tag second, like Token.equals.
+
+    :param token_lists:
+    :return: token index of the first list, which resolves the tokens of all lists
+    :raises TokenAlignmentError: if a token of any list has no equal token in the other list
+    """
+    token_index = TokenIndex(token_lists[0])
+    unknown_tokens = {}
+    missing_tokens = {}
+    for edit_index, token_list in enumerate(token_lists[1:], start=1):
+        unknown = [t for t in token_list or [] if token_index.get_index(t) is None]
+        edit_token_index = TokenIndex(token_list)
+        missing = [
+            t for t in token_lists[0] or [] if edit_token_index.get_index(t) is None
+        ]
+        if unknown:
+            unknown_tokens[edit_index] = unknown
+        if missing:
+            missing_tokens[edit_index] = missing
+
+    if unknown_tokens or missing_tokens:
+        raise TokenAlignmentError(unknown_tokens, missing_tokens)
+    return token_index
 
 
 def all_edits_contain_same_tokens(
     token_lists: typing.List[typing.List[Token]],
 ) -> bool:
-    base_list = token_lists[0]
-    for token_list in token_lists[1:]:
-        if not all(
-            any(tl.equals(bt) for bt in base_list) for tl in token_list
-        ) or not all(any(bt.equals(tl) for tl in token_list) for bt in base_list):
-            return False
+    try:
+        align_tokens(token_lists)
+    except TokenAlignmentError:
+        return False
     return True
 
 
@@ -37,15 +120,14 @@ def get_entities_with_mentions(mentions: typing.List[Mention]) -> typing.List[En
     ]
 
 
-def validate_document_edit_lists(document_edits: typing.List[DocumentEdit]):
+def validate_document_edit_lists(
+    document_edits: typing.List[DocumentEdit],
+) -> TokenIndex:
+    """
+    :param document_edits:
+    :return: token index of the first edit, which resolves the tokens of all edits
+    """
     if len(document_edits) < 2:
         raise ValueError("At least 2 edits of a document have to be compared.")
 
-    if not (
-        all_edits_contain_same_tokens(
-            list(map(lambda de: de.document.tokens, document_edits))
-        )
-    ):
-        raise ValueError(
-            "Tokens in the different edits of the document are not the same."
-        )
+    return align_tokens(list(map(lambda de: de.document.tokens, document_edits)))
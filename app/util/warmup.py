@@ -0,0 +1,43 @@
+import json
+
+from flask import Flask
+
+from app.controllers import api
+from app.util.compact_document import get_canonical_edit_cache
+from app.util.document_generator import generate_document_edits
+from app.util.f1_score_calculator import ScoreCalculator
+from app.util.heatmap_creator import HeatmapCreator
+from app.util.jaccard_index_calculator import JaccardIndexCalculator
+from app.util.request_decoder import decode_document_edits
+from app.util.utils import get_entities_with_mentions
+
+
+def warm_up(app: Flask) -> None:
+    """
+    Does the work of the first requests before the server forks its workers, so the workers share it
+    and do not pay for it on their first request: the swagger spec is built and the validators and
+    calculators run once on a small document. No process pools are started, they must be created
+    in the workers.
+    """
+    with app.test_request_context():
+        # the spec is built on first access and cached by the api
+        api.__schema__
+
+    data = json.dumps(
+        [
+            de.model_dump(mode="json", exclude={"entities"})
+            for de in generate_document_edits(100, annotator_count=2)
+        ]
+    )
+    document_edits = decode_document_edits(data)
+    for document_edit in document_edits:
+        document_edit.entities = get_entities_with_mentions(document_edit.mentions)
+
+    HeatmapCreator().create_heatmap(document_edits)
+    JaccardIndexCalculator().calculate(document_edits, with_matrix=True)
+    ScoreCalculator().calc_score(
+        actual_document=document_edits[0], predicted_document=document_edits[1]
+    )
+
+    # the features of the warm up document must not use the cache of the workers
+    get_canonical_edit_cache().clear()
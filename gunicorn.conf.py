@@ -0,0 +1,51 @@
+"""
+Settings of the production server, e.g.
+
+    gunicorn --config gunicorn.conf.py
+
+The app is created and warmed up once in the master process and the workers are forked from it.
+A HUP signal restarts the workers gracefully, TERM stops them after their running requests.
+"""
+
+import tempfile
+
+from app.config import Config
+
+# the workers share their metrics by files, set before the app is loaded
+if Config.WEB_WORKERS > 1 and not Config.METRICS_MULTIPROCESS_DIR:
+    Config.METRICS_MULTIPROCESS_DIR = tempfile.mkdtemp(
+        prefix="difference-calc-metrics-"
+    )
+
+wsgi_app = "wsgi:app"
+bind = Config.WEB_BIND
+workers = Config.WEB_WORKERS
+threads = Config.WEB_THREADS
+preload_app = True
+# restarts would drop the heatmap sessions and jobs, which only exist with one worker
+max_requests = Config.WEB_MAX_REQUESTS if Config.WEB_WORKERS > 1 else 0
+max_requests_jitter = Config.WEB_MAX_REQUESTS_JITTER
+timeout = Config.WEB_TIMEOUT
+graceful_timeout = Config.WEB_GRACEFUL_TIMEOUT
+
+
+def on_starting(server):
+    if Config.METRICS_MULTIPROCESS_DIR:
+        from app.util.metrics import clear_multiprocess_dir
+
+        clear_multiprocess_dir(Config.METRICS_MULTIPROCESS_DIR)
+
+
+def worker_exit(server, worker):
+    # the observations since the last periodic write of the worker
+    if Config.METRICS_MULTIPROCESS_DIR:
+        from app.util.metrics import get_metrics
+
+        get_metrics().write_file()
+
+
+def child_exit(server, worker):
+    if Config.METRICS_MULTIPROCESS_DIR:
+        from app.util.metrics import merge_process_files
+
+        merge_process_files(Config.METRICS_MULTIPROCESS_DIR, worker.pid)
@@ -4,4 +4,4 @@ from app.config import Config
 app = create_app(Config)
 
 if __name__ == "__main__":
-    app.run(debug=True, port=8443)
+    app.run(debug=Config.DEBUG, port=8443)
@@ -0,0 +1,45 @@
+from app.model.batch import BatchDocument
+from app.model.document import Document, DocumentEdit, Mention, Token
+from app.util.batch_evaluator import BatchEvaluator
+
+
+def _document_edit(tokens, mentions):
+    return DocumentEdit(
+        document=Document(tokens=tokens), mentions=mentions, relations=[]
+    )
+
+
+def test_batch_reports_failed_documents_and_aggregates():
+    """
+    A document with different tokens fails on its own, the aggregates only contain the valid documents
+    :return:
+    """
+    tokens = [
+        Token(id=1, text="The", document_index=0, sentence_index=0, pos_tag="DT"),
+        Token(id=2, text="company", document_index=1, sentence_index=0, pos_tag="NN"),
+    ]
+    other_tokens = [Token(id=3, text="cars", document_index=0, sentence_index=0)]
+    mention = Mention(tag="tag1", tokens=[tokens[1]])
+    other_mention = Mention(tag="tag2", tokens=[tokens[1]])
+
+    valid = BatchDocument(
+        document_edits=[
+            _document_edit(tokens, [mention]),
+            _document_edit(tokens, [other_mention]),
+        ],
+        metrics=["heatmap", "jaccard", "f1"],
+    )
+    invalid = BatchDocument(
+        document_edits=[_document_edit(tokens, []), _document_edit(other_tokens, [])],
+        metrics=["jaccard"],
+    )
+
+    response = BatchEvaluator().evaluate([valid, invalid])
+
+    assert response.results[0].error is None
+    assert [token.score for token in response.results[0].heatmap] == [None, 1]
+    assert response.results[1].error is not None
+    assert response.aggregates.document_count == 2
+    assert response.aggregates.failed_document_count == 1
+    assert response.aggregates.jaccard.mention_index == 0
+    assert response.aggregates.f1.mention_score == 0
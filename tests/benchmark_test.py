@@ -0,0 +1,75 @@
+from app.model.benchmark import BenchmarkReport, BenchmarkResult
+from app.util.benchmark import find_regressions, run_benchmark
+from app.util.document_generator import generate_document_edits
+
+
+def test_generated_edits_follow_parameters():
+    """
+    The same seed generates the same edits, the annotators only differ by the disagreements
+    :return:
+    """
+    document_edits = generate_document_edits(
+        1000, mention_density=0.4, annotator_count=3, disagreement_rate=0
+    )
+
+    assert len(document_edits) == 3
+    assert document_edits == generate_document_edits(
+        1000, mention_density=0.4, annotator_count=3, disagreement_rate=0
+    )
+    assert document_edits[0] == document_edits[1]
+    mention_tokens = sum(len(m.tokens) for m in document_edits[0].mentions)
+    assert 0.3 < mention_tokens / 1000 < 0.5
+    assert len(document_edits[0].relations) == len(document_edits[0].mentions) // 2
+
+    disagreeing_edits = generate_document_edits(1000, annotator_count=2)
+    assert disagreeing_edits[0] != disagreeing_edits[1]
+
+
+def test_run_benchmark_reports_every_combination():
+    """
+    Every calculator is timed for every token and annotator count
+    :return:
+    """
+    report = run_benchmark([50, 100], [2], repetitions=1)
+
+    assert [(r.calculator, r.token_count) for r in report.results] == [
+        ("heatmap", 50),
+        ("heatmap", 100),
+        ("jaccard", 50),
+        ("jaccard", 100),
+        ("f1", 50),
+        ("f1", 100),
+    ]
+    assert report.results[0].scaling_exponent is None
+    assert report.results[1].scaling_exponent is not None
+    assert all(r.peak_memory_bytes > 0 for r in report.results)
+
+
+def test_regressions_beyond_threshold():
+    """
+    Only results slower than the baseline by more than the threshold are regressions
+    :return:
+    """
+
+    def report(heatmap_seconds, f1_seconds):
+        return BenchmarkReport(
+            parameters={},
+            results=[
+                BenchmarkResult(
+                    calculator=calculator,
+                    token_count=100,
+                    annotator_count=2,
+                    min_seconds=seconds,
+                    median_seconds=seconds,
+                    peak_memory_bytes=1,
+                )
+                for calculator, seconds in (
+                    ("heatmap", heatmap_seconds),
+                    ("f1", f1_seconds),
+                )
+            ],
+        )
+
+    regressions = find_regressions(report(1.5, 1.1), report(1, 1), threshold=0.2)
+
+    assert [r.key for r in regressions] == ["heatmap/tokens=100/annotators=2"]
@@ -0,0 +1,176 @@
+from app.model.document import (
+    DocumentEdit,
+    Document,
+    Entity,
+    Mention,
+    Relation,
+    Token,
+)
+from app.util.compact_document import (
+    CanonicalDocumentEdit,
+    create_compact_document_edits,
+    get_canonical_document_edit,
+)
+from app.util.result_cache import DocumentEditDigest
+
+
+def _tokens():
+    return [
+        Token(id=1, text="The", document_index=0, sentence_index=0, pos_tag="DT"),
+        Token(id=2, text="company", document_index=1, sentence_index=0, pos_tag="NN"),
+        Token(id=3, text="sells", document_index=2, sentence_index=0, pos_tag="VBZ"),
+    ]
+
+
+def _compact_edit(mentions, relations=None):
+    tokens = _tokens()
+    document_edit = DocumentEdit(
+        document=Document(tokens=tokens), mentions=mentions, relations=relations or []
+    )
+    interner, (compact_edit, _) = create_compact_document_edits(
+        [document_edit, document_edit.model_copy(deep=True)]
+    )
+    return interner, compact_edit
+
+
+def test_equal_mentions_share_an_id():
+    """
+    Mentions which are equal by Mention.equals are interned to the same id, across edits
+    :return:
+    """
+    tokens = _tokens()
+    same_position = Token(
+        id=99, text="company", document_index=1, sentence_index=0, pos_tag="NN"
+    )
+    mention1 = Mention(tag="tag1", tokens=[tokens[0], tokens[1]])
+    mention2 = Mention(tag="tag1", tokens=[same_position, tokens[0]])
+    mention3 = Mention(tag="tag2", tokens=[tokens[0], tokens[1]])
+    document_edits = [
+        DocumentEdit(document=Document(tokens=tokens), mentions=mentions, relations=[])
+        for mentions in [[mention1, mention3], [mention2]]
+    ]
+
+    _, (compact1, compact2) = create_compact_document_edits(document_edits)
+
+    assert compact1.mentions.tolist() == [0, 1]
+    assert compact2.mentions.tolist() == [0]
+
+
+def test_edits_with_differently_ordered_tokens_are_aligned():
+    """
+    If the edits do not have the same tokens, the tokens of the other edits are resolved against the first edit
+    :return:
+    """
+    tokens = _tokens()
+    reordered_tokens = [t.model_copy() for t in reversed(tokens)]
+    document_edits = [
+        DocumentEdit(
+            document=Document(tokens=token_list),
+            mentions=[Mention(tag="tag1", tokens=[token_list[0]])],
+            relations=[],
+        )
+        for token_list in [tokens, reordered_tokens]
+    ]
+
+    _, (compact1, compact2) = create_compact_document_edits(document_edits)
+
+    assert compact1.mentions.tolist() == [0] and compact2.mentions.tolist() == [1]
+    assert [compact2.get_mention_of_token(i) for i in range(3)] == [None, None, 1]
+
+
+def test_get_mention_of_token():
+    """
+    The lookup returns the first mention containing the token and None for tokens without mention
+    :return:
+    """
+    tokens = _tokens()
+    mention1 = Mention(tag="tag1", tokens=[tokens[0], tokens[1]])
+    mention2 = Mention(tag="tag2", tokens=[tokens[1]])
+
+    _, compact_edit = _compact_edit([mention1, mention2])
+
+    assert [compact_edit.get_mention_of_token(i) for i in range(3)] == [0, 0, None]
+
+
+def test_relations_of_mention():
+    """
+    Relations are found by head and tail mention, a relation from a mention to itself is counted once
+    :return:
+    """
+    tokens = _tokens()
+    mention1 = Mention(tag="tag1", tokens=[tokens[0], tokens[1]])
+    mention2 = Mention(tag="tag2", tokens=[tokens[2]])
+    relation1 = Relation(tag="sells", mention_head=mention1, mention_tail=mention2)
+    relation2 = Relation(tag="self", mention_head=mention2, mention_tail=mention2)
+
+    _, compact_edit = _compact_edit([mention1, mention2], [relation1, relation2])
+
+    assert list(compact_edit.get_relations_of_mention(0)) == [compact_edit.relations[0]]
+    assert compact_edit.get_relations_of_mention(1).total() == 2
+
+
+def test_entity_of_mention():
+    """
+    Entities are sets of mention ids grouped by the entity of the mentions, mentions without entity have none
+    :return:
+    """
+    tokens = _tokens()
+    mention1 = Mention(tag="tag1", tokens=[tokens[0], tokens[1]], entity=Entity(id=1))
+    mention2 = Mention(tag="tag2", tokens=[tokens[2]], entity=Entity(id=1))
+    mention3 = Mention(tag="tag2", tokens=[tokens[0]])
+
+    _, compact_edit = _compact_edit([mention1, mention2, mention3])
+
+    assert compact_edit.get_entity_of_mention(1) == frozenset({0, 1})
+    assert compact_edit.get_entity_of_mention(2) is None
+
+
+def test_equals_score_of_interned_mentions():
+    """
+    Mentions which only differ in determiners score 0.5, like Mention.get_equals_score
+    :return:
+    """
+    tokens = _tokens()
+    mentions = [
+        Mention(tag="tag1", tokens=[tokens[0], tokens[1]]),
+        Mention(tag="tag1", tokens=[tokens[1]]),
+        Mention(tag="tag2", tokens=[tokens[1]]),
+    ]
+
+    interner, compact_edit = _compact_edit(mentions)
+
+    for i, m1 in zip(compact_edit.mentions, mentions):
+        for j, m2 in zip(compact_edit.mentions, mentions):
+            assert interner.get_equals_score(i, j) == m1.get_equals_score(m2)
+    assert interner.get_equals_score(0, 1) == 0.5
+
+
+def test_canonical_edit_is_cached_by_content():
+    """
+    An edit parsed again with the same content gets the cached features, scores of the tokens are ignored
+    :return:
+    """
+    tokens = _tokens()
+    document_edit = DocumentEdit(
+        document=Document(tokens=tokens),
+        mentions=[Mention(tag="tag1", tokens=[tokens[1]])],
+        relations=[],
+    )
+    canonical_edit = get_canonical_document_edit(
+        document_edit, DocumentEditDigest(document_edit)
+    )
+
+    parsed_again = document_edit.model_copy(deep=True)
+    parsed_again.document.tokens[0].score = 0.5
+    changed = document_edit.model_copy(deep=True)
+    changed.mentions[0].tag = "tag2"
+
+    assert isinstance(canonical_edit, CanonicalDocumentEdit)
+    assert (
+        get_canonical_document_edit(parsed_again, DocumentEditDigest(parsed_again))
+        is canonical_edit
+    )
+    assert (
+        get_canonical_document_edit(changed, DocumentEditDigest(changed))
+        is not canonical_edit
+    )
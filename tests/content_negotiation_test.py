@@ -0,0 +1,143 @@
+import gzip
+import json
+import zlib
+
+import pytest
+
+from app import create_app
+from app.config import Config
+
+INPUT = "tests/http/inputs/list/one-sentence-different-mentions.json"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # the responses of the small input are compressed too
+    monkeypatch.setattr(Config, "RESPONSE_COMPRESSION_MIN_BYTES", 0)
+    return create_app(Config).test_client()
+
+
+def _read_input() -> bytes:
+    with open(INPUT, "rb") as f:
+        return f.read()
+
+
+def test_gzip_request_and_response(client):
+    """
+    A gzip compressed request gets the same heatmap as the uncompressed request, compressed if it is accepted
+    :return:
+    """
+    expected = client.post(
+        "/difference-calc/heatmap", data=_read_input(), content_type="application/json"
+    ).get_json()
+
+    response = client.post(
+        "/difference-calc/heatmap",
+        data=gzip.compress(_read_input()),
+        content_type="application/json",
+        headers={"Content-Encoding": "gzip", "Accept-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert json.loads(gzip.decompress(response.data)) == expected
+
+
+def test_zstd_request_and_response(client):
+    """
+    zstd is preferred over gzip if the optional package is installed
+    :return:
+    """
+    zstandard = pytest.importorskip("zstandard")
+
+    response = client.post(
+        "/difference-calc/heatmap",
+        data=zstandard.ZstdCompressor().compress(_read_input()),
+        content_type="application/json",
+        headers={"Content-Encoding": "zstd", "Accept-Encoding": "gzip, zstd"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "zstd"
+    assert len(json.loads(zstandard.ZstdDecompressor().decompress(response.data))) == 9
+
+
+def test_decompressed_size_is_limited(client, monkeypatch):
+    """
+    Bodies which are larger than the limit after decompression are rejected
+    :return:
+    """
+    monkeypatch.setattr(Config, "REQUEST_MAX_DECOMPRESSED_BYTES", 1000)
+
+    response = client.post(
+        "/difference-calc/heatmap",
+        data=gzip.compress(_read_input()),
+        content_type="application/json",
+        headers={"Content-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 413
+
+
+def test_invalid_and_unknown_encodings(client):
+    """
+    Bodies which can not be decompressed are bad requests, unknown encodings are not supported
+    :return:
+    """
+    invalid = client.post(
+        "/difference-calc/heatmap",
+        data=b"no gzip",
+        content_type="application/json",
+        headers={"Content-Encoding": "gzip"},
+    )
+    unknown = client.post(
+        "/difference-calc/heatmap",
+        data=_read_input(),
+        content_type="application/json",
+        headers={"Content-Encoding": "br"},
+    )
+
+    assert invalid.status_code == 400
+    assert unknown.status_code == 415
+
+
+def test_streamed_response_is_compressed(client):
+    """
+    The chunks of the streamed heatmap are compressed together, the stream decompresses to all tokens
+    :return:
+    """
+    response = client.post(
+        "/difference-calc/heatmap/stream",
+        data=_read_input(),
+        content_type="application/json",
+        headers={"Accept-Encoding": "gzip"},
+    )
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    lines = zlib.decompress(response.data, 31).decode().splitlines()
+    assert len(lines) == 9
+
+
+def test_msgpack_request_and_response(client):
+    """
+    MessagePack can be sent and accepted instead of json
+    :return:
+    """
+    msgpack = pytest.importorskip("msgpack")
+    expected = client.post(
+        "/difference-calc/jaccard-index",
+        data=_read_input(),
+        content_type="application/json",
+    ).get_json()
+
+    response = client.post(
+        "/difference-calc/jaccard-index",
+        data=msgpack.packb(json.loads(_read_input())),
+        content_type="application/msgpack",
+        headers={"Accept": "application/msgpack"},
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/msgpack"
+    assert msgpack.unpackb(response.data) == expected
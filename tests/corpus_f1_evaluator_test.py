@@ -0,0 +1,70 @@
+import json
+
+from app.cli.f1_evaluation import main
+from app.util.corpus_f1_evaluator import CorpusF1Evaluator
+
+
+def _document_edit(mention_token_ids):
+    tokens = [
+        {"id": i, "text": f"t{i}", "document_index": i, "sentence_index": 0}
+        for i in range(4)
+    ]
+    return {
+        "document": {"tokens": tokens},
+        "mentions": [{"tag": "tag", "tokens": [tokens[i]]} for i in mention_token_ids],
+        "relations": [],
+    }
+
+
+def test_micro_and_macro_scores():
+    """
+    Micro scores are calculated from the summed counts, macro scores are the average of the document scores
+    :return:
+    """
+    records = [
+        (
+            "a:1",
+            json.dumps(
+                {"actual": _document_edit([0]), "predicted": _document_edit([0])}
+            ),
+        ),
+        (
+            "a:2",
+            json.dumps(
+                {"actual": _document_edit([0, 1, 2]), "predicted": _document_edit([3])}
+            ),
+        ),
+        ("a:3", '{"actual": 1}'),
+    ]
+    evaluator = CorpusF1Evaluator(chunk_size=2)
+
+    result = evaluator.evaluate(records)
+
+    assert result.document_count == 2
+    assert result.failed_document_count == 1
+    assert evaluator.errors[0].startswith("a:3: ")
+    assert result.macro.mention_score == 0.5
+    # 1 true positive of 4 actual and 2 predicted mentions
+    assert result.micro.mention_score == 2 * (1 / 4 * 1 / 2) / (1 / 4 + 1 / 2)
+
+
+def test_command_line_output_with_workers(tmp_path, capsys):
+    """
+    The command line tool scores the records in worker processes and writes only the result json to stdout
+    :return:
+    """
+    records = tmp_path / "records.ndjson"
+    records.write_text(
+        "\n".join(
+            json.dumps(
+                {"actual": _document_edit([0, 1]), "predicted": _document_edit(ids)}
+            )
+            for ids in ([0], [1], [0, 1], [2])
+        )
+    )
+
+    exit_code = main([str(records), "--workers", "2", "--chunk-size", "1"])
+
+    result = json.loads(capsys.readouterr().out)
+    assert exit_code == 0
+    assert result["document_count"] == 4
@@ -0,0 +1,83 @@
+from app.model.document import (
+    DocumentEdit,
+    Document,
+    Entity,
+    Mention,
+    Relation,
+    Token,
+)
+
+
+def _tokens():
+    return [
+        Token(id=1, text="The", document_index=0, sentence_index=0, pos_tag="DT"),
+        Token(id=2, text="company", document_index=1, sentence_index=0, pos_tag="NN"),
+        Token(id=3, text="sells", document_index=2, sentence_index=0, pos_tag="VBZ"),
+    ]
+
+
+def test_get_mention_of_token():
+    """
+    The first mention containing an equal token is returned, also for tokens of another edit
+    :return:
+    """
+    tokens = _tokens()
+    mention1 = Mention(tag="tag1", tokens=[tokens[0], tokens[1]])
+    mention2 = Mention(tag="tag2", tokens=[tokens[1]])
+    document_edit = DocumentEdit(
+        document=Document(tokens=tokens), mentions=[mention1, mention2], relations=[]
+    )
+    other_tokens = [t.model_copy(update={"id": t.id + 10}) for t in tokens]
+
+    assert [document_edit.get_mention_of_token(t) for t in tokens] == [
+        mention1,
+        mention1,
+        None,
+    ]
+    assert document_edit.get_mention_of_token(other_tokens[1]) is mention1
+
+
+def test_relations_of_mention():
+    """
+    Relations are found by head and tail mention, a relation from a mention to itself is returned once
+    :return:
+    """
+    tokens = _tokens()
+    mention1 = Mention(tag="tag1", tokens=[tokens[0], tokens[1]])
+    mention2 = Mention(tag="tag2", tokens=[tokens[2]])
+    relation1 = Relation(tag="sells", mention_head=mention1, mention_tail=mention2)
+    relation2 = Relation(tag="self", mention_head=mention2, mention_tail=mention2)
+    document_edit = DocumentEdit(
+        document=Document(tokens=tokens),
+        mentions=[mention1, mention2],
+        relations=[relation1, relation2],
+    )
+
+    assert document_edit.get_all_relations_of_mention(mention1) == [relation1]
+    assert document_edit.get_all_relations_of_mention(mention2.model_copy()) == [
+        relation1,
+        relation2,
+    ]
+
+
+def test_entity_of_mention():
+    """
+    The entity of a mention is found by an equal mention, an edit without entities has none
+    :return:
+    """
+    tokens = _tokens()
+    mention1 = Mention(tag="tag1", tokens=[tokens[0], tokens[1]])
+    mention2 = Mention(tag="tag2", tokens=[tokens[2]])
+    mention3 = Mention(tag="tag2", tokens=[tokens[0]])
+    entity = Entity(id=1, mentions=[mention1, mention2])
+    document_edit = DocumentEdit(
+        document=Document(tokens=tokens),
+        mentions=[mention1, mention2, mention3],
+        relations=[],
+    )
+    assert document_edit.get_entity_of_mention(mention2) is None
+
+    document_edit.entities = [entity]
+
+    assert document_edit.get_entity_of_mention(mention2.model_copy()) is entity
+    assert document_edit.get_entity_of_mention(mention3) is None
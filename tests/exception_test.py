@@ -0,0 +1,65 @@
+import pytest
+
+from app import create_app
+from app.config import Config
+
+
+@pytest.fixture(params=[True, False], ids=["debug", "without_debug"])
+def client(request, monkeypatch):
+    monkeypatch.setattr(Config, "DEBUG", request.param)
+    return create_app(Config).test_client()
+
+
+@pytest.fixture
+def client_without_debug(monkeypatch):
+    monkeypatch.setattr(Config, "DEBUG", False)
+    return create_app(Config).test_client()
+
+
+def test_token_alignment_error_is_a_client_error(client):
+    """
+    Edits whose tokens can not be aligned are rejected with 400 and the ids of the tokens without counterpart,
+    with and without debug mode
+    :return:
+    """
+    with open("tests/http/inputs/list/different-tokens.json", "rb") as f:
+        data = f.read()
+
+    response = client.post(
+        "/difference-calc/heatmap", data=data, content_type="application/json"
+    )
+
+    assert response.status_code == 400
+    error = response.get_json()["error"]
+    assert error["type"] == "TokenAlignmentError"
+    assert set(error["unknown_tokens"]) | set(error["missing_tokens"]) == {"1"}
+    assert ("traceback" in error) == Config.DEBUG
+
+
+def test_invalid_json_is_a_client_error_without_debug(client_without_debug):
+    """
+    Without debug mode restx handles the errors of its resources itself, they still have to be rejected with 400
+    :return:
+    """
+    response = client_without_debug.post(
+        "/difference-calc/heatmap", data=b"[{", content_type="application/json"
+    )
+
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_invalid_schema_is_a_client_error_without_debug(client_without_debug):
+    """
+    Edits that do not match the schema are rejected with 400 and the message of the validation, without a traceback
+    :return:
+    """
+    response = client_without_debug.post(
+        "/difference-calc/heatmap",
+        json=[{"document": {"tokens": "not a list"}}],
+    )
+
+    assert response.status_code == 400
+    error = response.get_json()["error"]
+    assert error["type"] == "ValidationError"
+    assert "traceback" not in error
@@ -0,0 +1,120 @@
+from app.model.document import Document, DocumentEdit, Entity, Mention, Relation, Token
+from app.util.f1_score_calculator import ScoreCalculator
+from app.util.utils import get_entities_with_mentions
+
+TOKENS = [Token(id=i, text=f"t{i}", document_index=i) for i in range(4)]
+
+
+def _document_edit(mentions, relations=()) -> DocumentEdit:
+    document_edit = DocumentEdit(
+        document=Document(tokens=TOKENS),
+        mentions=list(mentions),
+        relations=list(relations),
+    )
+    document_edit.entities = get_entities_with_mentions(document_edit.mentions)
+    return document_edit
+
+
+def _mention(tag, token_ids, entity_id=None) -> Mention:
+    return Mention(
+        tag=tag,
+        tokens=[TOKENS[i] for i in token_ids],
+        entity=Entity(id=entity_id) if entity_id is not None else None,
+    )
+
+
+def test_relations_of_common_mentions_are_counted():
+    """
+    Only relations between mentions of both edits are considered, their tags have to match
+    :return:
+    """
+    actor, activity, other = (
+        _mention("Actor", [0]),
+        _mention("Activity", [1]),
+        _mention("Actor", [2]),
+    )
+    actual = _document_edit(
+        [actor, activity, other],
+        [
+            Relation(tag="Uses", mention_head=activity, mention_tail=actor),
+            Relation(tag="Flow", mention_head=activity, mention_tail=other),
+        ],
+    )
+    predicted = _document_edit(
+        [actor, activity],
+        [Relation(tag="Uses", mention_head=activity, mention_tail=actor)],
+    )
+
+    counts = ScoreCalculator().calc_counts(actual, predicted)
+
+    assert (counts.mentions.actual, counts.mentions.true_positives) == (3, 2)
+    assert counts.relations.actual == 1
+    assert counts.relations.true_positives == 1
+    assert counts.relation_count == 3
+
+
+def test_entity_is_predicted_if_its_mentions_are_part_of_a_predicted_entity():
+    """
+    Like Entity.equals, the mentions of the actual entity have to be a subset of a predicted entity
+    :return:
+    """
+    actual = _document_edit(
+        [
+            _mention("Actor", [0], 1),
+            _mention("Actor", [1], 1),
+            _mention("Actor", [2], 2),
+        ]
+    )
+    predicted = _document_edit(
+        [
+            _mention("Actor", [0], 5),
+            _mention("Actor", [1], 5),
+            _mention("Actor", [2], 5),
+        ]
+    )
+
+    counts = ScoreCalculator().calc_counts(actual, predicted)
+
+    assert counts.entities.actual == 2
+    assert counts.entities.predicted == 1
+    assert counts.entities.true_positives == 2
+
+
+def test_partial_matching_matches_overlapping_mentions_once():
+    """
+    Overlapping mentions with the same tag are matched, every mention at most once
+    :return:
+    """
+    actual = _document_edit([_mention("Actor", [0, 1]), _mention("Actor", [2])])
+    predicted = _document_edit(
+        [_mention("Actor", [1]), _mention("Actor", [1, 2]), _mention("Activity", [2])]
+    )
+
+    exact = ScoreCalculator().calc_counts(actual, predicted)
+    partial = ScoreCalculator().calc_counts(actual, predicted, matching="partial")
+
+    assert exact.mentions.true_positives == 0
+    # [0, 1] is matched to [1] and [2] to [1, 2], although [1, 2] also overlaps [0, 1]
+    assert partial.mentions.true_positives == 2
+
+
+def test_partial_matching_compares_relations_of_matched_mentions():
+    """
+    Relations of the predicted mentions are compared like relations of the matched actual mentions
+    :return:
+    """
+    actor, activity = _mention("Actor", [0, 1]), _mention("Activity", [2])
+    predicted_actor = _mention("Actor", [1])
+    actual = _document_edit(
+        [actor, activity],
+        [Relation(tag="Uses", mention_head=activity, mention_tail=actor)],
+    )
+    predicted = _document_edit(
+        [predicted_actor, activity],
+        [Relation(tag="Uses", mention_head=activity, mention_tail=predicted_actor)],
+    )
+
+    counts = ScoreCalculator().calc_counts(actual, predicted, matching="partial")
+
+    assert counts.relations.actual == counts.relations.predicted == 1
+    assert counts.relations.true_positives == 1
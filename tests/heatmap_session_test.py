@@ -0,0 +1,186 @@
+import pytest
+
+from app import create_app
+from app.config import Config
+from app.model.document import Document, DocumentEdit, Entity, Mention, Relation, Token
+from app.model.heatmap_session import HeatmapSessionDelta
+from app.util.heatmap_creator import HeatmapCreator
+from app.util.heatmap_session import (
+    HeatmapSession,
+    InvalidDeltaError,
+    get_heatmap_sessions,
+)
+
+
+def _document_edits():
+    tokens = [
+        Token(id=i, text=text, document_index=i, sentence_index=0, pos_tag=pos_tag)
+        for i, (text, pos_tag) in enumerate(
+            [("The", "DT"), ("company", "NN"), ("sells", "VBZ"), ("cars", "NNS")]
+        )
+    ]
+    company = Mention(tag="org", tokens=tokens[0:2], entity=Entity(id=1))
+    cars = Mention(tag="product", tokens=[tokens[3]])
+    sells = Relation(tag="sells", mention_head=company, mention_tail=cars)
+    return [
+        DocumentEdit(
+            document=Document(tokens=[t.model_copy() for t in tokens]),
+            mentions=mentions,
+            relations=relations,
+        )
+        for mentions, relations in [
+            ([company, cars], [sells]),
+            ([company, cars], []),
+            ([Mention(tag="org", tokens=[tokens[1]]), cars], []),
+        ]
+    ]
+
+
+def _expected_scores(document_edits):
+    copies = [de.model_copy(deep=True) for de in document_edits]
+    return [t.score for t in HeatmapCreator().create_heatmap(copies)]
+
+
+def test_session_scores_match_heatmap_after_deltas():
+    """
+    After every delta the scores of the session are the same as a new heatmap of the changed edits
+    :return:
+    """
+    document_edits = _document_edits()
+    session = HeatmapSession([de.model_copy(deep=True) for de in document_edits])
+    assert [t.score for t in session.tokens] == _expected_scores(document_edits)
+
+    tokens = document_edits[0].document.tokens
+    company, cars = document_edits[0].mentions
+    deltas = [
+        HeatmapSessionDelta(
+            edit_index=1,
+            added_relations=[
+                Relation(tag="sells", mention_head=company, mention_tail=cars)
+            ],
+        ),
+        HeatmapSessionDelta(
+            edit_index=2,
+            removed_mentions=[document_edits[2].mentions[0]],
+            added_mentions=[Mention(tag="org", tokens=tokens[0:2])],
+        ),
+        HeatmapSessionDelta(
+            edit_index=0,
+            added_mentions=[Mention(tag="action", tokens=[tokens[2]])],
+        ),
+    ]
+    for delta in deltas:
+        previous_scores = [t.score for t in session.tokens]
+        changed_tokens = session.apply_delta(delta)
+
+        edit = document_edits[delta.edit_index]
+        for mention in delta.removed_mentions:
+            edit.mentions = [m for m in edit.mentions if not m.equals(mention)]
+        edit.mentions = edit.mentions + delta.added_mentions
+        edit.relations = edit.relations + delta.added_relations
+        expected_scores = _expected_scores(document_edits)
+
+        assert [t.score for t in session.tokens] == expected_scores
+        assert [t.index for t in changed_tokens] == [
+            i for i, score in enumerate(expected_scores) if score != previous_scores[i]
+        ]
+
+
+def _invalid_deltas():
+    document_edits = _document_edits()
+    tokens = document_edits[0].document.tokens
+    company, cars = document_edits[0].mentions
+    return {
+        "unknown_edit": HeatmapSessionDelta(edit_index=3),
+        "negative_edit": HeatmapSessionDelta(edit_index=-1),
+        "unknown_mention": HeatmapSessionDelta(
+            edit_index=1,
+            added_mentions=[Mention(tag="action", tokens=[tokens[2]])],
+            removed_mentions=[Mention(tag="unknown", tokens=[tokens[2]])],
+        ),
+        "unknown_relation": HeatmapSessionDelta(
+            edit_index=1,
+            added_mentions=[Mention(tag="action", tokens=[tokens[2]])],
+            removed_relations=[
+                Relation(tag="sells", mention_head=company, mention_tail=cars)
+            ],
+        ),
+    }
+
+
+@pytest.mark.parametrize("case", _invalid_deltas().keys())
+def test_invalid_delta_fails_without_change(case):
+    """
+    A delta for an edit that does not exist or removing annotations that are not part of the edit is rejected
+    and the heatmap stays unchanged
+    :return:
+    """
+    document_edits = _document_edits()
+    session = HeatmapSession([de.model_copy(deep=True) for de in document_edits])
+
+    with pytest.raises(InvalidDeltaError):
+        session.apply_delta(_invalid_deltas()[case])
+    assert session.apply_delta(HeatmapSessionDelta(edit_index=1)) == []
+    assert [t.score for t in session.tokens] == _expected_scores(document_edits)
+
+
+@pytest.mark.parametrize("case", _invalid_deltas().keys())
+def test_invalid_delta_is_a_client_error(monkeypatch, case):
+    """
+    The endpoint rejects invalid deltas with 400 and the session stays usable
+    :return:
+    """
+    monkeypatch.setattr(Config, "DEBUG", False)
+    client = create_app(Config).test_client()
+    response = client.post(
+        "/difference-calc/heatmap-session",
+        json=[de.model_dump(mode="json") for de in _document_edits()],
+    )
+    session_id = response.get_json()["session_id"]
+
+    response = client.patch(
+        f"/difference-calc/heatmap-session/{session_id}",
+        json=_invalid_deltas()[case].model_dump(mode="json"),
+    )
+
+    assert response.status_code == 400
+    assert response.get_json()["error"]["type"] == "InvalidDeltaError"
+    assert (
+        client.get(f"/difference-calc/heatmap-session/{session_id}").status_code == 200
+    )
+
+
+def test_session_larger_than_the_store_is_rejected(monkeypatch):
+    """
+    A session that does not fit the store is rejected with 413 instead of returning an id that does not exist
+    :return:
+    """
+    client = create_app(Config).test_client()
+    monkeypatch.setattr(get_heatmap_sessions(), "max_bytes", 1)
+    entries = get_heatmap_sessions().get_stats().entries
+
+    response = client.post(
+        "/difference-calc/heatmap-session",
+        json=[de.model_dump(mode="json") for de in _document_edits()],
+    )
+
+    assert response.status_code == 413
+    assert get_heatmap_sessions().get_stats().entries == entries
+
+
+def test_sessions_and_jobs_need_a_single_web_worker(monkeypatch):
+    """
+    With several web workers the following requests of a session or job could reach another worker,
+    they are rejected instead of being lost
+    :return:
+    """
+    monkeypatch.setattr(Config, "WEB_WORKERS", 2)
+    client = create_app(Config).test_client()
+    edits = [de.model_dump(mode="json") for de in _document_edits()]
+
+    assert (
+        client.post("/difference-calc/heatmap-session", json=edits).status_code == 501
+    )
+    assert client.post("/difference-calc/heatmap/jobs", json=edits).status_code == 501
+    assert client.get("/difference-calc/jobs/unknown").status_code == 501
+    assert client.post("/difference-calc/heatmap", json=edits).status_code == 200
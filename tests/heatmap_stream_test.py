@@ -0,0 +1,134 @@
+import json
+
+import pytest
+
+from app import create_app
+from app.config import Config
+from app.model.document import Document, DocumentEdit, Entity, Mention, Relation, Token
+from app.util.heatmap_creator import HeatmapCreator
+from app.util.result_cache import get_result_cache
+
+
+def _document_edits(mentions_lists):
+    tokens = [
+        Token(id=i, text=text, document_index=i, sentence_index=0, pos_tag=pos_tag)
+        for i, (text, pos_tag) in enumerate(
+            [("The", "DT"), ("company", "NN"), ("sells", "VBZ"), ("cars", "NNS")]
+        )
+    ]
+    return [
+        DocumentEdit(
+            document=Document(tokens=[t.model_copy() for t in tokens]),
+            mentions=mentions(tokens),
+            relations=[],
+        )
+        for mentions in mentions_lists
+    ]
+
+
+def test_streamed_heatmap_equals_heatmap():
+    """
+    The streamed tokens have the same normalized scores as the heatmap
+    :return:
+    """
+
+    def company_with_relation(tokens):
+        return [Mention(tag="org", tokens=tokens[0:2], entity=Entity(id=1))]
+
+    document_edits = _document_edits(
+        [
+            company_with_relation,
+            lambda tokens: [Mention(tag="org", tokens=[tokens[1]])],
+            lambda tokens: [
+                Mention(tag="org", tokens=tokens[0:2]),
+                Mention(tag="product", tokens=[tokens[3]]),
+            ],
+        ]
+    )
+    document_edits[0].relations = [
+        Relation(
+            tag="sells",
+            mention_head=document_edits[0].mentions[0],
+            mention_tail=document_edits[2].mentions[1],
+        )
+    ]
+    expected = HeatmapCreator().create_heatmap(
+        [de.model_copy(deep=True) for de in document_edits]
+    )
+
+    streamed = list(HeatmapCreator().stream_heatmap(document_edits))
+
+    assert [t.score for t in streamed] == [t.score for t in expected]
+    assert [t.id for t in streamed] == [0, 1, 2, 3]
+
+
+def test_streamed_heatmap_of_equal_edits():
+    """
+    If all edits agree, every score is 0 or None
+    :return:
+    """
+    document_edits = _document_edits(
+        [lambda tokens: [Mention(tag="org", tokens=[tokens[1]])]] * 2
+    )
+
+    streamed = list(HeatmapCreator().stream_heatmap(document_edits))
+
+    assert [t.score for t in streamed] == [None, 0, None, None]
+
+
+def test_heatmap_without_mentions():
+    """
+    If no token is annotated in any edit, every score is None
+    :return:
+    """
+    document_edits = _document_edits([lambda tokens: []] * 2)
+
+    tokens = HeatmapCreator().create_heatmap(document_edits)
+
+    assert [t.score for t in tokens] == [None, None, None, None]
+
+
+@pytest.fixture
+def client():
+    return create_app(Config).test_client()
+
+
+@pytest.mark.parametrize(
+    "input_file, status_code",
+    [("different-tokens.json", 400), ("list-with-only-one-element.json", 500)],
+)
+def test_invalid_edits_are_rejected_before_streaming(client, input_file, status_code):
+    """
+    Edits which can not be compared get an error response instead of a stream which breaks off
+    :return:
+    """
+    with open(f"tests/http/inputs/list/{input_file}", "rb") as f:
+        data = f.read()
+
+    response = client.post(
+        "/difference-calc/heatmap/stream", data=data, content_type="application/json"
+    )
+
+    assert response.status_code == status_code
+    assert response.get_json()["success"] is False
+
+
+def test_streamed_heatmap_is_cached(client):
+    """
+    A completely streamed heatmap is cached, the heatmap of the same edits is taken from the cache afterwards
+    :return:
+    """
+    with open("tests/http/inputs/list/one-sentence-different-mentions.json", "rb") as f:
+        data = f.read()
+    get_result_cache().clear()
+
+    streamed = client.post(
+        "/difference-calc/heatmap/stream", data=data, content_type="application/json"
+    ).get_data(as_text=True)
+    hits = get_result_cache().get_stats().hits
+    response = client.post(
+        "/difference-calc/heatmap", data=data, content_type="application/json"
+    )
+
+    assert get_result_cache().get_stats().hits == hits + 1
+    assert [json.loads(line) for line in streamed.splitlines()] == response.get_json()
@@ -0,0 +1,35 @@
+import random
+
+from app.util.interval_index import IntervalIndex
+
+
+def test_find_overlapping_intervals():
+    """
+    Intervals are closed, touching intervals overlap
+    :return:
+    """
+    index = IntervalIndex([(0, 2, "a"), (3, 3, "b"), (5, 9, "c"), (6, 7, "d")])
+
+    assert sorted(index.find_overlapping(2, 3)) == ["a", "b"]
+    assert sorted(index.find_overlapping(8, 20)) == ["c"]
+    assert index.find_overlapping(10, 12) == []
+    assert len(index) == 4
+
+
+def test_find_overlapping_is_same_as_comparing_all_intervals():
+    """
+    :return:
+    """
+    rng = random.Random(0)
+    intervals = []
+    for item in range(200):
+        start = rng.randrange(500)
+        intervals.append((start, start + rng.randrange(10), item))
+    index = IntervalIndex(intervals)
+
+    for _ in range(100):
+        start = rng.randrange(-10, 510)
+        end = start + rng.randrange(20)
+        assert sorted(index.find_overlapping(start, end)) == [
+            item for s, e, item in intervals if s <= end and e >= start
+        ]
@@ -0,0 +1,123 @@
+from itertools import combinations_with_replacement
+
+from app.model.document import (
+    Document,
+    DocumentEdit,
+    Mention,
+    Relation,
+    Token,
+    Entity,
+    TokenIndex,
+)
+from app.util.compact_document import create_compact_document_edits
+from app.util.jaccard_index_calculator import (
+    get_union,
+    get_intersection,
+    EntityKeySet,
+    JaccardIndexCalculator,
+    calculate_combined_jaccard_index,
+)
+
+
+def _tokens():
+    return [
+        Token(id=1, text="The", document_index=0, sentence_index=0, pos_tag="DT"),
+        Token(id=2, text="company", document_index=1, sentence_index=0, pos_tag="NN"),
+        Token(id=3, text="sells", document_index=2, sentence_index=0, pos_tag="VBZ"),
+    ]
+
+
+def test_mention_keys_follow_token_equality():
+    """
+    Tokens are equal by id or by their position, so mentions with tokens matching either way share a key
+    :return:
+    """
+    tokens = _tokens()
+    token_index = TokenIndex(tokens)
+    same_position = Token(
+        id=99, text="company", document_index=1, sentence_index=0, pos_tag="NN"
+    )
+    mention1 = Mention(tag="tag1", tokens=[tokens[0], tokens[1]])
+    mention2 = Mention(tag="tag1", tokens=[same_position, tokens[0]])
+    mention3 = Mention(tag="tag2", tokens=[tokens[0], tokens[1]])
+
+    assert mention1.equals(mention2)
+    assert mention1.get_key(token_index) == mention2.get_key(token_index)
+    assert mention1.get_key(token_index) != mention3.get_key(token_index)
+
+
+def test_union_and_intersection_of_mentions():
+    """
+    get_union returns the items of the first list contained in all lists, get_intersection all distinct items
+    :return:
+    """
+    tokens = _tokens()
+    mention1 = Mention(tag="tag1", tokens=[tokens[0]])
+    mention2 = Mention(tag="tag1", tokens=[tokens[1]])
+    mention3 = Mention(tag="tag1", tokens=[tokens[2]])
+    document_edits = [
+        DocumentEdit(document=Document(tokens=tokens), mentions=mentions, relations=[])
+        for mentions in [[mention1, mention2], [mention2.model_copy(), mention3]]
+    ]
+
+    _, compact_edits = create_compact_document_edits(document_edits)
+    items_lists = [ce.mentions.tolist() for ce in compact_edits]
+
+    assert items_lists == [[0, 1], [1, 2]]
+    assert get_union(items_lists) == [1]
+    assert get_intersection(items_lists) == [0, 1, 2]
+
+
+def test_entity_key_set_matches_entity_equality():
+    """
+    An entity is contained in the key set if all of its mentions are part of a contained entity
+    :return:
+    """
+    tokens = _tokens()
+    token_index = TokenIndex(tokens)
+    mention1 = Mention(tag="tag1", tokens=[tokens[0]])
+    mention2 = Mention(tag="tag1", tokens=[tokens[1]])
+    small = Entity(id=1, mentions=[mention1])
+    large = Entity(id=2, mentions=[mention1, mention2])
+
+    key_set = EntityKeySet([large.get_key(token_index)])
+    assert small.equals(large) and small.get_key(token_index) in key_set
+
+    key_set = EntityKeySet([small.get_key(token_index)])
+    assert not large.equals(small) and large.get_key(token_index) not in key_set
+
+
+def test_matrix_matches_pairwise_combined_index():
+    """
+    Every entry of the matrix is the combined jaccard index of the pair, the average is calculated from the matrix
+    :return:
+    """
+    tokens = _tokens()
+    mention1 = Mention(tag="tag1", tokens=[tokens[0]], entity=Entity(id=1))
+    mention2 = Mention(tag="tag1", tokens=[tokens[1]], entity=Entity(id=1))
+    mention3 = Mention(tag="tag2", tokens=[tokens[2]])
+    relation = Relation(tag="rel", mention_head=mention1, mention_tail=mention3)
+    document_edits = [
+        DocumentEdit(
+            document=Document(tokens=tokens),
+            mentions=mentions,
+            relations=relations,
+        )
+        for mentions, relations in [
+            ([mention1, mention2, mention3], [relation]),
+            ([mention1, mention3], [relation]),
+            ([mention2], []),
+        ]
+    ]
+    _, compact_edits = create_compact_document_edits(document_edits)
+
+    result = JaccardIndexCalculator().calculate(document_edits, with_matrix=True)
+
+    for i, j in combinations_with_replacement(range(len(document_edits)), 2):
+        expected = calculate_combined_jaccard_index(
+            [compact_edits[i], compact_edits[j]]
+        )
+        assert result.matrix[i][j] == expected
+        assert result.matrix[j][i] == expected
+    assert result.average.mention_index == (2 / 3 + 1 / 3 + 0) / 3
+    assert JaccardIndexCalculator().calculate(document_edits).matrix is None
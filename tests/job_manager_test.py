@@ -0,0 +1,109 @@
+import time
+
+import pytest
+
+from app.util.job_manager import JobManager, JobQueueFullError
+
+
+def _add(a, b, progress):
+    progress(0.5)
+    return a + b
+
+
+def _fail(progress):
+    raise ValueError("invalid data")
+
+
+def _wait(seconds, progress):
+    time.sleep(seconds)
+    return seconds
+
+
+def _wait_until_finished(manager, job):
+    deadline = time.monotonic() + 30
+    while not manager.get(job.id).is_finished:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return manager.get(job.id)
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(workers=1, max_pending_jobs=2, result_ttl_seconds=60)
+    yield manager
+    manager._pool.shutdown(cancel_futures=True)
+
+
+def test_job_result(manager):
+    """
+    A finished job has its result and full progress
+    :return:
+    """
+    job = _wait_until_finished(manager, manager.submit("add", _add, 1, 2))
+
+    assert job.status == "done"
+    assert job.result == 3
+    assert job.progress == 1
+    assert job.to_response().error is None
+
+
+def test_failed_job_has_error(manager):
+    """
+    Errors of a task are stored with the status code of the synchronous endpoint
+    :return:
+    """
+    job = _wait_until_finished(manager, manager.submit("fail", _fail))
+
+    assert job.status == "failed"
+    assert job.error.type == "ValueError"
+    assert job.error.message == "invalid data"
+    assert job.error.status_code == 500
+
+
+def test_queue_is_bounded(manager):
+    """
+    Jobs are rejected while the maximum number of jobs is queued or running
+    :return:
+    """
+    manager.submit("wait", _wait, 0.5)
+    manager.submit("wait", _wait, 0.5)
+
+    with pytest.raises(JobQueueFullError):
+        manager.submit("wait", _wait, 0.5)
+
+
+def test_cancel_queued_job(manager):
+    """
+    A cancelled job keeps its status and gets no result
+    :return:
+    """
+    running = manager.submit("wait", _wait, 0.5)
+    queued = manager.submit("wait", _wait, 0)
+
+    assert manager.cancel(queued.id).status == "cancelled"
+    _wait_until_finished(manager, running)
+    assert manager.get(queued.id).status == "cancelled"
+    assert manager.get(queued.id).result is None
+    # a cancelled job is not pending anymore
+    manager.submit("add", _add, 1, 2)
+    assert manager.cancel("unknown") is None
+
+
+def test_cancelled_running_job_keeps_its_place_until_finished(manager):
+    """
+    A running job can not be interrupted, after it is cancelled it is counted as pending until its worker is free
+    :return:
+    """
+    running = manager.submit("wait", _wait, 2)
+    manager.submit("wait", _wait, 0)
+    deadline = time.monotonic() + 30
+    while manager.get(running.id).status == "queued":
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    assert manager.cancel(running.id).status == "cancelled"
+    with pytest.raises(JobQueueFullError):
+        manager.submit("wait", _wait, 0)
+
+    running.future.result(timeout=30)
+    manager.submit("add", _add, 1, 2)
@@ -0,0 +1,90 @@
+import os
+
+from app.util.metrics import Metrics, merge_process_files
+
+
+def test_histogram_buckets_are_cumulative():
+    """
+    Every bucket counts the observations less or equal to its bound
+    :return:
+    """
+    metrics = Metrics()
+    for seconds in (0.005, 0.02, 100):
+        metrics.observe_stage("/heatmap", "validation", seconds)
+
+    lines = metrics.render().splitlines()
+
+    prefix = 'difference_calc_stage_duration_seconds_bucket{endpoint="/heatmap",stage="validation",le='
+    assert prefix + '"0.005"} 1' in lines
+    assert prefix + '"0.025"} 2' in lines
+    assert prefix + '"60"} 2' in lines
+    assert prefix + '"+Inf"} 3' in lines
+    assert (
+        'difference_calc_stage_duration_seconds_count{endpoint="/heatmap",stage="validation"} 3'
+        in lines
+    )
+
+
+def test_render_values_with_type():
+    """
+    Further values are rendered with one type line per metric
+    :return:
+    """
+    metrics = Metrics()
+
+    text = metrics.render(
+        [
+            ("cache_hits_total", "counter", "Cache hits", {"cache": "result"}, 3),
+            ("cache_hits_total", "counter", "Cache hits", {"cache": "session"}, 1),
+        ]
+    )
+
+    assert text.count("# TYPE cache_hits_total counter") == 1
+    assert 'cache_hits_total{cache="result"} 3\n' in text
+    assert 'cache_hits_total{cache="session"} 1\n' in text
+
+
+def test_metrics_of_processes_are_summed_up(tmp_path):
+    """
+    With a multiprocess dir every process renders the sum of the metrics of all processes
+    :return:
+    """
+    worker1 = Metrics(str(tmp_path))
+    worker2 = Metrics(str(tmp_path))
+    worker1.observe_request("/heatmap", "POST", 200, 0.02)
+    worker1.write_file()
+    worker2.observe_request("/heatmap", "POST", 200, 3)
+
+    lines = worker2.render().splitlines()
+
+    labels = 'endpoint="/heatmap",method="POST",status="200"'
+    assert (
+        f'difference_calc_request_duration_seconds_bucket{{{labels},le="0.025"}} 1'
+        in lines
+    )
+    assert f"difference_calc_request_duration_seconds_count{{{labels}}} 2" in lines
+    assert f"difference_calc_request_duration_seconds_sum{{{labels}}} 3.02" in lines
+
+
+def test_files_of_exited_processes_are_merged(tmp_path):
+    """
+    The files of exited processes are merged into one file, the rendered metrics stay the same
+    :return:
+    """
+    exited_worker = Metrics(str(tmp_path))
+    exited_worker.observe_request("/heatmap", "POST", 200, 0.02)
+    exited_worker.write_file()
+    merge_process_files(str(tmp_path), os.getpid())
+    exited_worker = Metrics(str(tmp_path))
+    exited_worker.observe_request("/heatmap", "POST", 200, 1)
+    exited_worker.write_file()
+    merge_process_files(str(tmp_path), os.getpid())
+    worker = Metrics(str(tmp_path))
+    worker.observe_request("/heatmap", "POST", 200, 2)
+
+    lines = worker.render().splitlines()
+
+    labels = 'endpoint="/heatmap",method="POST",status="200"'
+    assert f"difference_calc_request_duration_seconds_count{{{labels}}} 3" in lines
+    assert f"difference_calc_request_duration_seconds_sum{{{labels}}} 3.02" in lines
+    assert len(list(tmp_path.glob("metrics-*.json"))) == 2
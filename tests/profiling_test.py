@@ -0,0 +1,53 @@
+import pytest
+
+from app import create_app
+from app.config import Config
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(Config, "PROFILING_DIR", str(tmp_path))
+    return create_app(Config).test_client()
+
+
+def _post_jaccard_index(client, headers):
+    with open("tests/http/inputs/list/one-sentence-different-mentions.json", "rb") as f:
+        return client.post(
+            "/difference-calc/jaccard-index",
+            data=f.read(),
+            content_type="application/json",
+            headers=headers,
+        )
+
+
+def test_profiled_request_has_server_timing(client, tmp_path):
+    """
+    A profiled request gets the durations of its stages and its stats are stored
+    :return:
+    """
+    response = _post_jaccard_index(client, {"X-Profile": "1"})
+
+    stages = [
+        timing.split(";")[0] for timing in response.headers["Server-Timing"].split(", ")
+    ]
+    assert stages == [
+        "decode",
+        "validation",
+        "entities",
+        "computation",
+        "serialization",
+        "total",
+    ]
+    assert (tmp_path / response.headers["X-Profile-Dump"]).exists()
+
+
+def test_request_is_not_profiled_without_header(client, tmp_path):
+    """
+    Only requests with the header are profiled
+    :return:
+    """
+    response = _post_jaccard_index(client, {})
+
+    assert "Server-Timing" not in response.headers
+    assert not any(tmp_path.iterdir())
@@ -0,0 +1,172 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from app.util.f1_score_calculator import ScoreCalculator
+from app.util.heatmap_creator import HeatmapCreator
+from app.util.request_decoder import (
+    REFERENCE_MEDIA_TYPE,
+    decode_document_edits,
+    decode_f1_score_request,
+)
+from app.util.utils import get_entities_with_mentions
+
+TOKENS = [
+    {"id": 1, "text": "The", "document_index": 0, "sentence_index": 0, "pos_tag": "DT"},
+    {
+        "id": 2,
+        "text": "clerk",
+        "document_index": 1,
+        "sentence_index": 0,
+        "pos_tag": "NN",
+    },
+    {
+        "id": 3,
+        "text": "sends",
+        "document_index": 2,
+        "sentence_index": 0,
+        "pos_tag": "VBZ",
+    },
+    {"id": 4, "text": "it", "document_index": 3, "sentence_index": 0, "pos_tag": "PRP"},
+]
+
+
+def _create_edit(actor_tokens: list, entity: bool) -> dict:
+    actor = {"tag": "Actor", "tokens": [TOKENS[i - 1] for i in actor_tokens]}
+    activity = {"tag": "Activity", "tokens": [TOKENS[2]]}
+    other = {"tag": "Actor", "tokens": [TOKENS[3]]}
+    if entity:
+        actor["entity"] = {"id": 7}
+        other["entity"] = {"id": 7}
+    return {
+        "document": {"tokens": TOKENS},
+        "mentions": [actor, activity, other],
+        "relations": [
+            {"tag": "Actor Performer", "mention_head": activity, "mention_tail": actor}
+        ],
+    }
+
+
+def _create_reference_edit(actor_tokens: list, entity: bool) -> dict:
+    return {
+        "mentions": [
+            {"tag": "Actor", "tokens": actor_tokens},
+            {"tag": "Activity", "tokens": [3]},
+            {"tag": "Actor", "tokens": [4]},
+        ],
+        "relations": [{"tag": "Actor Performer", "mention_head": 1, "mention_tail": 0}],
+        "entities": [[0, 2]] if entity else [],
+    }
+
+
+def test_reference_format_creates_same_heatmap():
+    """
+    Edits in the reference format are scored like the same edits in the default format
+    :return:
+    """
+    edits = [_create_edit([1, 2], True), _create_edit([2], False)]
+    reference = {
+        "document": {"tokens": TOKENS},
+        "edits": [
+            _create_reference_edit([1, 2], True),
+            _create_reference_edit([2], False),
+        ],
+    }
+
+    heatmaps = []
+    for document_edits in (
+        decode_document_edits(json.dumps(edits)),
+        decode_document_edits(json.dumps(reference), REFERENCE_MEDIA_TYPE),
+    ):
+        for document_edit in document_edits:
+            document_edit.entities = get_entities_with_mentions(document_edit.mentions)
+        heatmaps.append(
+            [t.score for t in HeatmapCreator().create_heatmap(document_edits)]
+        )
+
+    assert heatmaps[0] == heatmaps[1]
+
+
+def test_reference_format_creates_same_f1_score():
+    """
+    The f1-score request references the tokens of one document from both edits
+    :return:
+    """
+    default_request = decode_f1_score_request(
+        json.dumps(
+            {"actual": _create_edit([1, 2], True), "predicted": _create_edit([2], True)}
+        )
+    )
+    reference_request = decode_f1_score_request(
+        json.dumps(
+            {
+                "document": {"tokens": TOKENS},
+                "actual": _create_reference_edit([1, 2], True),
+                "predicted": _create_reference_edit([2], True),
+            }
+        ),
+        REFERENCE_MEDIA_TYPE,
+    )
+
+    scores = []
+    for f1_score_request in (default_request, reference_request):
+        for document_edit in (f1_score_request.actual, f1_score_request.predicted):
+            document_edit.entities = get_entities_with_mentions(document_edit.mentions)
+        scores.append(
+            ScoreCalculator().calc_score(
+                actual_document=f1_score_request.actual,
+                predicted_document=f1_score_request.predicted,
+            )
+        )
+
+    assert scores[0] == scores[1]
+
+
+def test_references_share_tokens_and_mentions():
+    """
+    Tokens and mentions are resolved to the same objects instead of copies
+    :return:
+    """
+    reference = {
+        "document": {"tokens": TOKENS},
+        "edits": [_create_reference_edit([1, 2], True)] * 2,
+    }
+
+    document_edits = decode_document_edits(json.dumps(reference), REFERENCE_MEDIA_TYPE)
+
+    tokens = document_edits[0].document.tokens
+    assert document_edits[1].document.tokens is tokens
+    assert document_edits[1].mentions[0].tokens[0] is tokens[0]
+    assert document_edits[0].relations[0].mention_tail is document_edits[0].mentions[0]
+    assert (
+        document_edits[0].mentions[2].entity.id
+        == document_edits[0].mentions[0].entity.id
+    )
+
+
+@pytest.mark.parametrize(
+    "edit",
+    [
+        {"mentions": [{"tag": "Actor", "tokens": [5]}], "relations": []},
+        {
+            "mentions": [{"tag": "Actor", "tokens": [1]}],
+            "relations": [{"tag": "Flow", "mention_head": 0, "mention_tail": 1}],
+        },
+        {
+            "mentions": [{"tag": "Actor", "tokens": [1]}],
+            "relations": [],
+            "entities": [[0], [0]],
+        },
+    ],
+)
+def test_invalid_references_are_rejected(edit: dict):
+    """
+    Unknown tokens and mentions and mentions in multiple entities are validation errors
+    :return:
+    """
+    with pytest.raises(ValidationError):
+        decode_document_edits(
+            json.dumps({"document": {"tokens": TOKENS}, "edits": [edit]}),
+            REFERENCE_MEDIA_TYPE,
+        )
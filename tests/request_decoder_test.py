@@ -0,0 +1,25 @@
+import pytest
+from pydantic import ValidationError
+
+from app.util.request_decoder import decode_document_edits, decode_f1_score_request
+
+DOCUMENT_EDIT = '{"document": {"tokens": [{"id": 1, "text": "The"}]}, "mentions": [], "relations": []}'
+
+
+def test_decode_document_edits():
+    document_edits = decode_document_edits(f"[{DOCUMENT_EDIT}, {DOCUMENT_EDIT}]")
+
+    assert len(document_edits) == 2
+    assert document_edits[0].document.tokens[0].text == "The"
+
+
+def test_mentions_and_relations_are_required():
+    """
+    Like the documented request model, mentions and relations have to be sent
+    :return:
+    """
+    with pytest.raises(ValidationError):
+        decode_document_edits('[{"document": {"tokens": []}, "mentions": []}]')
+
+    with pytest.raises(ValidationError):
+        decode_f1_score_request(f'{{"actual": {DOCUMENT_EDIT}}}')
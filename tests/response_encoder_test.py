@@ -0,0 +1,41 @@
+import json
+
+from app.model.document import Token
+from app.util.response_encoder import encode_response
+
+
+def test_encode_response_equals_model_dump():
+    """
+    The serialized models are the same as the dumped models
+    :return:
+    """
+    tokens = [
+        Token(id=1, text="The", document_index=0, sentence_index=0, pos_tag="DT"),
+        Token(
+            id=2,
+            text="clerk",
+            document_index=1,
+            sentence_index=0,
+            pos_tag="NN",
+            score=0.5,
+        ),
+    ]
+
+    response = encode_response(tokens, status=202)
+
+    assert response.status_code == 202
+    assert response.mimetype == "application/json"
+    assert json.loads(response.data) == [t.model_dump(mode="json") for t in tokens]
+
+
+def test_encode_response_exclude_none():
+    """
+    Fields with the value None are left out if requested
+    :return:
+    """
+    token = Token(id=1, text="The", document_index=0, sentence_index=0, pos_tag="DT")
+
+    data = json.loads(encode_response(token, exclude_none=True).data)
+
+    assert "score" not in data
+    assert data == token.model_dump(mode="json", exclude_none=True)
@@ -0,0 +1,119 @@
+from app.model.document import Document, DocumentEdit, Mention, Token
+from app.util.result_cache import (
+    ResultCache,
+    create_result_key,
+    digest_document_edits,
+    estimate_size,
+)
+
+
+def _document_edits():
+    tokens = [
+        Token(id=1, text="The", document_index=0, sentence_index=0, pos_tag="DT"),
+        Token(id=2, text="company", document_index=1, sentence_index=0, pos_tag="NN"),
+    ]
+    return [
+        DocumentEdit(
+            document=Document(tokens=tokens),
+            mentions=[Mention(tag=tag, tokens=[tokens[1]])],
+            relations=[],
+        )
+        for tag in ["tag1", "tag2", "tag3"]
+    ]
+
+
+def test_least_recently_used_entry_is_evicted():
+    """
+    Reading an entry marks it as used, so the entry which was not read is evicted first
+    :return:
+    """
+    cache = ResultCache(max_entries=2, max_bytes=1000, ttl_seconds=60)
+    cache.put("a", 1, 10)
+    cache.put("b", 2, 10)
+    assert cache.get("a") == 1
+
+    cache.put("c", 3, 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.get_stats()
+    assert (stats.entries, stats.hits, stats.misses, stats.evictions) == (2, 3, 1, 1)
+
+
+def test_cache_is_bounded_by_size_and_ttl():
+    """
+    Entries are evicted until the size fits, values larger than the cache and expired entries are not returned
+    :return:
+    """
+    cache = ResultCache(max_entries=10, max_bytes=100, ttl_seconds=60)
+    cache.put("a", 1, 60)
+    assert cache.put("b", 2, 60)
+    assert not cache.put("c", 3, 101)
+
+    assert cache.get("a") is None and cache.get("c") is None
+    assert cache.get_stats().size == 60
+
+    expired_cache = ResultCache(max_entries=10, max_bytes=100, ttl_seconds=0)
+    expired_cache.put("a", 1, 10)
+    assert expired_cache.get("a") is None
+    assert expired_cache.get_stats().entries == 0
+
+
+def test_result_keys_of_reordered_edits():
+    """
+    Only order insensitive keys match for the same edits in a different order, the first edit has to be the same
+    :return:
+    """
+    edit1, edit2, edit3 = _document_edits()
+    digest1, digest2, digest3 = digest_document_edits([edit1, edit2, edit3])
+    parsed_again = digest_document_edits(
+        [de.model_copy(deep=True) for de in [edit1, edit3, edit2]]
+    )
+
+    assert create_result_key("heatmap", [digest1, digest2, digest3], (), True) == (
+        create_result_key("heatmap", parsed_again, (), True)
+    )
+    assert create_result_key("heatmap", [digest1, digest2, digest3]) != (
+        create_result_key("heatmap", parsed_again)
+    )
+    assert create_result_key("heatmap", [digest1, digest2, digest3], (), True) != (
+        create_result_key("heatmap", [digest2, digest1, digest3], (), True)
+    )
+    assert create_result_key("jaccard-index", [digest1], (True,)) != (
+        create_result_key("jaccard-index", [digest1], (False,))
+    )
+
+
+def test_edits_with_the_same_tokens_share_the_tokens_digest():
+    """
+    The tokens digest only depends on the tokens, the digest of the edit on the tokens and the annotations
+    :return:
+    """
+    edit1, edit2, _ = _document_edits()
+    renamed = edit1.model_copy(deep=True)
+    renamed.document.name = "renamed"
+    digest1, digest2, renamed_digest = digest_document_edits([edit1, edit2, renamed])
+
+    assert (
+        digest1.tokens_digest == digest2.tokens_digest == renamed_digest.tokens_digest
+    )
+    assert (
+        len({digest1.edit_digest, digest2.edit_digest, renamed_digest.edit_digest}) == 3
+    )
+
+
+def test_estimated_size_of_calculated_values():
+    """
+    The size of a list is estimated from a few of its items
+    :return:
+    """
+    tokens = _document_edits()[0].document.tokens
+    token_size = estimate_size(tokens[0])
+
+    assert estimate_size("company") == 7
+    assert estimate_size([tokens[0]] * 1000) == 1000 * token_size
+    assert estimate_size({"tokens": []}) == 6
+
+    cache = ResultCache(max_entries=10, max_bytes=10_000, ttl_seconds=60)
+    cache.get_or_calculate("heatmap", lambda: [tokens[0]] * 10)
+    assert cache.get_stats().size == 10 * token_size
@@ -0,0 +1,49 @@
+import pytest
+
+from app.model.document import Token
+from app.util.utils import align_tokens, TokenAlignmentError
+
+
+def _tokens():
+    return [
+        Token(id=1, text="The", document_index=0, sentence_index=0, pos_tag="DT"),
+        Token(id=2, text="company", document_index=1, sentence_index=0, pos_tag="NN"),
+        Token(id=3, text="sells", document_index=2, sentence_index=0, pos_tag="VBZ"),
+    ]
+
+
+def test_align_tokens_by_id_and_position():
+    """
+    Tokens are aligned by their id or, for different ids, by their position
+    :return:
+    """
+    tokens = _tokens()
+    other_tokens = [
+        tokens[2],
+        Token(id=20, text="company", document_index=1, sentence_index=0, pos_tag="NN"),
+        tokens[0],
+    ]
+
+    token_index = align_tokens([tokens, other_tokens])
+
+    assert [token_index.get_index(t) for t in other_tokens] == [2, 1, 0]
+
+
+def test_align_tokens_reports_unaligned_tokens():
+    """
+    Tokens without counterpart are reported for the edit they are missing in or unknown to
+    :return:
+    """
+    tokens = _tokens()
+    unknown = Token(id=4, text="cars", document_index=3, sentence_index=0)
+
+    with pytest.raises(TokenAlignmentError) as error:
+        align_tokens([tokens, tokens, [tokens[0], tokens[1], unknown]])
+
+    assert error.value.unknown_tokens == {2: [unknown]}
+    assert error.value.missing_tokens == {2: [tokens[2]]}
+    assert error.value.get_details() == {
+        "unknown_tokens": {"2": [4]},
+        "missing_tokens": {"2": [3]},
+    }
+    assert isinstance(error.value, ValueError)
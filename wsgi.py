@@ -0,0 +1,6 @@
+from app import create_app
+from app.config import Config
+from app.util.warmup import warm_up
+
+app = create_app(Config)
+warm_up(app)